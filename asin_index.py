@@ -0,0 +1,135 @@
+import json
+import re
+import sqlite3
+from collections import Counter
+from datetime import date
+from urllib.parse import unquote
+
+_ASIN_IN_URL = re.compile(r'/dp/([A-Z0-9]{10})')
+
+# Fields whose changes are kept as history; everything else only lives in the latest record
+TRACKED_FIELDS = ('price', 'rating', 'reviews')
+
+
+def asin_from_url(url):
+    """ASIN of a product or sponsored-click URL (the /dp/ path may be URL-encoded), or None"""
+    match = _ASIN_IN_URL.search(unquote(url or ''))
+    return match.group(1) if match else None
+
+
+def product_asin(product):
+    """The product's ASIN: the captured data-asin, else the one in its URL, else None"""
+    asin = product.get('asin')
+    if asin and asin != 'N/A':
+        return asin
+    return asin_from_url(product.get('product_url'))
+
+
+class AsinIndex:
+    """Persistent ASIN -> latest record index with a compact history of price/rating/review changes
+
+    The latest tracked values of every ASIN are held in a dict, so deciding whether a scraped product
+    is new, changed or unchanged is a single hash lookup; only new and changed products touch disk.
+    """
+
+    def __init__(self, path='asin_index.sqlite3'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS products (
+                asin TEXT PRIMARY KEY,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                price INTEGER,
+                rating REAL,
+                reviews INTEGER,
+                record TEXT NOT NULL
+            );
+            -- First sighting stores every tracked field; later rows only the ones that changed (NULL = same)
+            CREATE TABLE IF NOT EXISTS changes (
+                asin TEXT NOT NULL,
+                seen_at TEXT NOT NULL,
+                price INTEGER,
+                rating REAL,
+                reviews INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS changes_by_asin ON changes (asin);
+        ''')
+        self.conn.commit()
+        self.latest = {
+            asin: (price, rating, reviews)
+            for asin, price, rating, reviews in self.conn.execute('SELECT asin, price, rating, reviews FROM products')
+        }
+
+    def __len__(self):
+        return len(self.latest)
+
+    def __contains__(self, asin):
+        return asin in self.latest
+
+    def upsert(self, products, seen_at=None):
+        """Fold scraped products in; returns counts of new, changed, unchanged and skipped (no ASIN) products"""
+        seen_at = str(seen_at or date.today())
+        counts = Counter()
+        inserts, updates, touches, changes = [], [], [], []
+
+        for product in products:
+            asin = product_asin(product)
+            if not asin:
+                counts['skipped'] += 1
+                continue
+            values = tuple(product.get(field) for field in TRACKED_FIELDS)
+            record = json.dumps(product, ensure_ascii=False)
+            previous = self.latest.get(asin)
+
+            if previous is None:
+                counts['new'] += 1
+                inserts.append((asin, seen_at, seen_at, *values, record))
+                changes.append((asin, seen_at, *values))
+            elif previous != values:
+                counts['changed'] += 1
+                updates.append((seen_at, *values, record, asin))
+                changes.append((asin, seen_at, *(new if new != old else None for old, new in zip(previous, values))))
+            else:
+                counts['unchanged'] += 1
+                touches.append((seen_at, record, asin))
+            self.latest[asin] = values
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO products (asin, first_seen, last_seen, price, rating, reviews, record) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', inserts
+            )
+            self.conn.executemany(
+                'UPDATE products SET last_seen = ?, price = ?, rating = ?, reviews = ?, record = ? WHERE asin = ?', updates
+            )
+            self.conn.executemany('UPDATE products SET last_seen = ?, record = ? WHERE asin = ?', touches)
+            self.conn.executemany(
+                'INSERT INTO changes (asin, seen_at, price, rating, reviews) VALUES (?, ?, ?, ?, ?)', changes
+            )
+        return counts
+
+    def get(self, asin):
+        """Latest record for an ASIN, or None"""
+        row = self.conn.execute('SELECT record FROM products WHERE asin = ?', (asin,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, asin):
+        """[(seen_at, {'price', 'rating', 'reviews'})] with the deltas expanded to full values"""
+        state = {}
+        history = []
+        for seen_at, *values in self.conn.execute(
+            'SELECT seen_at, price, rating, reviews FROM changes WHERE asin = ? ORDER BY rowid', (asin,)
+        ):
+            state.update({field: value for field, value in zip(TRACKED_FIELDS, values) if value is not None})
+            history.append((seen_at, dict(state)))
+        return history
+
+    def iter_records(self):
+        """Every indexed product's latest record"""
+        for (record,) in self.conn.execute('SELECT record FROM products ORDER BY asin'):
+            yield json.loads(record)
+
+    def close(self):
+        self.conn.close()
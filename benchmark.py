@@ -0,0 +1,236 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from brand_engine import BrandMatcher
+from data_cleaning import assign_brands, clean_products, drop_duplicate_products, filter_soft_toys
+from fetchers import FetchedPage, PageFetcher, PageJob
+from fixture_server import FIXTURE_DIR
+from instrumentation import Instrumentation
+from scrape_data import AdvancedAmazonScraper
+
+_PAGE_FILE = re.compile(r'(.+)_page_(\d+)\.html$')
+
+
+def load_pages(pages_dir=FIXTURE_DIR):
+    """[(PageJob, html)] for every saved <keyword>_page_<n>.html, in keyword and page order"""
+    pages = []
+    for path in glob.glob(os.path.join(pages_dir, '*_page_*.html')):
+        match = _PAGE_FILE.match(os.path.basename(path))
+        if match:
+            with open(path, encoding='utf-8') as f:
+                keyword = match.group(1).replace('_', ' ')
+                pages.append((PageJob(keyword, int(match.group(2)), path), f.read()))
+    return sorted(pages, key=lambda page: (page[0].keyword, page[0].page))
+
+
+def _seconds(func, repeat):
+    """Wall time of each of `repeat` calls"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _peak_mb(func):
+    """Peak Python heap allocated while func runs (measured on its own pass, tracing slows everything down)"""
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def _throughput(items, timings):
+    """Best/median seconds over the repeats and items per second at the median"""
+    median = statistics.median(timings)
+    return {
+        'items': items,
+        'best_s': round(min(timings), 6),
+        'median_s': round(median, 6),
+        'per_s': round(items / median, 1) if median else None,
+    }
+
+
+def bench_extraction(pages, repeat):
+    """Full per-page path of the scraper: parse, containers, pagination, sponsored check, fields, brand, validation"""
+    metrics = Instrumentation(quiet=True)
+    # A fetcher is given so none is built; nothing is fetched, pages are handed straight to process_page
+    scraper = AdvancedAmazonScraper(fetcher=PageFetcher(), metrics=metrics)
+    products = []
+
+    def run():
+        products.clear()
+        for job, html in pages:
+            products.extend(scraper.process_page(FetchedPage(job, html=html, title=job.keyword, status=200)))
+
+    run()  # warm-up: first-call imports and the brand cache, kept out of the timed passes
+    page_timings = []
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for job, html in pages:
+            page_start = time.perf_counter()
+            scraper.process_page(FetchedPage(job, html=html, title=job.keyword, status=200))
+            page_timings.append(time.perf_counter() - page_start)
+        timings.append(time.perf_counter() - start)
+
+    profile = metrics.profile()
+    result = {
+        'pages': len(pages),
+        'containers': profile['counters'].get('containers', 0) // (repeat + 1),
+        'products': len(products),
+        'run': _throughput(len(pages), timings),
+        'per_page_ms': {
+            'median': round(statistics.median(page_timings) * 1000, 3),
+            'max': round(max(page_timings) * 1000, 3),
+        },
+        'per_product_us': round(statistics.median(timings) / len(products) * 1e6, 1) if products else None,
+        'stages_mean_ms': {stage: timing['mean_ms'] for stage, timing in profile['timings'].items()},
+        'peak_mb': _peak_mb(run),
+    }
+    scraper.close()
+    return result, products
+
+
+def bench_brand_engine(titles, repeat):
+    """Brand lookups over the titles: the scraper's rule with a cold and a warm cache, and the notebook's rule"""
+    def cold():
+        matcher = BrandMatcher()
+        for title in titles:
+            matcher.brand_from_title(title)
+
+    warm_matcher = BrandMatcher()
+    for title in titles:
+        warm_matcher.brand_from_title(title)
+
+    def warm():
+        for title in titles:
+            warm_matcher.brand_from_title(title)
+
+    def notebook():
+        for title in titles:
+            warm_matcher.extract_brand_from_title(title)
+
+    return {
+        'titles': len(titles),
+        'scraper_rule_cold': _throughput(len(titles), _seconds(cold, repeat)),
+        'scraper_rule_warm': _throughput(len(titles), _seconds(warm, repeat)),
+        'notebook_rule': _throughput(len(titles), _seconds(notebook, repeat)),
+        'peak_mb': _peak_mb(cold),
+    }
+
+
+def bench_dataframe(df, repeat):
+    """The notebook's post-processing steps, each on its own, over a DataFrame of scraped rows"""
+    matcher = BrandMatcher()
+    cleaned = clean_products(df)
+    steps = {
+        'clean_products': lambda: clean_products(df),
+        'filter_soft_toys': lambda: filter_soft_toys(cleaned),
+        'drop_duplicate_products': lambda: drop_duplicate_products(cleaned),
+        'assign_brands': lambda: assign_brands(cleaned['title'], matcher.extract_brand_from_title),
+    }
+
+    def pipeline():
+        rows = drop_duplicate_products(filter_soft_toys(clean_products(df)))
+        rows['brand'] = assign_brands(rows['title'], matcher.extract_brand_from_title)
+
+    result = {'rows': len(df)}
+    for name, step in steps.items():
+        result[name] = _throughput(len(df), _seconds(step, repeat))
+    result['pipeline'] = _throughput(len(df), _seconds(pipeline, repeat))
+    result['peak_mb'] = _peak_mb(pipeline)
+    return result
+
+
+def scaled_frame(frame, rows):
+    """Repeat the sample rows up to `rows`; titles are varied per copy so distinct-value caches do not flatter"""
+    copies = -(-rows // len(frame))
+    df = pd.concat([frame] * copies, ignore_index=True).head(rows)
+    copy = (df.index // len(frame)).astype(str)
+    df['title'] = df['title'].astype(str) + ' #' + copy
+    return df
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline):
+    """Print the change of every median time between a baseline report and this one"""
+    def medians(node, path=()):
+        if isinstance(node, dict):
+            if 'median_s' in node:
+                yield '.'.join(path), node['median_s']
+            for key, value in node.items():
+                yield from medians(value, path + (key,))
+
+    before = dict(medians(baseline))
+    print(f"\n📊 Compared with {baseline.get('commit') or 'baseline'} (median seconds, lower is better):")
+    for name, seconds in medians(report):
+        if before.get(name):
+            change = (seconds - before[name]) / before[name] * 100
+            print(f"   {name:<44} {before[name]:>10.4f} -> {seconds:>10.4f}  {change:+6.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark of extraction and post-processing over saved search pages")
+    parser.add_argument('--pages-dir', default=FIXTURE_DIR, help="directory of saved <keyword>_page_<n>.html files")
+    parser.add_argument('--titles', default="amazon_soft_toys_sponsored_enhanced.csv",
+                        help="scraped CSV whose rows feed the brand and DataFrame benchmarks (with the extracted products)")
+    parser.add_argument('--rows', type=int, default=100000, help="DataFrame size for the post-processing benchmark")
+    parser.add_argument('--repeat', type=int, default=5, help="timed passes per benchmark")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--compare', help="earlier JSON report to compare median times against")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir)
+    if not pages:
+        sys.exit(f"❌ No saved search pages in {args.pages_dir}")
+
+    extraction, products = bench_extraction(pages, args.repeat)
+    sample = pd.DataFrame(products)
+    if args.titles and os.path.isfile(args.titles):
+        sample = pd.concat([sample, pd.read_csv(args.titles)], ignore_index=True)
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'pages_dir': args.pages_dir, 'titles': args.titles, 'rows': args.rows, 'repeat': args.repeat},
+        'extraction': extraction,
+        'brand_engine': bench_brand_engine(sample['title'].astype(str).tolist(), args.repeat),
+        'dataframe': bench_dataframe(scaled_frame(sample, args.rows), args.repeat),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"✅ Benchmark report written to '{args.output}'")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
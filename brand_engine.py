@@ -0,0 +1,325 @@
+import argparse
+import re
+from functools import lru_cache
+
+# The scraper's fallback list; order matters, the first brand found in a title wins
+SOFT_TOY_BRANDS = [
+    'Babique', 'CozyHug', 'VIH-AAN', 'Storio', 'Niku', 'Webby',
+    'Dimpy', 'Tickles', 'Frantic', 'Ultra', 'Cuddles', 'Mebby',
+    'Archies', 'Toyshine', 'Babyhug', 'Deals India', 'FunBlast',
+    'GUND', 'Ty', 'Melissa & Doug', 'LOVEY DOVEY', 'Aldea',
+    'odinbirds', 'SCOOBA', 'MGP Creation', 'Richy Toys', 'One94Store',
+    'WILD REPUBLIC', 'Storescent', 'YBN', 'Mirada', 'Amazon Brand',
+    'Jam & Honey', 'Hamleys', 'Fisher-Price', 'Mattel', 'Steiff',
+    'Build-A-Bear', 'Aurora', 'Jellycat', 'IKEA', 'Disney',
+    'Funskool', 'Kiddieland', 'Chicco', 'Vtech', 'LeapFrog',
+    'Tomy', 'Playgro', 'Manhattan Toy', 'Lamaze', 'Bright Starts'
+]
+
+# Brands seen in the scraped CSVs (the notebook's re-branding list), in the notebook's order
+KNOWN_BRANDS = [
+    'CozyHug', 'Enchanted Threads', 'LOVEY DOVEY', 'ADORA', 'Madhubala',
+    'Storescent', 'Babique', 'Tickles', 'Amazon Brand', 'Jam & Honey',
+    'HUG \'n\' FEEL SOFT TOYS', 'HOMECUTE', 'BABY FOREST', 'Primo Cleats',
+    'SHAPZE', 'VIH-AAN', 'Storio', 'Niku', 'Webby', 'Dimpy', 'Frantic',
+    'Ultra', 'Cuddles', 'Mebby', 'Archies', 'Toyshine', 'Babyhug',
+    'Deals India', 'FunBlast', 'GUND', 'Ty', 'Melissa & Doug', 'Aldea',
+    'odinbirds', 'SCOOBA', 'MGP Creation', 'Richy Toys', 'One94Store',
+    'WILD REPUBLIC', 'YBN', 'Mirada', 'Krow', 'AVSHUB', 'Thrive Toys',
+    'NOH Creations', 'Pandaworld', 'Crispy Toys', 'Vaishno', 'AVS',
+    'Mashes', 'Toys Guru', 'SUPER TOY', 'BACK BANCHERS', 'DISHIV',
+    'Asmita Enterprise', 'SOPTOOL', 'MADHUBALA', 'Nexivntra', 'Webby',
+    'Actino', 'Masha and the Bear', 'CLICK4DEAL', 'BEST4U TOYS',
+    'White Star', 'Panda\'s Box', 'SnuggyBuggy', 'CloudPeak', 'TechMax',
+    'TOYTALES', 'Hapsters', 'TOMTEDDY', 'Tinytotem', 'Pegasos',
+    'VEDA', 'KIZDY', 'Galaxy world', 'MA Toys', 'RVA', 'BLOOM PLEX',
+    'CHANT HARI', 'VOIDROP', 'SWARAH COLLECTIONS', 'NISHAD CREATIONS',
+    'KEKEMI', 'VARUSH', 'Dholu', 'Fusked Flufies', 'QTM', 'SADAR DEAL',
+    'Tarakid', 'LITTLE GINNIE', 'LoopHoop', 'PH Artistic', 'AAYU',
+    'Vedartah', 'CHIRKUT', 'FUNPLANET', 'BEMOX', 'SUNNFUN', 'Toyshine',
+    'CloudPeakEnt', 'Richy', 'Aleda', 'NESTA TOYS', '4AJ BAZAAR'
+]
+
+# Common non-brand words
+EXCLUDE_WORDS = frozenset({
+    'soft', 'toy', 'toys', 'plush', 'stuffed', 'teddy', 'bear', 'doll',
+    'cm', 'inch', 'inches', 'size', 'color', 'colour', 'piece', 'pieces',
+    'pack', 'set', 'amazon', 'delivery', 'prime', 'deal', 'offer', 'sale',
+    'new', 'old', 'big', 'small', 'large', 'medium', 'mini', 'giant',
+    'cute', 'adorable', 'beautiful', 'lovely', 'sweet', 'nice', 'good',
+    'best', 'top', 'premium', 'quality', 'super', 'ultra', 'max',
+    'baby', 'kids', 'children', 'child', 'adult', 'boy', 'girl',
+    'red', 'blue', 'green', 'yellow', 'pink', 'white', 'black', 'brown',
+    'with', 'and', 'for', 'the', 'a', 'an', 'is', 'in', 'on', 'at',
+    'gift', 'birthday', 'christmas', 'valentine', 'festival'
+})
+
+_BRAND_CHARS = re.compile(r'^[a-zA-Z\s&\-\.0-9]+$')
+_NO_ALPHANUMERIC = re.compile(r'^[^a-zA-Z0-9]+$')
+_TITLE_PUNCTUATION = re.compile(r'[^\w\s&\-\.]')
+
+# Tried in order; the first match that is a valid brand name wins
+_TITLE_BRAND_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'by\s+([A-Za-z\s&\-\.]+?)(?:\s|$)',
+    r'"([A-Za-z\s&\-\.]+?)"',
+    r'Brand:\s*([A-Za-z\s&\-\.]+?)(?:\s|$)',
+    r'from\s+([A-Za-z\s&\-\.]+?)(?:\s|$)'
+)]
+
+# The notebook's capitalization patterns for titles without a known brand
+_CAPITALIZED_BRAND_PATTERNS = [re.compile(pattern) for pattern in (
+    r'^([A-Z][A-Z\s&\-\.]+)\s',  # Uppercase words at start
+    r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s',  # Title case brands
+    r'([A-Z]{2,}(?:\s+[A-Z]{2,})*)\s'  # All caps brands
+)]
+_CAPITALIZED_EXCLUDE_WORDS = frozenset({'Soft', 'Toy', 'Plush', 'Stuffed', 'Teddy', 'Bear', 'Cute', 'Giant', 'Super'})
+
+
+@lru_cache(maxsize=65536)
+def is_valid_brand_name(text):
+    """Validate if text looks like a brand name"""
+    if not text:
+        return False
+
+    text = text.strip()
+
+    # Check if it's an excluded word
+    if text.lower() in EXCLUDE_WORDS:
+        return False
+
+    # Check reasonable length
+    if len(text) < 2 or len(text) > 30:
+        return False
+
+    # Check if it contains mostly valid characters
+    if not _BRAND_CHARS.match(text):
+        return False
+
+    # Check if it's not all numbers
+    if text.isdigit():
+        return False
+
+    # Check if it's not all special characters
+    if _NO_ALPHANUMERIC.match(text):
+        return False
+
+    return True
+
+
+class AhoCorasick:
+    """Automaton that finds every occurrence of a fixed set of substrings in one scan of the text"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                node = next_node
+            self.output[node] += (index,)
+
+        # Breadth-first, so every failure link points at an already finished node
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0) if node else 0
+                self.output[child] += self.output[self.fail[child]]
+                queue.append(child)
+
+    def search(self, text):
+        """Indexes of every pattern that occurs in text"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+
+class BrandMatcher:
+    """Brand lookup built once from the shared brand dictionary (SOFT_TOY_BRANDS + KNOWN_BRANDS)
+
+    Every brand name, and every word of a multi-word scraper brand, is one pattern of a single
+    automaton, so a title is scanned once no matter how many brands the dictionary holds. Each
+    brand list keeps its own order as a rank, which keeps the answers identical to checking the
+    lists one brand at a time.
+    """
+
+    def __init__(self, brands=SOFT_TOY_BRANDS, known_brands=KNOWN_BRANDS):
+        self.patterns = []
+        self._pattern_index = {}
+        self.brand_ranks = self._rank(brands)
+        self.known_ranks = self._rank(known_brands)
+
+        # Compound brands also match on any of their longer words
+        self.part_ranks = {}
+        for rank, brand in enumerate(brands):
+            brand_parts = brand.lower().split()
+            if len(brand_parts) > 1:
+                for part in brand_parts:
+                    if len(part) > 3:
+                        self.part_ranks.setdefault(self._pattern(part), (rank, brand))
+
+        self.automaton = AhoCorasick(self.patterns)
+        self._cached_title_brand = lru_cache(maxsize=65536)(self._title_brand)
+
+    def _pattern(self, text):
+        index = self._pattern_index.get(text)
+        if index is None:
+            index = self._pattern_index[text] = len(self.patterns)
+            self.patterns.append(text)
+        return index
+
+    def _rank(self, brands):
+        ranks = {}
+        for rank, brand in enumerate(brands):
+            ranks.setdefault(self._pattern(brand.lower()), (rank, brand))
+        return ranks
+
+    @staticmethod
+    def _first(ranks, matches):
+        hits = [ranks[index] for index in matches if index in ranks]
+        return min(hits)[1] if hits else None
+
+    def brand_in(self, title):
+        """First scraper brand (in list order) contained in the title, then first compound-brand word"""
+        matches = self.automaton.search(title.lower())
+        return self._first(self.brand_ranks, matches) or self._first(self.part_ranks, matches)
+
+    def known_brand_in(self, title):
+        """First brand of the notebook's list contained in the title"""
+        return self._first(self.known_ranks, self.automaton.search(title.lower()))
+
+    def brand_from_title_nlp(self, title):
+        """Extract brand from title using NLP patterns"""
+        if not title or title == 'N/A':
+            return None
+
+        # Clean the title
+        words = _TITLE_PUNCTUATION.sub(' ', title).split()
+
+        # Pattern 1: Brand name usually comes first (check first 1-3 words)
+        for i in range(min(3, len(words))):
+            potential_brand = ' '.join(words[:i+1])
+            if is_valid_brand_name(potential_brand):
+                return potential_brand
+
+        # Pattern 2: Brand name patterns in title
+        for pattern in _TITLE_BRAND_PATTERNS:
+            match = pattern.search(title)
+            if match:
+                potential_brand = match.group(1).strip()
+                if is_valid_brand_name(potential_brand):
+                    return potential_brand
+
+        # Pattern 3: Check if any word looks like a brand (capitalized, reasonable length)
+        for word in words[:5]:
+            if is_valid_brand_name(word) and word[0].isupper():
+                return word
+
+        return None
+
+    def brand_from_predefined_list(self, title):
+        """Extract brand from predefined list (fallback method)"""
+        if not title or title == 'N/A':
+            return "Generic"
+
+        brand = self.brand_in(title)
+        if brand:
+            return brand
+
+        # Last resort: extract first word if it looks like a brand
+        words = title.split()
+        if words:
+            first_word = words[0]
+            if is_valid_brand_name(first_word) and first_word[0].isupper():
+                return first_word
+
+        return "Generic"
+
+    def _title_brand(self, title):
+        brand = self.brand_from_title_nlp(title)
+        if brand:
+            return brand, 'title NLP'
+        brand = self.brand_from_predefined_list(title)
+        if brand != "Generic":
+            return brand, 'predefined list'
+        return "Generic", None
+
+    def brand_from_title(self, title):
+        """(brand, method) from the title alone: NLP patterns first, then the brand list, else Generic"""
+        return self._cached_title_brand(title)
+
+    def extract_brand_from_title(self, title):
+        """The notebook's re-branding rule: known brands first, then capitalization patterns"""
+        if title is None or title != title or title == "":
+            return "Unknown"
+
+        brand = self.known_brand_in(title)
+        if brand:
+            return brand
+
+        for pattern in _CAPITALIZED_BRAND_PATTERNS:
+            match = pattern.search(title)
+            if match:
+                potential_brand = match.group(1).strip()
+                if len(potential_brand) > 2 and len(potential_brand) < 30:
+                    if potential_brand not in _CAPITALIZED_EXCLUDE_WORDS:
+                        return potential_brand
+
+        words = title.split()
+        if words:
+            first_word = words[0].strip()
+            if len(first_word) > 2 and first_word.isalpha():
+                return first_word
+
+        return "Generic"
+
+
+def rebrand_csv(path, output, title_column='title', rule='scraper'):
+    """Recompute the brand column of a scraped CSV from its titles; returns the number of rows"""
+    import pandas as pd
+
+    from data_cleaning import assign_brands
+
+    matcher = BrandMatcher()
+
+    def brand_of(title):
+        if rule == 'notebook':
+            return matcher.extract_brand_from_title(title)
+        return matcher.brand_from_title(title)[0] if isinstance(title, str) else "Generic"
+
+    df = pd.read_csv(path)
+    # Historical data repeats titles a lot, so brand each distinct title once
+    df['brand'] = assign_brands(df[title_column], brand_of)
+    df.to_csv(output, index=False)
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-brand scraped products from their titles")
+    parser.add_argument('input', help="CSV with a title column")
+    parser.add_argument('--output', help="where to write the re-branded CSV (default: overwrite the input)")
+    parser.add_argument('--title-column', default='title')
+    parser.add_argument('--rule', choices=('scraper', 'notebook'), default='scraper',
+                        help="scraper: NLP patterns then the brand list; notebook: known brands then capitalization")
+    args = parser.parse_args()
+
+    rows = rebrand_csv(args.input, args.output or args.input, args.title_column, args.rule)
+    print(f"🏷️  Re-branded {rows} products into {args.output or args.input}")
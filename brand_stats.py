@@ -0,0 +1,160 @@
+import argparse
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+from data_cleaning import clean_products, zero_unrated_reviews
+
+SUMMARY_COLUMNS = ['Product_Count', 'Avg_Rating', 'Avg_Reviews', 'Avg_Price', 'Market_Share_%', 'Category']
+
+
+def categorize(summary):
+    """The notebook's brand labels; later rules override earlier ones"""
+    category = pd.Series('Standard', index=summary.index)
+    category[summary['Product_Count'] >= 10] = 'Market Leader'
+    category[(summary['Avg_Rating'] >= 4.0) & (summary['Product_Count'] <= 5)] = 'Untapped Potential'
+    category[summary['Avg_Rating'] >= 4.5] = 'Quality Leader'
+    return category
+
+
+class BrandStatsStore:
+    """Mergeable per-brand, per-day, per-keyword running sums; summaries are derived on read"""
+
+    def __init__(self, path='brand_stats.sqlite3'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS brand_daily (
+                scrape_date TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                brand TEXT NOT NULL,
+                product_count INTEGER NOT NULL,
+                rating_sum REAL NOT NULL,
+                rated_count INTEGER NOT NULL,
+                reviews_sum INTEGER NOT NULL,
+                price_sum INTEGER NOT NULL,
+                price_sq_sum REAL NOT NULL,
+                price_min INTEGER,
+                price_max INTEGER,
+                PRIMARY KEY (scrape_date, keyword, brand)
+            );
+        ''')
+        self.conn.commit()
+
+    def fold(self, products, scrape_date=None, keyword='', replace=False):
+        """Merge one scrape batch into the running sums; replace=True first drops that day's rows for the keyword"""
+        scrape_date = str(scrape_date or date.today())
+        df = clean_products(pd.DataFrame(products))
+        if df.empty:
+            return 0
+
+        # As in the notebook, products without a rating contribute no reviews
+        df['reviews'] = zero_unrated_reviews(df['rating'], df['reviews'])
+
+        # Aggregating the batch is O(new rows); history is only touched through the upsert below
+        df['price_sq'] = df['price'].astype(float) ** 2
+        df['rated'] = df['rating'] > 0
+        batch = df.groupby('brand').agg(
+            product_count=('title', 'size'), rating_sum=('rating', 'sum'), rated_count=('rated', 'sum'),
+            reviews_sum=('reviews', 'sum'), price_sum=('price', 'sum'), price_sq_sum=('price_sq', 'sum'),
+            price_min=('price', 'min'), price_max=('price', 'max'),
+        )
+
+        with self.conn:
+            if replace:
+                self.conn.execute('DELETE FROM brand_daily WHERE scrape_date = ? AND keyword = ?', (scrape_date, keyword))
+            self.conn.executemany('''
+                INSERT INTO brand_daily (scrape_date, keyword, brand, product_count, rating_sum, rated_count,
+                                         reviews_sum, price_sum, price_sq_sum, price_min, price_max)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (scrape_date, keyword, brand) DO UPDATE SET
+                    product_count = product_count + excluded.product_count,
+                    rating_sum = rating_sum + excluded.rating_sum,
+                    rated_count = rated_count + excluded.rated_count,
+                    reviews_sum = reviews_sum + excluded.reviews_sum,
+                    price_sum = price_sum + excluded.price_sum,
+                    price_sq_sum = price_sq_sum + excluded.price_sq_sum,
+                    price_min = MIN(price_min, excluded.price_min),
+                    price_max = MAX(price_max, excluded.price_max)
+            ''', [
+                (scrape_date, keyword, row.Index, int(row.product_count), float(row.rating_sum), int(row.rated_count),
+                 int(row.reviews_sum), int(row.price_sum), float(row.price_sq_sum), int(row.price_min), int(row.price_max))
+                for row in batch.itertuples()
+            ])
+        return len(df)
+
+    def _where(self, since, until, keywords):
+        clauses, params = [], []
+        if since:
+            clauses.append('scrape_date >= ?')
+            params.append(str(since))
+        if until:
+            clauses.append('scrape_date <= ?')
+            params.append(str(until))
+        if keywords:
+            clauses.append(f"keyword IN ({', '.join('?' * len(keywords))})")
+            params.extend(keywords)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def summary(self, since=None, until=None, keywords=None):
+        """The executive summary table (brand_performance_summary.csv) over the selected days and keywords"""
+        where, params = self._where(since, until, keywords)
+        summary = pd.read_sql_query(f'''
+            SELECT brand, SUM(product_count) AS Product_Count,
+                   SUM(rating_sum) / SUM(product_count) AS Avg_Rating,
+                   CAST(SUM(reviews_sum) AS REAL) / SUM(product_count) AS Avg_Reviews,
+                   CAST(SUM(price_sum) AS REAL) / SUM(product_count) AS Avg_Price
+            FROM brand_daily{where}
+            GROUP BY brand ORDER BY brand
+        ''', self.conn, params=params, index_col='brand').round(2)
+
+        summary['Market_Share_%'] = (summary['Product_Count'] / summary['Product_Count'].sum() * 100).round(1)
+        summary['Category'] = categorize(summary)
+        return summary[SUMMARY_COLUMNS].sort_values('Market_Share_%', ascending=False)
+
+    def daily(self, brands=None, keywords=None):
+        """Per-day time series of brand metrics"""
+        where, params = self._where(None, None, keywords)
+        if brands:
+            where += (' AND ' if where else ' WHERE ') + f"brand IN ({', '.join('?' * len(brands))})"
+            params.extend(brands)
+        return pd.read_sql_query(f'''
+            SELECT scrape_date, brand, SUM(product_count) AS product_count,
+                   SUM(rating_sum) / SUM(product_count) AS avg_rating,
+                   SUM(rating_sum) / NULLIF(SUM(rated_count), 0) AS avg_rating_rated,
+                   CAST(SUM(reviews_sum) AS REAL) / SUM(product_count) AS avg_reviews,
+                   CAST(SUM(price_sum) AS REAL) / SUM(product_count) AS avg_price,
+                   MIN(price_min) AS price_min, MAX(price_max) AS price_max
+            FROM brand_daily{where}
+            GROUP BY scrape_date, brand ORDER BY scrape_date, brand
+        ''', self.conn, params=params, parse_dates=['scrape_date'])
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold scraped CSVs into the brand statistics store and print the summary")
+    parser.add_argument('csv', nargs='*', help="scraped product CSVs to fold in")
+    parser.add_argument('--store', default="brand_stats.sqlite3")
+    parser.add_argument('--date', help="scrape date of the CSVs (default: today)")
+    parser.add_argument('--keyword', default="soft toys")
+    parser.add_argument('--summary', help="write the brand performance summary to this CSV")
+    args = parser.parse_args()
+
+    store = BrandStatsStore(args.store)
+    try:
+        if args.csv:
+            # All files make up the day's batch for the keyword, so re-running the same fold is harmless
+            rows = store.fold(pd.concat(map(pd.read_csv, args.csv)), args.date, args.keyword, replace=True)
+            print(f"📥 Folded {rows} products from {len(args.csv)} file(s)")
+        summary = store.summary()
+        print("Top 15 Brands Performance Summary:")
+        print(summary.head(15).to_string())
+        if args.summary:
+            summary.to_csv(args.summary)
+            print(f"\n✅ Executive summary saved to '{args.summary}'")
+    finally:
+        store.close()
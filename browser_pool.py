@@ -0,0 +1,76 @@
+import queue
+import threading
+
+_WORKER_DONE = object()
+
+
+class BrowserPool:
+    """Run page jobs across N independent WebDriver sessions pulling from a shared scheduler"""
+
+    def __init__(self, create_driver, size, sessions=None):
+        self.create_driver = create_driver
+        self.size = size
+        # Sessions that already exist are reused before new ones are started
+        self.sessions = list(sessions or [])
+        self._lock = threading.Lock()
+
+    def _acquire_session(self, index):
+        if index < len(self.sessions):
+            return self.sessions[index]
+        driver = self.create_driver()
+        with self._lock:
+            self.sessions.append(driver)
+        return driver
+
+    def _worker(self, index, handler, scheduler, results):
+        try:
+            driver = self._acquire_session(index)
+        except Exception as e:
+            print(f"❌ Worker {index + 1} could not start a browser session: {e}")
+            results.put((_WORKER_DONE, None))
+            return
+
+        try:
+            # The scheduler paces requests and returns None once every page is finished
+            while True:
+                job = scheduler.get()
+                if job is None:
+                    break
+                try:
+                    result = handler(driver, job)
+                except Exception as e:
+                    result = e
+                results.put((job, result))
+        finally:
+            results.put((_WORKER_DONE, None))
+
+    def run(self, handler, scheduler):
+        """Yield (job, result) pairs as workers finish them; exceptions are returned as results"""
+        results = queue.Queue()
+        threads = [
+            threading.Thread(target=self._worker, args=(i, handler, scheduler, results), daemon=True)
+            for i in range(self.size)
+        ]
+        for thread in threads:
+            thread.start()
+
+        live_workers = len(threads)
+        while live_workers:
+            job, result = results.get()
+            if job is _WORKER_DONE:
+                live_workers -= 1
+                continue
+            yield job, result
+
+        for thread in threads:
+            thread.join()
+
+    def close(self):
+        """Quit every session, continuing past sessions that fail to shut down"""
+        with self._lock:
+            sessions, self.sessions = self.sessions, []
+        for driver in sessions:
+            try:
+                driver.quit()
+            except Exception as e:
+                print(f"❌ Error closing browser session: {e}")
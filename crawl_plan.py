@@ -0,0 +1,123 @@
+import json
+import time
+
+from asin_index import product_asin
+from fetchers import DEFAULT_CATEGORY
+
+
+class CrawlJob:
+    """One keyword x category x page-range entry of a crawl plan"""
+
+    def __init__(self, keyword, category=DEFAULT_CATEGORY, first_page=1, last_page=20):
+        if first_page < 1 or last_page < first_page:
+            raise ValueError(f"Invalid page range {first_page}-{last_page} for '{keyword}'")
+        self.keyword = keyword
+        self.category = str(category)
+        self.first_page = first_page
+        self.last_page = last_page
+
+    @property
+    def pages(self):
+        return range(self.first_page, self.last_page + 1)
+
+    def __repr__(self):
+        return f"CrawlJob({self.keyword!r}, category={self.category!r}, pages={self.first_page}-{self.last_page})"
+
+
+def load_crawl_plan(path):
+    """Read a JSON crawl plan: a list of {"keyword", "category" (optional), "pages": N or [first, last]}"""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+
+    plan = []
+    for entry in entries:
+        pages = entry.get('pages', 20)
+        first_page, last_page = (1, pages) if isinstance(pages, int) else pages
+        plan.append(CrawlJob(entry['keyword'], entry.get('category', DEFAULT_CATEGORY), first_page, last_page))
+    return plan
+
+
+def product_identity(product):
+    """Stable key for spotting the same listing under different searches (its ASIN when known)"""
+    asin = product_asin(product)
+    if asin:
+        return asin
+    return (product.get('title') or '').strip().lower()
+
+
+def unique_products(products):
+    """Drop repeats of the same listing (see product_identity), keeping the first"""
+    seen = set()
+    for product in products:
+        identity = product_identity(product)
+        if identity not in seen:
+            seen.add(identity)
+            yield product
+
+
+class CrawlOrchestrator:
+    """Run a whole crawl plan as one scheduled crawl over the scraper's shared sessions"""
+
+    def __init__(self, scraper, journal=None):
+        self.scraper = scraper
+        self.journal = journal
+        self.job_stats = {}
+        self.products = {}
+
+    def _add_products(self, key, keyword, category, products):
+        stats = self.job_stats[key]
+        for product in products:
+            identity = product_identity(product)
+            if identity in self.products:
+                stats['duplicates'] += 1
+                continue
+            product['keyword'] = keyword
+            product['category'] = category
+            self.products[identity] = product
+            stats['new_products'] += 1
+
+    def run(self, plan):
+        """Crawl every job of the plan; returns the de-duplicated products in the order they were found"""
+        self.job_stats = {}
+        self.products = {}
+        page_jobs = []
+        searches = {}
+        for crawl_job in plan:
+            jobs = self.scraper.build_page_jobs(crawl_job.keyword, crawl_job.pages, crawl_job.category)
+            page_jobs.extend(jobs)
+            searches[jobs[0].key] = (crawl_job.keyword, crawl_job.category)
+            stats = self.job_stats.setdefault(jobs[0].key, {
+                'planned_pages': 0, 'pages': 0, 'products': 0, 'new_products': 0, 'duplicates': 0, 'elapsed': 0.0,
+            })
+            stats['planned_pages'] += len(jobs)
+
+        # All jobs share one scheduler, so sessions and the learned request rate carry across keywords
+        # A job's window opens when the page before its first one finished, so each rate covers only that job
+        started = {}
+        last_page_done = time.perf_counter()
+        for job, page_products in self.scraper.crawl_pages(page_jobs, self.journal):
+            stats = self.job_stats[job.key]
+            stats['pages'] += 1
+            stats['products'] += len(page_products)
+            started.setdefault(job.key, last_page_done)
+            last_page_done = time.perf_counter()
+            stats['elapsed'] = last_page_done - started[job.key]
+            if self.journal is None:
+                self._add_products(job.key, job.keyword, job.category, page_products)
+
+        if self.journal is not None:
+            # Merge from the journal so pages finished by earlier, interrupted runs are included too
+            for key, (keyword, category) in searches.items():
+                self._add_products(key, keyword, category, self.journal.iter_products(key))
+
+        self.print_report()
+        return list(self.products.values())
+
+    def print_report(self):
+        print(f"\n📈 Crawl plan throughput:")
+        print(f"   {'Job':<40} {'Pages':>9} {'Products':>9} {'New':>6} {'Dupes':>6} {'Pages/min':>10}")
+        for key, stats in self.job_stats.items():
+            rate = stats['pages'] / stats['elapsed'] * 60 if stats['elapsed'] else 0.0
+            print(f"   {key[:40]:<40} {stats['pages']:>4}/{stats['planned_pages']:<4} {stats['products']:>9} "
+                  f"{stats['new_products']:>6} {stats['duplicates']:>6} {rate:>10.1f}")
+        print(f"   Unique products across the plan: {len(self.products)}")
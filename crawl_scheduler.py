@@ -0,0 +1,239 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+
+from product_selectors import PRODUCT_CONTAINER_SELECTOR
+
+# Attribute marker every result container carries, counted without parsing the page
+_CONTAINER_MARKER = PRODUCT_CONTAINER_SELECTOR.strip('[]')
+
+# Responses that mean "slow down" rather than "this page is broken"
+BLOCK_SIGNALS = ('captcha', 'blocked', 'timeout', 'throttled')
+
+# Failures another attempt cannot fix; 'empty' is a results page without results, i.e. the search ran out
+FINAL_FAILURES = ('missing', 'empty')
+
+# Text of Amazon's non-CAPTCHA block and error pages; a page without results that shows one was blocked
+BLOCK_MARKERS = ('api-services-support@amazon.com', 'to discuss automated access', 'sorry! something went wrong')
+
+
+def classify_page(fetched):
+    """Return None for a usable page, otherwise the reason it failed (see BLOCK_SIGNALS)"""
+    if fetched.error == 'timeout':
+        return 'timeout'
+    if fetched.status in (429, 503):
+        return 'throttled'
+    if fetched.status == 404 or fetched.error == 'missing':
+        return 'missing'
+    if fetched.error:
+        return 'error'
+
+    title = (fetched.title or '').lower()
+    if 'robot check' in title or 'captcha' in title or '/errors/validatecaptcha' in fetched.html.lower():
+        return 'captcha'
+    if _CONTAINER_MARKER not in fetched.html:
+        html = fetched.html.lower()
+        if not html.strip() or any(marker in html for marker in BLOCK_MARKERS):
+            return 'blocked'
+        return 'empty'
+    return None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate follows AIMD: additive increase on success, multiplicative decrease on blocks"""
+
+    def __init__(self, initial_rate=0.2, min_rate=0.02, max_rate=2.0, increase=0.02, decrease=0.5,
+                 burst=1, base_backoff=5.0, max_backoff=300.0):
+        self.rate = initial_rate  # requests per second
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.consecutive_blocks = 0
+        self.successes = 0
+        self.blocks = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token if one is available, otherwise return how long to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                return self.blocked_until - now
+
+            self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """Block the calling thread until a request may be sent"""
+        while True:
+            delay = self._reserve()
+            if not delay:
+                return
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a request may be sent"""
+        while True:
+            delay = self._reserve()
+            if not delay:
+                return
+            await asyncio.sleep(delay)
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self.consecutive_blocks = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_block(self):
+        with self._lock:
+            self.blocks += 1
+            self.consecutive_blocks += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+
+            # Exponential pause for everyone sharing this limiter, doubling on each consecutive block
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self.consecutive_blocks - 1))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + backoff)
+            self.tokens = 0.0
+
+
+class CrawlScheduler:
+    """Shared page queue that paces requests through a rate limiter and re-queues failed pages"""
+
+    def __init__(self, jobs, limiter=None, max_retries=3):
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+
+        self.pending = deque(jobs)
+        self.in_flight = 0
+        self.retry_counts = Counter()
+        self.outcomes = Counter()
+        self.failed = []
+        self.last_pages = {}
+        self.skipped = Counter()
+        self.cancelled = False
+        self._condition = threading.Condition()
+
+    def _beyond_end(self, job):
+        last_page = self.last_pages.get(job.key)
+        return last_page is not None and job.page > last_page
+
+    def _take(self):
+        # Caller holds the condition; returns a job, None when the crawl is over, or False to wait
+        if self.cancelled:
+            return None
+        while self.pending:
+            job = self.pending.popleft()
+            if self._beyond_end(job):
+                self.skipped[job.key] += 1
+                continue
+            self.in_flight += 1
+            return job
+        if self.in_flight:
+            return False
+        return None
+
+    def get(self, paced=True):
+        """Next job once the rate limiter allows it, or None when every page is finished"""
+        with self._condition:
+            job = self._take()
+            while job is False:
+                self._condition.wait()
+                job = self._take()
+        if job is not None and paced:
+            self.limiter.acquire()
+            if self.cancelled:
+                return None
+        return job
+
+    async def aget(self):
+        """Async variant of get() for event-loop based fetchers"""
+        while True:
+            with self._condition:
+                job = self._take()
+            if job is not False:
+                break
+            await asyncio.sleep(0.05)
+        if job is not None:
+            await self.limiter.acquire_async()
+            if self.cancelled:
+                return None
+        return job
+
+    def report(self, job, outcome):
+        """Record a fetch outcome; returns True when the page is final (done or out of retries)"""
+        self.outcomes[outcome or 'ok'] += 1
+        if outcome is None or outcome == 'empty':
+            # The end of the results is a normal answer, not a reason to slow down
+            self.limiter.record_success()
+        elif outcome in BLOCK_SIGNALS:
+            self.limiter.record_block()
+
+        with self._condition:
+            self.in_flight -= 1
+            final = True
+            if outcome is not None:
+                if self._beyond_end(job) or self.cancelled:
+                    # The search ended before this page (or the crawl was stopped); retrying it would be a wasted request
+                    pass
+                elif outcome not in FINAL_FAILURES and self.retry_counts[job] < self.max_retries:
+                    self.retry_counts[job] += 1
+                    self.pending.append(job)
+                    final = False
+                else:
+                    self.failed.append(job)
+            self._condition.notify_all()
+        return final
+
+    def cancel(self):
+        """Stop handing out jobs: workers finish the requests in flight and then exit"""
+        with self._condition:
+            self.cancelled = True
+            self.pending.clear()
+            self._condition.notify_all()
+
+    def stop_after(self, key, last_page):
+        """Drop every page of a search past last_page; returns how many queued requests that saved"""
+        with self._condition:
+            if last_page >= self.last_pages.get(key, last_page + 1):
+                return 0
+            self.last_pages[key] = last_page
+            kept = deque(job for job in self.pending if not self._beyond_end(job))
+            saved = len(self.pending) - len(kept)
+            self.pending = kept
+            self.skipped[key] += saved
+            # Pages past the end that already failed were never really missing
+            self.failed = [job for job in self.failed if not self._beyond_end(job)]
+            self._condition.notify_all()
+        return saved
+
+    def is_beyond_end(self, job):
+        """True when the page lies past the known end of its search (its results should be ignored)"""
+        with self._condition:
+            return self._beyond_end(job)
+
+    def stats(self):
+        """Current request rate and retry counters, for tuning throughput against the block rate"""
+        return {
+            'rate_per_min': round(self.limiter.rate * 60, 2),
+            'requests': sum(self.outcomes.values()),
+            'outcomes': dict(self.outcomes),
+            'retries': sum(self.retry_counts.values()),
+            'retried_pages': len(self.retry_counts),
+            'failed_pages': [repr(job) for job in self.failed],
+            'pending': len(self.pending),
+            'skipped_pages': sum(self.skipped.values()),
+        }
@@ -0,0 +1,151 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Soft toy related keywords
+SOFT_TOY_KEYWORDS = [
+    'soft toy', 'plush', 'stuffed', 'teddy', 'bear', 'doll',
+    'unicorn', 'elephant', 'dog', 'cat', 'panda', 'rabbit',
+    'penguin', 'octopus', 'dinosaur', 'animal', 'toy', 'cushion',
+    'pillow', 'huggable', 'cuddly', 'fluffy', 'furry', 'plushie',
+    'stuffie', 'cuddle', 'squeeze', 'snuggle', 'comfort'
+]
+
+# Exclude non-toy items
+EXCLUDE_KEYWORDS = [
+    'shoe', 'sandal', 'footwear', 'slipper', 'boot', 'sneaker',
+    'clothing', 'dress', 'shirt', 'pant', 'electronics', 'mobile',
+    'phone', 'charger', 'cable', 'book', 'pen', 'pencil', 'bag',
+    'backpack', 'bottle', 'cup', 'plate', 'bowl', 'spoon', 'fork'
+]
+
+# Reasonable toy price range in ₹ (inclusive)
+MIN_PRICE = 50
+MAX_PRICE = 10000
+
+# Placeholder values the scraper writes when a brand could not be read
+MISSING_BRANDS = ['', 'N/A', 'Sponsored']
+
+# The notebook's duplicate key for rows scraped before ASINs were captured
+LEGACY_DUPLICATE_KEY = ['title', 'brand', 'price', 'reviews']
+
+# Plain substring tests, compiled into one alternation per list
+_SOFT_TOY_PATTERN = re.compile('|'.join(map(re.escape, SOFT_TOY_KEYWORDS)))
+_EXCLUDE_PATTERN = re.compile('|'.join(map(re.escape, EXCLUDE_KEYWORDS)))
+
+
+def is_soft_toy_title(title):
+    """Title mentions a soft toy keyword and none of the non-toy keywords"""
+    title = title.lower()
+    return not _EXCLUDE_PATTERN.search(title) and bool(_SOFT_TOY_PATTERN.search(title))
+
+
+def _per_distinct(values, func):
+    """Run func over the distinct values only and broadcast back; accumulated scrapes repeat values heavily"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = func(pd.Series(uniques, dtype=object))
+    return pd.Series(np.asarray(mapped)[codes], index=values.index, name=values.name)
+
+
+def _parse_numbers(values, strip_chars):
+    """Numbers from an object column: strings lose strip_chars and are parsed, anything unparsable is NaN"""
+    is_text = values.str.len().notna()
+    text = values.where(is_text, '').astype(str)
+    for char in strip_chars:
+        text = text.str.replace(char, '', regex=False)
+    parsed = pd.to_numeric(text.str.strip(), errors='coerce')
+    others = pd.to_numeric(values.where(~is_text), errors='coerce')
+    numbers = parsed.where(is_text, others).astype(float)
+    return numbers.replace([np.inf, -np.inf], np.nan), is_text
+
+
+def _clean_count(values, strip_chars):
+    """int(float(text)) for strings, max(0, int(n)) for numbers, 0 for anything missing or unparsable"""
+    if pd.api.types.is_numeric_dtype(values):
+        return np.trunc(values.astype(float)).clip(lower=0).fillna(0).astype('int64')
+    numbers, is_text = _parse_numbers(values, strip_chars)
+    numbers = np.trunc(numbers)
+    numbers = numbers.where(is_text, numbers.clip(lower=0))
+    return numbers.fillna(0).astype('int64')
+
+
+def clean_price(prices):
+    """Whole-rupee prices: '₹1,299' -> 1299, missing or unparsable -> 0, negative numbers -> 0"""
+    if pd.api.types.is_numeric_dtype(prices):
+        return _clean_count(prices, ())
+    return _per_distinct(prices, lambda values: _clean_count(values, ('₹', ','))).astype('int64')
+
+
+def clean_rating(ratings):
+    """Star ratings clamped to 0.0-5.0, missing or unparsable -> 0.0"""
+    if pd.api.types.is_numeric_dtype(ratings):
+        return ratings.astype(float).clip(0.0, 5.0).fillna(0.0)
+    return _per_distinct(ratings, lambda values: _parse_numbers(values, ())[0].clip(0.0, 5.0).fillna(0.0)).astype(float)
+
+
+def clean_reviews(reviews):
+    """Review counts: '1,234' -> 1234, missing or unparsable -> 0, negative numbers -> 0"""
+    if pd.api.types.is_numeric_dtype(reviews):
+        return _clean_count(reviews, ())
+    return _per_distinct(reviews, lambda values: _clean_count(values, (',',))).astype('int64')
+
+
+def zero_unrated_reviews(ratings, reviews):
+    """The notebook zeroes the review count of products without a rating"""
+    return reviews.where(ratings != 0, 0)
+
+
+def clean_brand(brands):
+    """Missing and placeholder brands -> 'Unknown'"""
+    return brands.fillna('Unknown').replace(MISSING_BRANDS, 'Unknown')
+
+
+def assign_brands(titles, brand_of):
+    """Brand every distinct title once and broadcast the answers back to all rows"""
+    codes, uniques = pd.factorize(titles, use_na_sentinel=False)
+    brands = np.array([brand_of(title) for title in uniques], dtype=object)
+    return pd.Series(brands[codes], index=titles.index, name='brand')
+
+
+def soft_toy_mask(df, min_price=MIN_PRICE, max_price=MAX_PRICE):
+    """Vectorized is_valid_soft_toy_product: keyword include/exclude filter plus the price band"""
+    def keyword_match(titles):
+        titles = titles.fillna('').astype(str).str.lower()
+        return titles.str.contains(_SOFT_TOY_PATTERN) & ~titles.str.contains(_EXCLUDE_PATTERN)
+
+    keyword_found = _per_distinct(df['title'], keyword_match).astype(bool)
+    reasonable_price = df['price'].between(min_price, max_price)
+    return keyword_found & reasonable_price & df['title'].notna()
+
+
+def drop_duplicate_products(df):
+    """Keep the first row per ASIN; rows without one fall back to the (title, brand, price, reviews) key"""
+    if 'asin' not in df:
+        return df.drop_duplicates(subset=LEGACY_DUPLICATE_KEY, keep='first')
+
+    asin = df['asin'].replace(['', 'N/A'], np.nan)
+    has_asin = asin.notna().to_numpy()
+    duplicate = np.zeros(len(df), dtype=bool)
+    # A price or review change does not make a new product, so ASIN rows compare on the ASIN alone
+    duplicate[has_asin] = asin[has_asin].duplicated().to_numpy()
+    duplicate[~has_asin] = df[~has_asin].duplicated(subset=LEGACY_DUPLICATE_KEY).to_numpy()
+    return df[~duplicate]
+
+
+def clean_products(df):
+    """Notebook cleaning steps over a whole DataFrame: typed price/rating/reviews, filled brand and title"""
+    df = df.copy()
+    df['price'] = clean_price(df['price'])
+    df['rating'] = clean_rating(df['rating'])
+    df['reviews'] = clean_reviews(df['reviews'])
+    df['brand'] = clean_brand(df['brand'])
+    df['title'] = df['title'].fillna('Unknown Product').astype(str)
+    if 'sponsored' in df:
+        df['sponsored'] = df['sponsored'].astype(bool)
+    return df
+
+
+def filter_soft_toys(df, min_price=MIN_PRICE, max_price=MAX_PRICE):
+    """Keep only rows that pass the soft toy keyword filter and price band"""
+    return df[soft_toy_mask(df, min_price, max_price)]
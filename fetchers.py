@@ -0,0 +1,280 @@
+import asyncio
+import queue
+import threading
+import time
+
+import aiohttp
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_pool import BrowserPool
+from crawl_scheduler import classify_page
+from product_selectors import PRODUCT_CONTAINER_SELECTOR
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+# Amazon.in "Toys & Games" browse node, the category every search was originally pinned to
+DEFAULT_CATEGORY = "1350380031"
+
+# What the browser itself reports for the loaded page (Navigation and Resource Timing APIs).
+# transferSize counts headers plus the encoded body and is 0 for cache hits and for cross-origin
+# resources that do not send Timing-Allow-Origin, so totals are a lower bound.
+PAGE_TRANSFER_SCRIPT = """
+var navigation = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var resourceBytes = resources.reduce(function (total, entry) { return total + (entry.transferSize || 0); }, 0);
+var documentBytes = navigation ? navigation.transferSize : 0;
+return {
+    transfer_bytes: documentBytes + resourceBytes,
+    document_bytes: documentBytes,
+    resources: resources.length,
+    dom_content_loaded_ms: navigation ? navigation.domContentLoadedEventEnd : null
+};
+"""
+
+
+class PageJob:
+    """One search results page to fetch"""
+
+    def __init__(self, keyword, page, url, category=DEFAULT_CATEGORY):
+        self.keyword = keyword
+        self.page = page
+        self.url = url
+        self.category = category
+
+    @property
+    def key(self):
+        """Identifies the keyword/category search this page belongs to (journal and report key)"""
+        if self.category == DEFAULT_CATEGORY:
+            return self.keyword
+        return f"{self.keyword} [n:{self.category}]"
+
+    def __repr__(self):
+        return f"PageJob({self.key!r}, page={self.page})"
+
+
+class FetchedPage:
+    """Raw markup (or failure) for one fetched search results page"""
+
+    def __init__(self, job, html='', title='', status=None, elapsed=0.0, error=None):
+        self.job = job
+        self.html = html
+        self.title = title
+        self.status = status
+        self.elapsed = elapsed
+        self.error = error
+        # Seconds per fetch stage as measured by the backend (navigation, wait, download, ...)
+        self.timings = {}
+        # Bytes moved for the page as far as the backend can tell (transfer_bytes, document_bytes, resources)
+        self.transfer = {}
+        # Set by PageFetcher._finish: None for a usable page, otherwise classify_page()'s reason
+        self.outcome = None
+        # Backends that extract in place (live WebDriver elements) attach their products here
+        self.records = None
+        # Filled in during extraction: the pagination's last page and the page's ASIN set
+        self.last_page = None
+        self.signature = frozenset()
+
+
+class PageFetcher:
+    """Interface every fetch backend implements; pages are yielded as they complete, in any order"""
+
+    def fetch_pages(self, scheduler):
+        """Pull jobs from a CrawlScheduler and yield each page once it is final"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _finish(self, scheduler, fetched):
+        """Report a fetch to the scheduler; returns False when the page was re-queued for another attempt"""
+        outcome = fetched.outcome = classify_page(fetched)
+        if not scheduler.report(fetched.job, outcome):
+            print(f"⚠️  Page {fetched.job.page} {outcome}; re-queued for retry")
+            return False
+        if outcome:
+            attempts = scheduler.retry_counts[fetched.job] + 1
+            fetched.error = f"{fetched.error or outcome} (gave up after {attempts} attempts)"
+        return True
+
+
+class SeleniumFetcher(PageFetcher):
+    """Fetch pages with a pool of headless Chrome sessions"""
+
+    def __init__(self, create_driver, workers=1, wait_timeout=20, page_handler=None):
+        self.pool = BrowserPool(create_driver, workers)
+        self.wait_timeout = wait_timeout
+        # Optional callback(driver, fetched) run in the worker while the page is still loaded
+        self.page_handler = page_handler
+
+    def _load(self, driver, job):
+        start = time.perf_counter()
+        fetched = FetchedPage(job)
+        lap = start
+        try:
+            driver.get(job.url)
+            fetched.title = driver.title
+            lap = _lap(fetched, 'navigation', lap)
+
+            # Wait for the results grid instead of a fixed sleep; a timeout is treated as a block signal
+            try:
+                WebDriverWait(driver, self.wait_timeout).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, PRODUCT_CONTAINER_SELECTOR))
+                )
+            except TimeoutException:
+                fetched.error = 'timeout'
+            lap = _lap(fetched, 'wait', lap)
+
+            try:
+                transfer = driver.execute_script(PAGE_TRANSFER_SCRIPT) or {}
+                dom_content_loaded = transfer.pop('dom_content_loaded_ms', None)
+                if dom_content_loaded:
+                    fetched.timings['dom_content_loaded'] = dom_content_loaded / 1000
+                fetched.transfer = transfer
+            except Exception:
+                pass  # Statistics only; never fail a page over them
+
+            fetched.html = driver.page_source
+            lap = _lap(fetched, 'page_source', lap)
+            if fetched.error is None and self.page_handler and classify_page(fetched) is None:
+                fetched.records = self.page_handler(driver, fetched)
+                _lap(fetched, 'live_extraction', lap)
+        except Exception as e:
+            fetched.error = str(e) or type(e).__name__
+        fetched.elapsed = time.perf_counter() - start
+        return fetched
+
+    def fetch_pages(self, scheduler):
+        def load_and_report(driver, job):
+            fetched = self._load(driver, job)
+            return fetched if self._finish(scheduler, fetched) else None
+
+        try:
+            for job, fetched in self.pool.run(load_and_report, scheduler):
+                if fetched is not None:
+                    yield fetched
+        finally:
+            # Reached early when the caller stops reading: sessions finish their current page and stop
+            scheduler.cancel()
+
+    def close(self):
+        self.pool.close()
+
+
+class HttpFetcher(PageFetcher):
+    """Fetch pages with an asyncio HTTP client: pooled keep-alive connections and bounded concurrency"""
+
+    def __init__(self, concurrency=4, timeout=30, headers=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = {
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-IN,en;q=0.9',
+        }
+        self.headers.update(headers or {})
+
+    async def _fetch(self, session, job):
+        start = time.perf_counter()
+        try:
+            async with session.get(job.url) as response:
+                body = await response.read()
+                html = await response.text(errors='replace')
+                fetched = FetchedPage(job, html=html, status=response.status)
+                # Content-Length is the size on the wire (compressed); without it, the decoded body size
+                fetched.transfer = {
+                    'transfer_bytes': response.content_length or len(body),
+                    'document_bytes': len(body),
+                    'resources': 0,
+                }
+                if response.status != 200:
+                    fetched.error = f"HTTP {response.status}"
+        except asyncio.TimeoutError:
+            fetched = FetchedPage(job, error='timeout')
+        except aiohttp.ClientError as e:
+            fetched = FetchedPage(job, error=str(e) or type(e).__name__)
+        fetched.elapsed = fetched.timings['download'] = time.perf_counter() - start
+        fetched.title = _html_title(fetched.html)
+        return fetched
+
+    async def _worker(self, session, scheduler, results):
+        while True:
+            job = await scheduler.aget()
+            if job is None:
+                break
+            fetched = await self._fetch(session, job)
+            if self._finish(scheduler, fetched):
+                await results.put(fetched)
+
+    async def afetch_pages(self, scheduler):
+        """Async generator yielding FetchedPage objects as their responses arrive"""
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        results = asyncio.Queue()
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers) as session:
+            # `concurrency` workers bound the requests in flight; the scheduler paces when each may start
+            workers = [asyncio.ensure_future(self._worker(session, scheduler, results)) for _ in range(self.concurrency)]
+            done = asyncio.ensure_future(asyncio.gather(*workers))
+            try:
+                while not (done.done() and results.empty()):
+                    getter = asyncio.ensure_future(results.get())
+                    await asyncio.wait([getter, done], return_when=asyncio.FIRST_COMPLETED)
+                    if getter.done():
+                        yield getter.result()
+                    else:
+                        getter.cancel()
+                done.result()
+            finally:
+                scheduler.cancel()
+                for worker in workers:
+                    worker.cancel()
+
+    def fetch_pages(self, scheduler):
+        # Run the event loop on a helper thread so callers (scripts, notebooks) can stay synchronous
+        results = queue.Queue()
+        done = object()
+
+        async def crawl():
+            async for fetched in self.afetch_pages(scheduler):
+                results.put(fetched)
+
+        def run():
+            try:
+                asyncio.run(crawl())
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(done)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Reached early when the caller stops reading; the event-loop thread only sees the scheduler
+            scheduler.cancel()
+            thread.join()
+
+
+def _lap(fetched, stage, since):
+    now = time.perf_counter()
+    fetched.timings[stage] = now - since
+    return now
+
+
+def _html_title(html):
+    start = html.find('<title')
+    if start == -1:
+        return ''
+    start = html.find('>', start) + 1
+    end = html.find('</title>', start)
+    return html[start:end].strip() if end != -1 else ''
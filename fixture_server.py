@@ -0,0 +1,77 @@
+import argparse
+import os
+import threading
+from collections import Counter
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'search_pages')
+
+
+def fixture_filename(keyword, page):
+    """Saved pages are named after the search keyword and page number, e.g. soft_toys_page_3.html"""
+    return f"{keyword.strip().lower().replace(' ', '_')}_page_{page}.html"
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    """Serve saved search-result pages for /s?k=<keyword>&page=<n> like the live site"""
+
+    fixture_dir = FIXTURE_DIR
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/s':
+            self.send_error(404)
+            return
+
+        query = parse_qs(url.query)
+        keyword = query.get('k', [''])[0]
+        page = query.get('page', ['1'])[0]
+        if isinstance(self.server, FixtureServer):
+            self.server.hits[(keyword, int(page) if page.isdigit() else page)] += 1
+        path = os.path.join(self.fixture_dir, fixture_filename(keyword, page))
+        if not os.path.isfile(path):
+            self.send_error(404, f"No saved page for {keyword!r} page {page}")
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Threaded server that counts the requests for each search page: hits[(keyword, page)]"""
+
+    def __init__(self, address, handler):
+        super().__init__(address, handler)
+        self.hits = Counter()
+
+
+def start_fixture_server(fixture_dir=FIXTURE_DIR, host='127.0.0.1', port=0, handler=FixtureRequestHandler):
+    """Start a background fixture server and return (server, base_url); handler may be a FixtureRequestHandler subclass"""
+    handler = type('BoundFixtureRequestHandler', (handler,), {'fixture_dir': fixture_dir})
+    server = FixtureServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved Amazon search-result pages locally")
+    parser.add_argument('--dir', default=FIXTURE_DIR, help="directory of saved <keyword>_page_<n>.html files")
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(args.dir, port=args.port)
+    print(f"🧪 Serving saved search pages from {args.dir} at {base_url}")
+    print(f"   Point the scraper at it with base_url=\"{base_url}\"")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
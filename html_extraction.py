@@ -0,0 +1,321 @@
+import re
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+
+from asin_index import asin_from_url
+from product_selectors import (
+    PRODUCT_CONTAINER_SELECTOR, PAGINATION_ITEM_SELECTOR, PAGINATION_SELECTED_SELECTOR,
+    PAGINATION_NEXT_DISABLED_SELECTOR, SPONSORED_XPATHS, SPONSORED_CSS_SELECTORS,
+    TITLE_SELECTORS, PRODUCT_LINK_SELECTOR, RATING_SELECTORS, REVIEW_SELECTORS,
+    PRICE_SELECTORS, IMAGE_SELECTOR, BRAND_SELECTORS
+)
+
+_SELECTOR_PART_RE = re.compile(r'(?:[^\s\[]|\[[^\]]*\])+')
+_COMPOUND_RE = re.compile(r'([\w-]*)((?:\.[\w-]+)*)((?:\[[^\]]+\])*)')
+_ATTRIBUTE_RE = re.compile(r'\[([\w-]+)(?:(\*?=)"([^"]*)")?\]')
+
+
+def _class_condition(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def css_to_xpath(selector):
+    """Translate the small CSS subset used by our selector chains into a relative XPath"""
+    steps = []
+    for part in _SELECTOR_PART_RE.findall(selector):
+        match = _COMPOUND_RE.fullmatch(part)
+        if not match:
+            raise ValueError(f"Unsupported CSS selector: {selector}")
+        tag, classes, attributes = match.groups()
+
+        conditions = [_class_condition(name) for name in classes.split('.')[1:]]
+        for name, operator, value in _ATTRIBUTE_RE.findall(attributes):
+            if not operator:
+                conditions.append(f'@{name}')
+            elif operator == '=':
+                conditions.append(f'@{name}="{value}"')
+            else:
+                conditions.append(f'contains(@{name}, "{value}")')
+
+        steps.append('descendant::' + (tag or '*') + ''.join(f'[{c}]' for c in conditions))
+    return '/'.join(steps)
+
+
+def compile_css(selector):
+    """Compile a CSS selector once into a reusable XPath evaluator"""
+    return etree.XPath(css_to_xpath(selector))
+
+
+# Elements WebDriver reports as not displayed (so `.text` is empty)
+_HIDDEN = etree.XPath(
+    "ancestor-or-self::*[" + _class_condition('a-offscreen') + " or "
+    + _class_condition('aok-hidden') + " or "
+    "contains(translate(@style, ' ', ''), 'display:none')]"
+)
+
+
+def element_text(element):
+    """Approximate WebDriver's rendered `.text` for a parsed element"""
+    if _HIDDEN(element):
+        return ''
+    return ' '.join(element.text_content().split())
+
+
+def inner_html(element):
+    """Serialize the children of an element, like the DOM innerHTML property"""
+    parts = [element.text or '']
+    for child in element:
+        parts.append(etree.tostring(child, encoding='unicode', with_tail=True))
+    return ''.join(parts)
+
+
+class SnapshotExtractor:
+    """Run the scraper's extraction logic over one parsed page snapshot instead of live WebDriver elements"""
+
+    def __init__(self, scraper, base_url):
+        self.scraper = scraper
+        self.base_url = base_url
+
+        # Compile every selector chain once; lookups are then pure in-process tree walks
+        self.container_xpath = etree.XPath('/' + css_to_xpath(PRODUCT_CONTAINER_SELECTOR))
+        self.pagination_items = compile_css(PAGINATION_ITEM_SELECTOR)
+        self.pagination_selected = compile_css(PAGINATION_SELECTED_SELECTOR)
+        self.pagination_next_disabled = compile_css(PAGINATION_NEXT_DISABLED_SELECTOR)
+        # Compiled lookups by selector text; the scraper decides which order to try a chain in
+        self.sponsored_xpaths = {selector: etree.XPath(selector) for selector in SPONSORED_XPATHS}
+        self.sponsored_css = {selector: compile_css(selector) for selector in SPONSORED_CSS_SELECTORS}
+        self.title_selectors = {selector: compile_css(selector) for selector in TITLE_SELECTORS}
+        self.link_selector = compile_css(PRODUCT_LINK_SELECTOR)
+        self.rating_selectors = {selector: compile_css(selector) for selector in RATING_SELECTORS}
+        self.review_selectors = {selector: compile_css(selector) for selector in REVIEW_SELECTORS}
+        self.price_selectors = {selector: compile_css(selector) for selector in PRICE_SELECTORS}
+        self.image_selector = compile_css(IMAGE_SELECTOR)
+        self.brand_selectors = {selector: compile_css(selector) for selector in BRAND_SELECTORS}
+
+    def parse(self, page_source):
+        """Parse a page's HTML once; every other lookup runs on the returned tree"""
+        return lxml_html.document_fromstring(page_source)
+
+    def containers(self, document):
+        return self.container_xpath(document)
+
+    def parse_containers(self, page_source):
+        """Parse a page's HTML once and return its product containers"""
+        return self.containers(self.parse(page_source))
+
+    def last_page(self, document):
+        """Highest page number the pagination control offers, or None if the page has no pagination"""
+        def page_number(element):
+            text = element.text_content().strip()
+            return int(text) if text.isdigit() else None
+
+        if self.pagination_next_disabled(document):
+            # "Next" is disabled, so the selected page is the final one
+            selected = [page_number(item) for item in self.pagination_selected(document)]
+            selected = [number for number in selected if number]
+            if selected:
+                return selected[0]
+
+        numbers = [page_number(item) for item in self.pagination_items(document)]
+        numbers = [number for number in numbers if number]
+        return max(numbers) if numbers else None
+
+    def page_signature(self, containers):
+        """The set of ASINs (or product links) on a page, for spotting repeated result pages"""
+        identifiers = set()
+        for container in containers:
+            identifier = container.get('data-asin')
+            if not identifier:
+                link_elem = self._first(self.link_selector, container)
+                identifier = link_elem.get('href') if link_elem is not None else None
+            if identifier:
+                identifiers.add(identifier)
+        return frozenset(identifiers)
+
+    def _first(self, selector, container):
+        matches = selector(container)
+        return matches[0] if matches else None
+
+    def is_sponsored_product(self, container):
+        """Check if a product is sponsored using the same detection methods as the WebDriver path"""
+        scraper, metrics = self.scraper, self.scraper.metrics
+        try:
+            # Method 1: Look for "Sponsored" text in various locations
+            chain = scraper.selector_chain('sponsored_xpath', SPONSORED_XPATHS, by_hit_rate=True)
+            for position, selector in enumerate(chain):
+                if self.sponsored_xpaths[selector](container):
+                    scraper.selector_result('sponsored_xpath', chain, position)
+                    metrics.count(f"sponsored:xpath {selector}")
+                    metrics.say(f"🏷️  Sponsored product detected via selector: {selector}")
+                    return True
+            scraper.selector_result('sponsored_xpath', chain, None)
+
+            # Method 2: Check for sponsored-specific CSS classes
+            chain = scraper.selector_chain('sponsored_css', SPONSORED_CSS_SELECTORS, by_hit_rate=True)
+            for position, css_class in enumerate(chain):
+                if self.sponsored_css[css_class](container):
+                    scraper.selector_result('sponsored_css', chain, position)
+                    metrics.count(f"sponsored:css {css_class}")
+                    metrics.say(f"🏷️  Sponsored product detected via CSS class: {css_class}")
+                    return True
+            scraper.selector_result('sponsored_css', chain, None)
+
+            # Method 3: Check for sponsored-related attributes
+            if container.get('data-sponsored'):
+                metrics.count('sponsored:data-sponsored attribute')
+                metrics.say(f"🏷️  Sponsored product detected via data-sponsored attribute")
+                return True
+
+            # Method 4: Check container HTML for sponsored indicators
+            if 'sponsored' in inner_html(container).lower():
+                metrics.count('sponsored:innerHTML search')
+                metrics.say(f"🏷️  Sponsored product detected via innerHTML search")
+                return True
+
+            return False
+
+        except Exception as e:
+            print(f"❌ Error checking sponsored status: {e}")
+            return False
+
+    def sponsored_flags(self, containers):
+        """is_sponsored_product's verdict for every container of a page, without the per-method lookups
+
+        Methods 1 and 2 only match descendants whose text, class or attributes contain "sponsored", all of
+        which appear in innerHTML, so the verdict is Method 3 or Method 4: one serialization per container.
+        """
+        return [bool(container.get('data-sponsored')) or 'sponsored' in inner_html(container).lower()
+                for container in containers]
+
+    def extract_comprehensive_product_data(self, container):
+        """Extract comprehensive product data from a parsed container"""
+
+        product_data = {
+            'title': 'N/A',
+            'brand': 'N/A',
+            'rating': 0.0,
+            'reviews': 0,
+            'price': 0,
+            'image_url': 'N/A',
+            'product_url': 'N/A',
+            'asin': 'N/A',
+            'sponsored': True  # Always True since we only extract sponsored products
+        }
+
+        scraper = self.scraper
+        lap = scraper.metrics.laps('field')
+        try:
+            # 1. Extract Title
+            chain, hit = scraper.selector_chain('title', TITLE_SELECTORS), None
+            for position, selector in enumerate(chain):
+                title_elem = self._first(self.title_selectors[selector], container)
+                if title_elem is not None:
+                    title_text = element_text(title_elem)
+                    if title_text and len(title_text) > 10:
+                        product_data['title'] = title_text
+                        hit = position
+                        break
+            scraper.selector_result('title', chain, hit)
+            lap('title')
+
+            # 2. Extract Product URL (WebDriver returns the resolved href property)
+            link_elem = self._first(self.link_selector, container)
+            if link_elem is not None and link_elem.get('href'):
+                product_data['product_url'] = urljoin(self.base_url, link_elem.get('href'))
+
+            # 2b. ASIN - every result container carries data-asin; it also gives a canonical URL when the link is missing
+            asin = container.get('data-asin') or asin_from_url(product_data['product_url'])
+            if asin:
+                product_data['asin'] = asin
+                if product_data['product_url'] == 'N/A':
+                    product_data['product_url'] = urljoin(self.base_url, f"/dp/{asin}")
+            lap('url')
+
+            # 3. Extract Brand
+            product_data['brand'] = scraper.extract_brand_advanced(product_data['title'], container, extractor=self)
+            lap('brand')
+
+            # 4. Extract Rating
+            chain, hit = scraper.selector_chain('rating', RATING_SELECTORS), None
+            for position, selector in enumerate(chain):
+                rating_elem = self._first(self.rating_selectors[selector], container)
+                if rating_elem is None:
+                    continue
+                rating_text = rating_elem.text_content() or rating_elem.get('aria-label')
+                if rating_text:
+                    rating_match = re.search(r'(\d+\.?\d*)', rating_text)
+                    if rating_match:
+                        rating_value = float(rating_match.group(1))
+                        if 0 <= rating_value <= 5:
+                            product_data['rating'] = rating_value
+                            hit = position
+                            break
+            scraper.selector_result('rating', chain, hit)
+            lap('rating')
+
+            # 5. Extract Reviews Count
+            chain, hit = scraper.selector_chain('reviews', REVIEW_SELECTORS), None
+            for position, selector in enumerate(chain):
+                for elem in self.review_selectors[selector](container):
+                    text = element_text(elem)
+                    if text and ('(' in text or re.search(r'\d+', text)):
+                        review_match = re.search(r'[\(]?([\d,]+)[\)]?', text)
+                        if review_match:
+                            try:
+                                reviews_count = int(review_match.group(1).replace(',', ''))
+                            except ValueError:
+                                break
+                            if reviews_count > 0:
+                                product_data['reviews'] = reviews_count
+                                break
+                if product_data['reviews'] > 0:
+                    hit = position
+                    break
+            scraper.selector_result('reviews', chain, hit)
+            lap('reviews')
+
+            # 6. Extract Price
+            chain, hit = scraper.selector_chain('price', PRICE_SELECTORS), None
+            for position, selector in enumerate(chain):
+                price_elem = self._first(self.price_selectors[selector], container)
+                if price_elem is None:
+                    continue
+                price_text = element_text(price_elem) or price_elem.text_content()
+                if price_text:
+                    price_match = re.search(r'([\d,]+)', price_text.replace('₹', '').replace(',', ''))
+                    if price_match:
+                        price_value = int(price_match.group(1))
+                        if price_value > 0:
+                            product_data['price'] = price_value
+                            hit = position
+                            break
+            scraper.selector_result('price', chain, hit)
+            lap('price')
+
+            # 7. Extract Image URL
+            img_elem = self._first(self.image_selector, container)
+            if img_elem is not None and img_elem.get('src'):
+                src = urljoin(self.base_url, img_elem.get('src'))
+                if src.startswith('http'):
+                    product_data['image_url'] = src
+            lap('image')
+
+        except Exception as e:
+            print(f"Error in extract_comprehensive_product_data: {e}")
+
+        return product_data
+
+    def extract_brand_from_element(self, container):
+        """Extract brand from parsed Amazon page elements"""
+        chain = self.scraper.selector_chain('brand', BRAND_SELECTORS)
+        for position, selector in enumerate(chain):
+            for elem in self.brand_selectors[selector](container):
+                brand_text = element_text(elem)
+                if brand_text and self.scraper.is_valid_brand_name(brand_text):
+                    self.scraper.selector_result('brand', chain, position)
+                    return brand_text
+
+        self.scraper.selector_result('brand', chain, None)
+        return None
@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import numpy as np
+import pandas as pd
+from PIL import Image, UnidentifiedImageError
+
+# Hamming distance (out of 64 bits) up to which two thumbnails count as the same picture
+DEFAULT_MAX_DISTANCE = 6
+
+
+def dhash(image, hash_size=8):
+    """Difference hash: 64 bits saying whether each pixel of a 9x8 grayscale thumbnail is brighter than its right neighbour"""
+    # Let the JPEG decoder downscale while decoding; the hash only needs a tiny grayscale image
+    image.draft('L', ((hash_size + 1) * 4, hash_size * 4))
+    pixels = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS).tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def dhash_bytes(body):
+    """dhash of an encoded image, or None if it cannot be decoded"""
+    try:
+        with Image.open(io.BytesIO(body)) as image:
+            return dhash(image)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+
+
+class ImageCache:
+    """Downloaded thumbnails on disk plus an index of their hashes, so reruns neither download nor decode again"""
+
+    def __init__(self, directory='image_cache'):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, 'images'), exist_ok=True)
+        # Written from the event-loop thread of hash_images while the caller waits
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS images (
+                url TEXT PRIMARY KEY,
+                dhash TEXT,
+                size INTEGER NOT NULL,
+                status TEXT NOT NULL
+            );
+        ''')
+        self.conn.commit()
+        # url -> hash (None when the image could not be fetched or decoded)
+        self.hashes = {
+            url: int(digest, 16) if digest else None
+            for url, digest in self.conn.execute('SELECT url, dhash FROM images')
+        }
+
+    def path(self, url):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'images', digest[:2], digest)
+
+    def put_many(self, rows):
+        """Record [(url, body or None, hash or None, status)], writing each body next to the index"""
+        for url, body, _, _ in rows:
+            if body:
+                path = self.path(url)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(body)
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO images (url, dhash, size, status) VALUES (?, ?, ?, ?)',
+                [(url, f"{bits:016x}" if bits is not None else None, len(body or b''), status)
+                 for url, body, bits, status in rows]
+            )
+        self.hashes.update({url: bits for url, _, bits, _ in rows})
+
+    def close(self):
+        self.conn.close()
+
+
+async def ahash_images(urls, cache, concurrency=16, timeout=30, retry_failed=False):
+    """Download and hash every URL not yet in the cache with at most `concurrency` requests in flight"""
+    todo = asyncio.Queue()
+    for url in dict.fromkeys(urls):
+        if url and url.startswith('http') and (url not in cache.hashes or (retry_failed and cache.hashes[url] is None)):
+            todo.put_nowait(url)
+    done = []
+    loop = asyncio.get_running_loop()
+
+    async def worker(session):
+        while not todo.empty():
+            url = todo.get_nowait()
+            body, bits = None, None
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        body = await response.read()
+                        status = 'ok'
+                    else:
+                        status = f"HTTP {response.status}"
+            except asyncio.TimeoutError:
+                status = 'timeout'
+            except aiohttp.ClientError as e:
+                status = str(e) or type(e).__name__
+            if body is not None:
+                # Decoding is CPU work; keep it off the event loop so downloads keep flowing
+                bits = await loop.run_in_executor(None, dhash_bytes, body)
+                if bits is None:
+                    status = 'unreadable'
+            done.append((url, body, bits, status))
+            if len(done) >= 500:
+                cache.put_many(done)
+                done.clear()
+
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    cache.put_many(done)
+    return {url: cache.hashes.get(url) for url in urls}
+
+
+def hash_images(urls, cache, concurrency=16, timeout=30, retry_failed=False):
+    """Synchronous ahash_images; the event loop runs on a helper thread so notebooks (with their own loop) work too"""
+    with ThreadPoolExecutor(1) as executor:
+        return executor.submit(asyncio.run, ahash_images(urls, cache, concurrency, timeout, retry_failed)).result()
+
+
+def _popcount(values):
+    """Set bits per element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8)).reshape(*values.shape, 64).sum(axis=-1)
+
+
+def near_duplicate_pairs(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    """Index pairs (i, j), i < j, of a uint64 array whose Hamming distance is at most max_distance
+
+    Multi-index hashing: the 64 bits are cut into max_distance + 1 bands, and two hashes that differ in
+    at most max_distance bits must agree exactly on at least one band (pigeonhole). Only hashes sharing
+    a band value are compared, bucket by bucket with vectorized XOR/popcount, so the result is exact
+    without comparing all pairs.
+    """
+    bands = max_distance + 1
+    edges = np.linspace(0, 64, bands + 1).astype(int)
+    found = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        keys = (hashes >> np.uint64(low)) & np.uint64((1 << (high - low)) - 1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        shared = ends - starts > 1
+        for start, end in zip(starts[shared], ends[shared]):
+            members = order[start:end]
+            bucket = hashes[members]
+            # Row blocks keep the distance matrix small even when one band value is very common
+            for first in range(0, len(bucket), 1024):
+                block = bucket[first:first + 1024]
+                close = _popcount(block[:, None] ^ bucket[None, first:]) <= max_distance
+                i, j = np.nonzero(np.triu(close, k=1))
+                found.append(np.stack([members[first + i], members[first + j]], axis=1))
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    # A pair agreeing on several bands is found once per band
+    pairs = np.concatenate(found)
+    return np.unique(np.sort(pairs, axis=1), axis=0)
+
+
+def group_near_duplicates(hashes, max_distance=DEFAULT_MAX_DISTANCE):
+    """{key: group number} for every key with a hash; keys whose hashes chain within max_distance share a group"""
+    distinct = {}
+    for key, bits in hashes.items():
+        if bits is not None:
+            distinct.setdefault(bits, []).append(key)
+    values = np.fromiter(distinct, dtype=np.uint64, count=len(distinct))
+
+    # Union-find over distinct hashes; exact repeats are already merged by the dict above
+    parent = list(range(len(values)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for i, j in near_duplicate_pairs(values, max_distance).tolist():
+        root, other_root = find(i), find(j)
+        if root != other_root:
+            parent[other_root] = root
+
+    groups = {}
+    numbers = {}
+    for index, keys in enumerate(distinct.values()):
+        number = numbers.setdefault(find(index), len(numbers))
+        for key in keys:
+            groups[key] = number
+    return groups
+
+
+def add_image_groups(df, cache, max_distance=DEFAULT_MAX_DISTANCE, concurrency=16, retry_failed=False):
+    """Copy of the products with image_hash (hex) and image_group columns; NaN group = no usable image"""
+    urls = df['image_url'].where(df['image_url'].astype(str).str.startswith('http'))
+    hashes = hash_images(urls.dropna().unique().tolist(), cache, concurrency, retry_failed=retry_failed)
+    groups = group_near_duplicates(hashes, max_distance)
+
+    df = df.copy()
+    df['image_hash'] = urls.map(lambda url: f"{hashes[url]:016x}" if hashes.get(url) is not None else None)
+    df['image_group'] = urls.map(groups).astype('Int64')
+    return df
+
+
+def cross_brand_groups(df):
+    """Image groups listed under more than one brand: likely the same generic product sold by several sellers"""
+    grouped = df.dropna(subset=['image_group']).groupby('image_group')
+    summary = grouped.agg(products=('title', 'size'), brands=('brand', 'nunique'),
+                          brand_names=('brand', lambda brands: ', '.join(sorted(set(map(str, brands))))))
+    return summary[summary['brands'] > 1].sort_values(['brands', 'products'], ascending=False)
+
+
+def brand_image_summary(df):
+    """Per brand: products with an image, the distinct pictures among them, and how many of those other brands list too"""
+    grouped = df.dropna(subset=['image_group'])
+    shared = set(cross_brand_groups(grouped).index)
+    summary = grouped.groupby('brand').agg(
+        products=('image_group', 'size'), distinct_images=('image_group', 'nunique'),
+        shared_images=('image_group', lambda groups: len(set(groups) & shared)),
+    )
+    return summary.sort_values(['products', 'distinct_images'], ascending=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hash product thumbnails and group near-duplicate images")
+    parser.add_argument('csv', help="scraped products CSV with image_url and brand columns")
+    parser.add_argument('--output', help="write the products with image_hash / image_group columns here")
+    parser.add_argument('--cache-dir', default="image_cache", help="downloaded thumbnails and their hashes")
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="Hamming distance (of 64 bits) up to which images count as the same")
+    parser.add_argument('--concurrency', type=int, default=16, help="downloads in flight")
+    parser.add_argument('--retry-failed', action='store_true', help="download images that failed on an earlier run again")
+    args = parser.parse_args()
+
+    cache = ImageCache(args.cache_dir)
+    try:
+        products = add_image_groups(pd.read_csv(args.csv), cache, args.max_distance, args.concurrency, args.retry_failed)
+    finally:
+        cache.close()
+
+    hashed = products['image_hash'].notna().sum()
+    print(f"🖼️  Hashed {hashed} of {len(products)} product images into {products['image_group'].nunique()} distinct pictures")
+    shared = cross_brand_groups(products)
+    print(f"🔁 {len(shared)} pictures appear under more than one brand ({shared['products'].sum()} products)")
+    for group, row in shared.head(15).iterrows():
+        print(f"   • group {group}: {row['products']} products, brands: {row['brand_names'][:80]}")
+    if args.output:
+        products.to_csv(args.output, index=False)
+        print(f"✅ Saved products with image groups to '{args.output}'")
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+
+class Laps:
+    """Split one pass into consecutive stages: each call records the time since the previous one"""
+
+    def __init__(self, metrics, prefix):
+        self.metrics = metrics
+        self.prefix = prefix
+        self.last = time.perf_counter()
+
+    def __call__(self, stage):
+        now = time.perf_counter()
+        self.metrics.record(f"{self.prefix}.{stage}", now - self.last)
+        self.last = now
+
+
+class Instrumentation:
+    """Thread-safe stage timers and counters, optional JSON-lines log, and an end-of-run profile
+
+    Chatty per-page / per-product progress goes through say(), which quiet mode silences;
+    the numbers are collected either way.
+    """
+
+    def __init__(self, quiet=False, log_path=None):
+        self.quiet = quiet
+        self.timings = defaultdict(lambda: [0, 0.0, 0.0])  # stage -> [calls, total seconds, max seconds]
+        self.counters = Counter()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._log = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def say(self, message):
+        if not self.quiet:
+            print(message)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            timing = self.timings[stage]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def timer(self, stage):
+        return _Timer(self, stage)
+
+    def laps(self, prefix):
+        return Laps(self, prefix)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def declare(self, names):
+        """Register counters up front so ones that never fire still show up (as 0) in the profile"""
+        with self._lock:
+            for name in names:
+                self.counters.setdefault(name, 0)
+
+    def event(self, name, **fields):
+        """Append one structured record to the JSON log (if any)"""
+        if self._log is None:
+            return
+        record = {'ts': datetime.now(timezone.utc).isoformat(), 'event': name, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._log.write(line + '\n')
+            self._log.flush()
+
+    def profile(self):
+        """Timings and counters collected so far, as plain data"""
+        with self._lock:
+            return {
+                'wall_seconds': round(time.perf_counter() - self.started, 3),
+                'timings': {
+                    stage: {'calls': calls, 'total_s': round(total, 4), 'mean_ms': round(total / calls * 1000, 3),
+                            'max_ms': round(peak * 1000, 3)}
+                    for stage, (calls, total, peak) in sorted(self.timings.items())
+                },
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def print_profile(self):
+        profile = self.profile()
+        self.event('profile', **profile)
+
+        print(f"\n⏱️  Run profile ({profile['wall_seconds']:.1f}s wall):")
+        print(f"   {'Stage':<34} {'Calls':>7} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9}")
+        for stage, timing in profile['timings'].items():
+            print(f"   {stage[:34]:<34} {timing['calls']:>7} {timing['total_s']:>9.3f} "
+                  f"{timing['mean_ms']:>9.3f} {timing['max_ms']:>9.3f}")
+
+        # "group:key" counters print as one block per group, with each key's share of the group
+        groups = defaultdict(list)
+        for name, value in profile['counters'].items():
+            group, separator, key = name.partition(':')
+            if not separator:
+                group, key = 'counts', name
+            groups[group].append((key, value))
+        for group, items in groups.items():
+            total = sum(value for _, value in items)
+            print(f"   {group}:")
+            for key, value in items:
+                share = f" ({value / total * 100:.0f}%)" if group != 'counts' and total else ''
+                marker = '  ⚠️  never hit' if value == 0 else ''
+                print(f"      {key[:44]:<44} {value:>7}{share}{marker}")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class _Timer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.stage, time.perf_counter() - self.start)
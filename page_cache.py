@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import date, timedelta
+
+from fetchers import FetchedPage, PageFetcher
+
+
+class PageCache:
+    """Gzip-compressed, content-addressed store of fetched search pages, indexed by URL and fetch date"""
+
+    def __init__(self, directory='page_cache', max_bytes=500 * 1024 * 1024, max_age_days=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'))
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT NOT NULL,
+                fetch_date TEXT NOT NULL,
+                keyword TEXT,
+                page INTEGER,
+                title TEXT,
+                digest TEXT NOT NULL REFERENCES blobs(digest),
+                last_access REAL NOT NULL,
+                PRIMARY KEY (url, fetch_date)
+            );
+            CREATE INDEX IF NOT EXISTS entries_by_access ON entries (last_access);
+        ''')
+        self.conn.commit()
+        self.total_bytes = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        self.evict()
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest + '.html.gz')
+
+    def put(self, fetched, fetch_date=None):
+        """Store a fetched page; identical markup is written to disk only once"""
+        fetch_date = fetch_date or date.today().isoformat()
+        body = fetched.html.encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()
+
+        with self.conn:
+            if not self.conn.execute('SELECT 1 FROM blobs WHERE digest = ?', (digest,)).fetchone():
+                path = self._blob_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                compressed = gzip.compress(body, compresslevel=6)
+                with open(path, 'wb') as f:
+                    f.write(compressed)
+                self.conn.execute('INSERT INTO blobs (digest, size) VALUES (?, ?)', (digest, len(compressed)))
+                self.total_bytes += len(compressed)
+
+            previous = self.conn.execute(
+                'SELECT digest FROM entries WHERE url = ? AND fetch_date = ?', (fetched.job.url, fetch_date)
+            ).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (url, fetch_date, keyword, page, title, digest, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (fetched.job.url, fetch_date, fetched.job.keyword, fetched.job.page, fetched.title, digest, time.time())
+            )
+            if previous and previous[0] != digest:
+                self._drop_blob_if_orphaned(previous[0])
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+        return digest
+
+    def get(self, url, fetch_date=None):
+        """Return (html, title) for a URL (latest copy unless a date is given), or None"""
+        if fetch_date:
+            row = self.conn.execute(
+                'SELECT fetch_date, digest, title FROM entries WHERE url = ? AND fetch_date = ?', (url, fetch_date)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                'SELECT fetch_date, digest, title FROM entries WHERE url = ? ORDER BY fetch_date DESC LIMIT 1', (url,)
+            ).fetchone()
+        if not row:
+            return None
+
+        found_date, digest, title = row
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                html = gzip.decompress(f.read()).decode('utf-8')
+        except OSError:
+            return None
+        with self.conn:
+            self.conn.execute(
+                'UPDATE entries SET last_access = ? WHERE url = ? AND fetch_date = ?', (time.time(), url, found_date)
+            )
+        return html, title
+
+    def latest_fetch_date(self):
+        """The most recent fetch date in the cache (YYYY-MM-DD), or None when it is empty"""
+        return self.conn.execute('SELECT MAX(fetch_date) FROM entries').fetchone()[0]
+
+    def _drop_blob_if_orphaned(self, digest):
+        if self.conn.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+            return
+        row = self.conn.execute('SELECT size FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        self.conn.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+        if row:
+            self.total_bytes -= row[0]
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    def _delete_entry(self, url, fetch_date, digest):
+        self.conn.execute('DELETE FROM entries WHERE url = ? AND fetch_date = ?', (url, fetch_date))
+        self._drop_blob_if_orphaned(digest)
+
+    def evict(self):
+        """Drop entries past max_age_days, then least recently used ones until under max_bytes"""
+        evicted = 0
+        with self.conn:
+            if self.max_age_days is not None:
+                cutoff = (date.today() - timedelta(days=self.max_age_days)).isoformat()
+                for url, fetch_date, digest in self.conn.execute(
+                    'SELECT url, fetch_date, digest FROM entries WHERE fetch_date < ?', (cutoff,)
+                ).fetchall():
+                    self._delete_entry(url, fetch_date, digest)
+                    evicted += 1
+
+            while self.total_bytes > self.max_bytes:
+                row = self.conn.execute(
+                    'SELECT url, fetch_date, digest FROM entries ORDER BY last_access LIMIT 1'
+                ).fetchone()
+                if not row:
+                    break
+                self._delete_entry(*row)
+                evicted += 1
+        return evicted
+
+    def close(self):
+        self.conn.close()
+
+
+class CachedPageFetcher(PageFetcher):
+    """Replay search pages from a PageCache - no browser and no network"""
+
+    def __init__(self, cache, fetch_date=None):
+        self.cache = cache
+        self.fetch_date = fetch_date
+
+    def fetch_pages(self, scheduler):
+        while True:
+            # Cached pages are local reads, so they skip the rate limiter
+            job = scheduler.get(paced=False)
+            if job is None:
+                break
+            start = time.perf_counter()
+            cached = self.cache.get(job.url, self.fetch_date)
+            if cached is None:
+                fetched = FetchedPage(job, error='missing')
+            else:
+                fetched = FetchedPage(job, html=cached[0], title=cached[1], status=200)
+            fetched.elapsed = fetched.timings['cache_read'] = time.perf_counter() - start
+            if self._finish(scheduler, fetched):
+                yield fetched
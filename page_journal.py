@@ -0,0 +1,111 @@
+import csv
+import json
+import sqlite3
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+
+from crawl_plan import unique_products
+
+
+class PageJournal:
+    """Durable, append-only record of every completed search page, keyed by (keyword, page)"""
+
+    def __init__(self, path='scrape_journal.sqlite3'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL keeps each page commit cheap and the file readable while a crawl is writing
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS pages (
+                keyword TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                product_count INTEGER NOT NULL,
+                completed_at TEXT NOT NULL,
+                PRIMARY KEY (keyword, page)
+            );
+            CREATE TABLE IF NOT EXISTS products (
+                keyword TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                record TEXT NOT NULL,
+                PRIMARY KEY (keyword, page, position)
+            );
+            CREATE TABLE IF NOT EXISTS searches (
+                keyword TEXT PRIMARY KEY,
+                last_page INTEGER NOT NULL,
+                reason TEXT,
+                recorded_at TEXT NOT NULL
+            );
+        ''')
+        self.conn.commit()
+
+    def completed_pages(self, keyword):
+        """Pages of this keyword that a previous run already finished"""
+        rows = self.conn.execute('SELECT page FROM pages WHERE keyword = ?', (keyword,))
+        return {page for (page,) in rows}
+
+    def record_page(self, keyword, page, products):
+        """Store one page's products and mark it complete in a single transaction"""
+        with self.conn:
+            self.conn.execute('DELETE FROM products WHERE keyword = ? AND page = ?', (keyword, page))
+            self.conn.executemany(
+                'INSERT INTO products (keyword, page, position, record) VALUES (?, ?, ?, ?)',
+                [(keyword, page, i, json.dumps(product, ensure_ascii=False)) for i, product in enumerate(products)]
+            )
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages (keyword, page, product_count, completed_at) VALUES (?, ?, ?, ?)',
+                (keyword, page, len(products), datetime.now(timezone.utc).isoformat())
+            )
+
+    def record_end(self, keyword, last_page, reason=None):
+        """Remember that a search has no results past last_page (the earliest end found wins)"""
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO searches (keyword, last_page, reason, recorded_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (keyword) DO UPDATE SET
+                    last_page = excluded.last_page, reason = excluded.reason, recorded_at = excluded.recorded_at
+                WHERE excluded.last_page < last_page
+            ''', (keyword, last_page, reason, datetime.now(timezone.utc).isoformat()))
+
+    def last_page(self, keyword):
+        """The journaled last page of a search, or None while its end is unknown"""
+        row = self.conn.execute('SELECT last_page FROM searches WHERE keyword = ?', (keyword,)).fetchone()
+        return row[0] if row else None
+
+    def iter_products(self, keyword=None):
+        """Stream journaled products in page order without loading the whole crawl"""
+        if keyword is None:
+            rows = self.conn.execute('SELECT record FROM products ORDER BY keyword, page, position')
+        else:
+            rows = self.conn.execute(
+                'SELECT record FROM products WHERE keyword = ? ORDER BY page, position', (keyword,)
+            )
+        for (record,) in rows:
+            yield json.loads(record)
+
+    def iter_pages(self, keyword, pages=None):
+        """Stream (page, products) in page order for the journaled pages of a keyword (only `pages`, if given)"""
+        rows = self.conn.execute(
+            'SELECT page, record FROM products WHERE keyword = ? ORDER BY page, position', (keyword,)
+        )
+        for page, records in groupby(rows, key=itemgetter(0)):
+            if pages is None or page in pages:
+                yield page, [json.loads(record) for _, record in records]
+
+    def export_csv(self, path, keyword=None):
+        """Write the journaled products to CSV row by row, each listing once; returns the number of rows written"""
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = None
+            # Sponsored listings recur on several result pages; only their identities are kept to skip repeats
+            for product in unique_products(self.iter_products(keyword)):
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(product), extrasaction='ignore', lineterminator='\n')
+                    writer.writeheader()
+                writer.writerow(product)
+                count += 1
+        return count
+
+    def close(self):
+        self.conn.close()
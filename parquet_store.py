@@ -0,0 +1,104 @@
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from data_cleaning import clean_products
+
+# Typed, compact product schema; brand and category repeat heavily, so they are dictionary-encoded
+PRODUCT_SCHEMA = pa.schema([
+    ('title', pa.string()),
+    ('brand', pa.dictionary(pa.int32(), pa.string())),
+    ('rating', pa.float64()),  # float32 would read 4.6 back as 4.599999904632568
+    ('reviews', pa.int32()),
+    ('price', pa.int32()),
+    ('image_url', pa.string()),
+    ('product_url', pa.string()),
+    ('asin', pa.string()),
+    ('sponsored', pa.bool_()),
+    ('category', pa.dictionary(pa.int32(), pa.string())),
+    # Filled only by runs with --image-cache (image_dedup.add_image_groups); group numbers are per run,
+    # the 64-bit difference hash is comparable across runs
+    ('image_hash', pa.string()),
+    ('image_group', pa.int64()),
+])
+
+# One directory per keyword and scrape date: <root>/keyword=soft toys/scrape_date=2024-05-01/
+PARTITIONING = ds.partitioning(pa.schema([('keyword', pa.string()), ('scrape_date', pa.date32())]), flavor='hive')
+
+# Placeholders the extractors write for fields they could not read
+_MISSING_TEXT = ['', 'N/A']
+
+
+def products_table(products, keyword=None, category=None, scrape_date=None):
+    """Clean scraped products (records or a DataFrame) into an Arrow table with PRODUCT_SCHEMA plus partition columns"""
+    df = pd.DataFrame(products)
+    df = clean_products(df)
+    for column in ('image_url', 'product_url', 'asin'):
+        if column in df:
+            df[column] = df[column].replace(_MISSING_TEXT, None)
+
+    # Plans tag every product with its keyword and category; single-keyword runs pass them in
+    if 'keyword' not in df:
+        df['keyword'] = keyword
+    if 'category' not in df:
+        df['category'] = category
+    df['category'] = df['category'].astype('string')
+    df['scrape_date'] = scrape_date or date.today()
+
+    table = pa.Table.from_pandas(df.reindex(columns=PRODUCT_SCHEMA.names), schema=PRODUCT_SCHEMA, preserve_index=False)
+    table = table.append_column('keyword', pa.array(df['keyword'], pa.string()))
+    return table.append_column('scrape_date', pa.array(pd.to_datetime(df['scrape_date']).dt.date, pa.date32()))
+
+
+def write_products(products, root='scrape_output', keyword=None, category=None, scrape_date=None):
+    """Write products as Parquet partitioned by keyword and scrape date; rewriting a day replaces its partition"""
+    table = products_table(products, keyword, category, scrape_date)
+    ds.write_dataset(
+        table, root, format='parquet', partitioning=PARTITIONING,
+        existing_data_behavior='delete_matching', basename_template='products-{i}.parquet',
+    )
+    return table.num_rows
+
+
+def _partition_filter(keywords=None, since=None, until=None):
+    condition = None
+    for clause in (
+        ds.field('keyword').isin(list(keywords)) if keywords else None,
+        ds.field('scrape_date') >= pd.Timestamp(since).date() if since else None,
+        ds.field('scrape_date') <= pd.Timestamp(until).date() if until else None,
+    ):
+        if clause is not None:
+            condition = clause if condition is None else condition & clause
+    return condition
+
+
+def read_products(root='scrape_output', columns=None, keywords=None, since=None, until=None):
+    """Load products into a DataFrame, reading only the requested columns and matching partitions"""
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    condition = _partition_filter(keywords, since, until)
+    return dataset.to_table(columns=columns, filter=condition).to_pandas(date_as_object=False)
+
+
+def iter_product_frames(root='scrape_output', rows=100000, columns=None, keywords=None, since=None, until=None):
+    """read_products in DataFrames of about `rows` rows each, so a long history never has to fit in memory at once"""
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    condition = _partition_filter(keywords, since, until)
+    # Scanner batches end at file boundaries (one file per keyword and day), so small ones are gathered up to `rows`
+    batches, buffered = [], 0
+    for batch in dataset.to_batches(columns=columns, filter=condition, batch_size=rows):
+        if batch.num_rows:
+            batches.append(batch)
+            buffered += batch.num_rows
+        if buffered >= rows:
+            yield pa.Table.from_batches(batches).to_pandas(date_as_object=False)
+            batches, buffered = [], 0
+    if batches:
+        yield pa.Table.from_batches(batches).to_pandas(date_as_object=False)
+
+
+def convert_csv(path, root='scrape_output', keyword='soft toys', scrape_date=None):
+    """Move an existing CSV dump into the Parquet store; returns the number of rows written"""
+    return write_products(pd.read_csv(path), root, keyword=keyword, scrape_date=scrape_date)
+
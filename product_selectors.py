@@ -0,0 +1,68 @@
+"""Selector chains shared by the WebDriver and snapshot (parsed HTML) extractors"""
+
+# Every organic or sponsored result on a search page
+PRODUCT_CONTAINER_SELECTOR = '[data-component-type="s-search-result"]'
+
+# Pagination control under the results grid
+PAGINATION_ITEM_SELECTOR = '.s-pagination-item'
+PAGINATION_SELECTED_SELECTOR = '.s-pagination-selected'
+PAGINATION_NEXT_DISABLED_SELECTOR = '.s-pagination-next.s-pagination-disabled'
+
+# Sponsored detection - Method 1: "Sponsored" text in various locations
+SPONSORED_XPATHS = [
+    './/span[contains(text(), "Sponsored")]',
+    './/span[contains(text(), "sponsored")]',
+    './/div[contains(text(), "Sponsored")]',
+    './/div[contains(text(), "sponsored")]',
+    './/span[@class="a-color-secondary" and contains(text(), "Sponsored")]',
+    './/span[contains(@class, "puis-sponsored-label")]'
+]
+
+# Sponsored detection - Method 2: sponsored-specific CSS classes
+SPONSORED_CSS_SELECTORS = [
+    '.puis-sponsored-label',
+    '.s-sponsored-label',
+    '.a-sponsored-label',
+    '[data-sponsored="true"]'
+]
+
+TITLE_SELECTORS = [
+    'h2.a-size-mini a span',
+    'h2 a span',
+    '.a-size-base-plus',
+    '.a-size-medium.a-color-base',
+    'h2.s-size-14 span'
+]
+
+PRODUCT_LINK_SELECTOR = 'h2 a'
+
+RATING_SELECTORS = [
+    '.a-icon-alt',
+    '[aria-label*="out of 5 stars"]',
+    '.a-star-mini .a-icon-alt'
+]
+
+REVIEW_SELECTORS = [
+    '.a-size-base.s-underline-text',
+    'a.a-link-normal span.a-size-base',
+    '.a-size-base'
+]
+
+PRICE_SELECTORS = [
+    '.a-price-whole',
+    '.a-price .a-offscreen',
+    '.a-price-symbol'
+]
+
+IMAGE_SELECTOR = 'img.s-image'
+
+BRAND_SELECTORS = [
+    '.a-size-base-plus',
+    '.a-link-normal .a-size-base',
+    '[data-cy="brand-name"]',
+    '.s-size-base-plus',
+    '.a-color-secondary',
+    '.a-size-base.a-color-secondary',
+    'span.a-size-base-plus',
+    'span.a-size-base.a-color-secondary'
+]
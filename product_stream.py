@@ -0,0 +1,216 @@
+import asyncio
+import csv
+import threading
+import time
+from collections import Counter
+from datetime import date
+
+import pyarrow.dataset as ds
+
+from parquet_store import PARTITIONING, products_table
+
+_END = object()
+
+
+async def aiter_stream(items, buffer=8, on_stop=None):
+    """Async iterator over a blocking generator such as scraper.iter_product_pages(...)
+
+    The generator runs on a helper thread at most `buffer` items ahead of the consumer, so the event
+    loop stays free while pages are fetched and extracted. Leaving the loop early calls on_stop (e.g.
+    scraper.cancel, which stops the crawl while the helper thread is still waiting for its next page)
+    and closes the generator once that page arrives.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    slots = threading.Semaphore(buffer)
+    stopped = threading.Event()
+
+    def put(entry):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, entry)
+        except RuntimeError:
+            pass  # the event loop is gone, nobody is listening any more
+
+    def pump():
+        error = None
+        try:
+            for item in items:
+                put((item, None))
+                slots.acquire()
+                if stopped.is_set():
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            close = getattr(items, 'close', None)
+            if close is not None:
+                close()
+            put((_END, error))
+
+    threading.Thread(target=pump, name='product-stream', daemon=True).start()
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        if on_stop is not None:
+            on_stop()
+        slots.release()
+
+
+async def aiter_products(scraper, keyword="soft toys", max_pages=200, journal=None, buffer=8):
+    """scraper.iter_products as an async iterator"""
+    jobs = scraper.build_page_jobs(keyword, range(1, max_pages + 1))
+    pages = aiter_stream(scraper.iter_product_pages(jobs, journal), buffer, on_stop=scraper.cancel)
+    try:
+        async for job, page_products in pages:
+            for product in page_products:
+                yield product
+    finally:
+        await pages.aclose()
+
+
+class CsvSink:
+    """Append each page's products to a CSV as it arrives; the columns are those of the first product"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = None
+        self.rows = 0
+
+    def write(self, job, products):
+        if not products:
+            return
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.file, fieldnames=list(products[0]), extrasaction='ignore',
+                                         lineterminator='\n')
+            self.writer.writeheader()
+        self.writer.writerows(products)
+        # A page at a time, so readers of the file see every finished page
+        self.file.flush()
+        self.rows += len(products)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Write streamed products into the partitioned Parquet store in parts, as write_products would in one go
+
+    Products are buffered per search and written as a new part file of their keyword / scrape date partition
+    once `flush_rows` are waiting or `flush_seconds` have passed, so the store lags the crawl by at most that.
+    The first part of a partition replaces whatever an earlier run wrote there, as rewriting a day does.
+    """
+
+    def __init__(self, root='scrape_output', scrape_date=None, flush_rows=5000, flush_seconds=30):
+        self.root = root
+        self.scrape_date = scrape_date or date.today()
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.pending = {}  # (keyword, category) -> products
+        self.pending_rows = 0
+        self.written = set()  # keywords whose partition this sink has started
+        self.parts = 0
+        self.rows = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, job, products):
+        if products:
+            self.pending.setdefault((job.keyword, job.category), []).extend(products)
+            self.pending_rows += len(products)
+        if self.pending_rows >= self.flush_rows or (
+                self.pending_rows and time.monotonic() - self.last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        for (keyword, category), products in self.pending.items():
+            # Plan crawls tag products with their own keyword, which products_table prefers
+            table = products_table(products, keyword, category, self.scrape_date)
+            ds.write_dataset(
+                table, self.root, format='parquet', partitioning=PARTITIONING,
+                existing_data_behavior='overwrite_or_ignore' if keyword in self.written else 'delete_matching',
+                basename_template=f"products-{self.parts}-{{i}}.parquet",
+            )
+            self.written.add(keyword)
+            self.parts += 1
+            self.rows += table.num_rows
+        self.pending = {}
+        self.pending_rows = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+class AsinIndexSink:
+    """Upsert each page into an AsinIndex (for streams from a scraper that was not given one)"""
+
+    def __init__(self, index):
+        self.index = index
+        self.counts = Counter()
+
+    def write(self, job, products):
+        self.counts.update(self.index.upsert(products))
+
+    def close(self):
+        pass
+
+
+class BrandStatsSink:
+    """Fold each page into a BrandStatsStore, so the brand summary is current while the crawl runs"""
+
+    def __init__(self, store, scrape_date=None):
+        self.store = store
+        self.scrape_date = scrape_date
+        self.folded = set()
+
+    def write(self, job, products):
+        if products:
+            # The first page of a keyword replaces that day's sums, later pages add to them
+            self.store.fold(products, self.scrape_date, job.keyword, replace=job.keyword not in self.folded)
+            self.folded.add(job.keyword)
+
+    def close(self):
+        pass
+
+
+class BrandCounter:
+    """Live product counts per brand (overall and per keyword)"""
+
+    def __init__(self):
+        self.brands = Counter()
+        self.by_keyword = {}
+
+    def write(self, job, products):
+        for product in products:
+            brand = product.get('brand') or 'N/A'
+            self.brands[brand] += 1
+            self.by_keyword.setdefault(job.keyword, Counter())[brand] += 1
+
+    def most_common(self, n=10, keyword=None):
+        counts = self.brands if keyword is None else self.by_keyword.get(keyword, Counter())
+        return counts.most_common(n)
+
+    def close(self):
+        pass
+
+
+def stream_to(pages, sinks):
+    """Feed every (job, products) page of a stream to each sink as it arrives; returns the number of products"""
+    total = 0
+    try:
+        for job, products in pages:
+            for sink in sinks:
+                sink.write(job, products)
+            total += len(products)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return total
@@ -0,0 +1,524 @@
+import argparse
+import glob
+import hashlib
+import inspect
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use('Agg')  # headless: figures are only ever written to files
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import brand_engine
+import data_cleaning
+import title_analytics
+from brand_stats import categorize
+from image_dedup import brand_image_summary, cross_brand_groups
+from parquet_store import read_products
+from title_analytics import analyze_frame
+
+plt.style.use('default')
+plt.rcParams['font.size'] = 11
+
+FIGSIZE = (20, 15)
+
+
+def _digest(*parts):
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        sha.update(b'\0')
+    return sha.hexdigest()[:20]
+
+
+def input_digest(path):
+    """Content hash of a scraped CSV, or of every Parquet file under a store root"""
+    paths = sorted(glob.glob(os.path.join(path, '**', '*.parquet'), recursive=True)) if os.path.isdir(path) else [path]
+    sha = hashlib.sha256()
+    for file_path in paths:
+        sha.update(os.path.relpath(file_path, path).encode('utf-8') if file_path != path else b'')
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+    return sha.hexdigest()[:20]
+
+
+def frame_digest(df, columns):
+    """Content hash of some columns of a DataFrame (row order included)"""
+    hashed = pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy()
+    return _digest(','.join(columns), hashed.tobytes())
+
+
+def _source(*objects):
+    return ''.join(inspect.getsource(obj) for obj in objects)
+
+
+def load_products(path):
+    if os.path.isdir(path):
+        return read_products(path)
+    return pd.read_csv(path)
+
+
+def prepare(df, workers=None):
+    """The notebook's preparation: duplicates dropped, types cleaned, brands re-read from titles, products flagged"""
+    products, _ = analyze_frame(df, workers=workers)
+    if 'image_group' not in products:
+        # Only scrapes run with --image-cache group product pictures; without them the image section is empty
+        products['image_group'] = pd.array([pd.NA] * len(products), dtype='Int64')
+    return products
+
+
+def _listing(products, columns, limit=10):
+    if products.empty:
+        return "_none_"
+    return "```\n" + products[list(columns)].head(limit).to_string(index=False, max_colwidth=60) + "\n```"
+
+
+def overview(df):
+    text = [
+        f"- Products: {len(df)}",
+        f"- Unique brands: {df['brand'].nunique()}",
+        f"- Pass the soft toy keyword and price filter: {int(df['soft_toy'].sum())}",
+        f"- With a rating: {int((df['rating'] > 0).sum())} | with reviews: {int((df['reviews'] > 0).sum())}",
+        f"- Average rating: {df['rating'].mean():.2f} | average reviews: {df['reviews'].mean():.0f}",
+        "",
+        "```\n" + df[['rating', 'reviews', 'price']].describe().round(2).to_string() + "\n```",
+    ]
+    return {'text': '\n'.join(text)}
+
+
+def brand_performance(df):
+    brand_counts = df['brand'].value_counts()
+    brand_metrics = df.groupby('brand').agg(
+        avg_rating=('rating', 'mean'), product_count=('rating', 'count'),
+        avg_reviews=('reviews', 'mean'), avg_price=('price', 'mean'),
+    ).round(2).sort_values('avg_rating', ascending=False)
+    untapped = brand_metrics[
+        (brand_metrics['avg_rating'] >= 4.0) & (brand_metrics['product_count'] <= 5) & (brand_metrics['product_count'] >= 2)
+    ].sort_values('avg_rating', ascending=False)
+    brand_analysis = df.groupby('brand').agg(rating=('rating', 'mean'), frequency=('title', 'count'),
+                                             reviews=('reviews', 'mean'))
+    top_3_share = brand_counts.head(3).sum() / len(df) * 100
+    top_5_share = brand_counts.head(5).sum() / len(df) * 100
+
+    text = ["**Top brands by product count**", ""]
+    for i, (brand, count) in enumerate(brand_counts.head(10).items(), 1):
+        text.append(f"{i}. {brand}: {count} products ({count / len(df) * 100:.1f}% market share)")
+    text += ["", "**Highest rated brands**", ""]
+    for i, (brand, metrics) in enumerate(brand_metrics.head(10).iterrows(), 1):
+        text.append(f"{i}. {brand}: {metrics['avg_rating']:.2f}★ ({metrics['product_count']:.0f} products)")
+    text += ["", "**Untapped potential** (rating ≥ 4.0, 2-5 products)", ""]
+    if untapped.empty:
+        text.append("_none_")
+    for i, (brand, metrics) in enumerate(untapped.iterrows(), 1):
+        text.append(f"{i}. {brand}: {metrics['avg_rating']:.2f}★ ({metrics['product_count']:.0f} products)")
+    text += ["", f"- Top 3 brands control {top_3_share:.1f}% of the market, top 5 control {top_5_share:.1f}%",
+             f"- Market fragmentation: {df['brand'].nunique()} unique brands"]
+    return {'text': '\n'.join(text), 'brand_counts': brand_counts, 'untapped': untapped,
+            'brand_analysis': brand_analysis}
+
+
+def executive_summary(df):
+    summary = df.groupby('brand').agg(
+        Product_Count=('title', 'count'), Avg_Rating=('rating', 'mean'),
+        Avg_Reviews=('reviews', 'mean'), Avg_Price=('price', 'mean'),
+    ).round(2)
+    summary['Market_Share_%'] = (summary['Product_Count'] / len(df) * 100).round(1)
+    summary['Category'] = categorize(summary)
+    summary = summary.sort_values('Market_Share_%', ascending=False)
+    text = "Top 15 brands (full table: `brand_performance_summary.csv`)\n\n```\n" + summary.head(15).to_string() + "\n```"
+    return {'text': text, 'tables': {'brand_performance_summary.csv': summary}}
+
+
+def price_rating(df):
+    correlation = df['price'].corr(df['rating'])
+    strength = 'Strong' if abs(correlation) > 0.7 else 'Moderate' if abs(correlation) > 0.3 else 'Weak'
+    rating_range = pd.cut(df['rating'], bins=[0, 2, 3, 4, 5], labels=['0-2 stars', '2-3 stars', '3-4 stars', '4-5 stars'])
+    price_by_rating = df.groupby(rating_range, observed=False).agg(
+        avg_price=('price', 'mean'), product_count=('price', 'count'), price_std=('price', 'std'),
+        avg_rating=('rating', 'mean'),
+    ).round(2)
+
+    high_value = df[df['high_value']].sort_values('rating', ascending=False)
+    best_value = df.nlargest(5, 'value_score')
+    overpriced = df[df['overpriced']].sort_values('price', ascending=False)
+
+    text = [
+        f"- Price-rating correlation: {correlation:.3f} ({strength}, {'positive' if correlation > 0 else 'negative'})",
+        f"- Expensive products with no rating: {int(df['unrated_expensive'].sum())}",
+        "", "**Average price by rating range**", "",
+        "```\n" + price_by_rating.to_string() + "\n```",
+        "", f"**High-value products** ({len(high_value)})", "",
+        _listing(high_value, ['title', 'brand', 'price', 'rating', 'reviews']),
+        "", "**Best value score** (rating per ₹100)", "",
+        _listing(best_value, ['title', 'value_score', 'price', 'rating'], 5),
+        "", f"**Overpriced but poorly rated** ({len(overpriced)})", "",
+        _listing(overpriced, ['title', 'brand', 'price', 'rating', 'reviews']),
+    ]
+    return {
+        'text': '\n'.join(text), 'correlation': correlation, 'price_by_rating': price_by_rating,
+        'points': df[['rating', 'price', 'reviews']], 'high_value': high_value[['rating', 'price']],
+        'overpriced': overpriced[['rating', 'price']],
+    }
+
+
+def reviews_ratings(df):
+    top_reviewed = df.nlargest(5, 'reviews')
+    top_rated = df[df['reviews'] >= 10].nlargest(5, 'rating')
+    best_sellers = df[df['best_seller']].sort_values('reviews', ascending=False)
+    hidden_gems = df[df['hidden_gem']].sort_values('rating', ascending=False)
+
+    text = [
+        "**Most reviewed**", "", _listing(top_reviewed, ['title', 'brand', 'reviews', 'rating', 'price'], 5),
+        "", "**Highest rated** (at least 10 reviews)", "",
+        _listing(top_rated, ['title', 'brand', 'rating', 'reviews', 'quality_score'], 5),
+        "", f"**Best sellers** ({len(best_sellers)})", "",
+        _listing(best_sellers, ['title', 'brand', 'reviews', 'rating', 'success_score']),
+        "", f"**Hidden gems** ({len(hidden_gems)})", "",
+        _listing(hidden_gems, ['title', 'brand', 'rating', 'reviews', 'price']),
+    ]
+    return {
+        'text': '\n'.join(text), 'top_reviewed': top_reviewed[['title', 'reviews']],
+        'top_rated': top_rated[['title', 'rating']], 'rating_counts': df['rating'].value_counts().sort_index(),
+        'reviewed': df.loc[df['reviews'] > 0, ['reviews', 'rating']],
+        'best_sellers': best_sellers[['reviews', 'rating']], 'hidden_gems': hidden_gems[['reviews', 'rating']],
+    }
+
+
+def shared_images(df):
+    pictured = df.dropna(subset=['image_group'])
+    if pictured.empty:
+        return {'text': "_No image groups in this data (scrape with `--image-cache` to add them)_"}
+    shared = cross_brand_groups(pictured)
+    by_brand = brand_image_summary(pictured)
+    text = [
+        f"- {pictured['image_group'].nunique()} distinct pictures across {len(pictured)} products with an image",
+        f"- {len(shared)} pictures appear under more than one brand ({shared['products'].sum()} products)",
+        "", "**Pictures listed under several brands**", "",
+        _listing(shared.reset_index(), ['image_group', 'products', 'brands', 'brand_names']),
+        "", "**Distinct pictures per brand** (full table: `brand_image_groups.csv`)", "",
+        "```\n" + by_brand.head(15).to_string() + "\n```",
+    ]
+    return {'text': '\n'.join(text),
+            'tables': {'brand_image_groups.csv': by_brand, 'cross_brand_images.csv': shared}}
+
+
+def brand_dashboard(path, brands):
+    brand_counts, untapped, brand_analysis = brands['brand_counts'], brands['untapped'], brands['brand_analysis']
+    fig, axes = plt.subplots(2, 2, figsize=FIGSIZE)
+    fig.suptitle('Brand Performance Analysis - Amazon Sponsored Soft Toys', fontsize=18, fontweight='bold', y=0.98)
+
+    top_5_brands = brand_counts.head(5)
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
+    bars = axes[0, 0].bar(range(len(top_5_brands)), top_5_brands.values, color=colors, alpha=0.8)
+    axes[0, 0].set_title('Top 5 Brands by Frequency', fontsize=14, fontweight='bold', pad=20)
+    axes[0, 0].set_xlabel('Brand', fontsize=12)
+    axes[0, 0].set_ylabel('Number of Products', fontsize=12)
+    axes[0, 0].set_xticks(range(len(top_5_brands)))
+    axes[0, 0].set_xticklabels(top_5_brands.index, rotation=45, ha='right')
+    for bar, value in zip(bars, top_5_brands.values):
+        axes[0, 0].text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.5, str(value),
+                        ha='center', va='bottom', fontweight='bold', fontsize=11)
+
+    pie_data = list(top_5_brands.values) + [brand_counts.iloc[5:].sum()]
+    _, _, autotexts = axes[0, 1].pie(pie_data, labels=list(top_5_brands.index) + ['Others'], autopct='%1.1f%%',
+                                     startangle=90, colors=colors + ['#DDA0DD'], textprops={'fontsize': 10})
+    axes[0, 1].set_title('Market Share of Top 5 Brands', fontsize=14, fontweight='bold', pad=20)
+    for autotext in autotexts:
+        autotext.set_weight('bold')
+
+    axes[1, 0].scatter(brand_analysis['frequency'], brand_analysis['rating'], s=brand_analysis['reviews'] * 3,
+                       alpha=0.6, c='coral', edgecolors='black', linewidth=0.5)
+    axes[1, 0].set_xlabel('Brand Frequency (Number of Products)', fontsize=12)
+    axes[1, 0].set_ylabel('Average Rating', fontsize=12)
+    axes[1, 0].set_title('Brand Performance Matrix\n(Bubble size = Average Reviews)', fontsize=14, fontweight='bold', pad=20)
+    axes[1, 0].grid(True, alpha=0.3)
+    for brand, data in brand_analysis.iterrows():
+        if data['frequency'] > 8 or data['rating'] > 4.3:
+            axes[1, 0].annotate(brand, (data['frequency'], data['rating']), xytext=(5, 5),
+                                textcoords='offset points', fontsize=9, fontweight='bold')
+
+    if not untapped.empty:
+        bars = axes[1, 1].barh(range(len(untapped)), untapped['avg_rating'], color='lightgreen', alpha=0.8,
+                               edgecolor='darkgreen')
+        axes[1, 1].set_title('Untapped Potential Brands\n(High Rating, Low Frequency)', fontsize=14, fontweight='bold', pad=20)
+        axes[1, 1].set_xlabel('Average Rating', fontsize=12)
+        axes[1, 1].set_ylabel('Brand', fontsize=12)
+        axes[1, 1].set_yticks(range(len(untapped)))
+        axes[1, 1].set_yticklabels(untapped.index)
+        axes[1, 1].set_xlim(0, 5)
+        for bar, value in zip(bars, untapped['avg_rating']):
+            axes[1, 1].text(bar.get_width() + 0.05, bar.get_y() + bar.get_height() / 2, f'{value:.2f}★',
+                            va='center', fontweight='bold')
+    else:
+        axes[1, 1].text(0.5, 0.5, 'No untapped potential brands\nfound with current criteria', ha='center', va='center',
+                        transform=axes[1, 1].transAxes, fontsize=12)
+        axes[1, 1].set_title('Untapped Potential Brands', fontsize=14, fontweight='bold')
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def price_dashboard(path, prices):
+    points, price_by_rating = prices['points'], prices['price_by_rating']
+    fig, axes = plt.subplots(2, 2, figsize=FIGSIZE)
+    fig.suptitle('Price vs Rating Analysis - Amazon Sponsored Soft Toys', fontsize=16, fontweight='bold')
+
+    scatter = axes[0, 0].scatter(points['rating'], points['price'], alpha=0.6, s=60, c=points['reviews'],
+                                 cmap='viridis', edgecolors='black')
+    axes[0, 0].set_xlabel('Rating (★)')
+    axes[0, 0].set_ylabel('Price (₹)')
+    axes[0, 0].set_title('Price vs Rating Distribution\n(Color intensity = Reviews)', fontsize=14, fontweight='bold')
+    axes[0, 0].grid(True, alpha=0.3)
+    trend = np.poly1d(np.polyfit(points['rating'], points['price'], 1))
+    axes[0, 0].plot(points['rating'], trend(points['rating']), "r--", alpha=0.8, linewidth=2,
+                    label=f"Trend Line (r={prices['correlation']:.3f})")
+    axes[0, 0].legend()
+    fig.colorbar(scatter, ax=axes[0, 0], label='Number of Reviews')
+
+    bars = axes[0, 1].bar(range(len(price_by_rating)), price_by_rating['avg_price'],
+                          color=['#FF6B6B', '#FFA500', '#32CD32', '#4169E1'], alpha=0.8)
+    axes[0, 1].set_title('Average Price by Rating Range', fontsize=14, fontweight='bold')
+    axes[0, 1].set_xlabel('Rating Range')
+    axes[0, 1].set_ylabel('Average Price (₹)')
+    axes[0, 1].set_xticks(range(len(price_by_rating)))
+    axes[0, 1].set_xticklabels(price_by_rating.index, rotation=45)
+    for bar, value in zip(bars, price_by_rating['avg_price']):
+        axes[0, 1].text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 20, f'₹{value:.0f}',
+                        ha='center', va='bottom', fontweight='bold')
+
+    rating = points['rating']
+    axes[1, 0].hist([points.loc[rating >= 4.0, 'price'], points.loc[(rating >= 3.0) & (rating < 4.0), 'price'],
+                     points.loc[rating < 3.0, 'price']], bins=25, alpha=0.7,
+                    label=['High Rated (≥4.0★)', 'Medium Rated (3.0-4.0★)', 'Low Rated (<3.0★)'],
+                    color=['green', 'orange', 'red'])
+    axes[1, 0].set_title('Price Distribution by Rating Category', fontsize=14, fontweight='bold')
+    axes[1, 0].set_xlabel('Price (₹)')
+    axes[1, 0].set_ylabel('Frequency')
+    axes[1, 0].legend()
+
+    axes[1, 1].scatter(points['rating'], points['price'], alpha=0.4, s=50, c='gray', label='All Products')
+    for products, color, label in ((prices['high_value'], 'green', 'High Value'), (prices['overpriced'], 'red', 'Overpriced')):
+        if not products.empty:
+            axes[1, 1].scatter(products['rating'], products['price'], s=100, c=color, alpha=0.8, label=label,
+                               edgecolors='black')
+    axes[1, 1].set_xlabel('Rating (★)')
+    axes[1, 1].set_ylabel('Price (₹)')
+    axes[1, 1].set_title('Price-Performance Outliers', fontsize=14, fontweight='bold')
+    axes[1, 1].legend()
+    axes[1, 1].grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def review_dashboard(path, reviews):
+    top_reviewed, top_rated, reviewed = reviews['top_reviewed'], reviews['top_rated'], reviews['reviewed']
+    fig, axes = plt.subplots(2, 2, figsize=FIGSIZE)
+    fig.suptitle('Review & Rating Distribution Analysis - Amazon Sponsored Soft Toys', fontsize=16, fontweight='bold')
+
+    bars = axes[0, 0].barh(range(len(top_reviewed)), top_reviewed['reviews'], color='lightcoral', alpha=0.8,
+                           edgecolor='darkred')
+    axes[0, 0].set_title('Top 5 Most Reviewed Products', fontsize=14, fontweight='bold')
+    axes[0, 0].set_xlabel('Number of Reviews')
+    axes[0, 0].set_ylabel('Product Rank')
+    axes[0, 0].set_yticks(range(len(top_reviewed)))
+    axes[0, 0].set_yticklabels([f"{title[:25]}..." for title in top_reviewed['title']], fontsize=10)
+    for bar, value in zip(bars, top_reviewed['reviews']):
+        axes[0, 0].text(bar.get_width() + 10, bar.get_y() + bar.get_height() / 2, f'{value:,}', va='center',
+                        fontweight='bold')
+
+    bars = axes[0, 1].bar(range(len(top_rated)), top_rated['rating'], color='lightgreen', alpha=0.8, edgecolor='darkgreen')
+    axes[0, 1].set_title('Top 5 Highest Rated Products', fontsize=14, fontweight='bold')
+    axes[0, 1].set_xlabel('Product Rank')
+    axes[0, 1].set_ylabel('Rating (★)')
+    axes[0, 1].set_ylim(0, 5)
+    axes[0, 1].set_xticks(range(len(top_rated)))
+    axes[0, 1].set_xticklabels([f"{title[:15]}..." for title in top_rated['title']], rotation=45, ha='right', fontsize=9)
+    for bar, value in zip(bars, top_rated['rating']):
+        axes[0, 1].text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.05, f'{value:.1f}★',
+                        ha='center', va='bottom', fontweight='bold')
+
+    rating_counts = reviews['rating_counts']
+    bars = axes[1, 0].bar(rating_counts.index, rating_counts.values, color='gold', alpha=0.8, edgecolor='darkgoldenrod')
+    axes[1, 0].set_title('Rating Distribution', fontsize=14, fontweight='bold')
+    axes[1, 0].set_xlabel('Rating (★)')
+    axes[1, 0].set_ylabel('Number of Products')
+    axes[1, 0].set_xlim(0, 5)
+    for bar, value in zip(bars, rating_counts.values):
+        axes[1, 0].text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.5, str(value),
+                        ha='center', va='bottom', fontweight='bold')
+
+    axes[1, 1].scatter(reviewed['reviews'], reviewed['rating'], alpha=0.6, s=80, c='purple', edgecolors='black')
+    for products, size, color, label in ((reviews['best_sellers'], 150, 'red', 'Best Sellers'),
+                                         (reviews['hidden_gems'], 120, 'green', 'Hidden Gems')):
+        if not products.empty:
+            axes[1, 1].scatter(products['reviews'], products['rating'], s=size, c=color, alpha=0.8, label=label,
+                               edgecolors='black')
+    axes[1, 1].set_xlabel('Number of Reviews')
+    axes[1, 1].set_ylabel('Rating (★)')
+    axes[1, 1].set_title('Reviews vs Rating Analysis', fontsize=14, fontweight='bold')
+    if not reviewed.empty:
+        axes[1, 1].set_xlim(0, reviewed['reviews'].max() * 1.1)
+        axes[1, 1].axhline(y=reviewed['rating'].median(), color='red', linestyle='--', alpha=0.7,
+                           label=f"Median Rating ({reviewed['rating'].median():.1f}★)")
+        axes[1, 1].axvline(x=reviewed['reviews'].median(), color='blue', linestyle='--', alpha=0.7,
+                           label=f"Median Reviews ({reviewed['reviews'].median():.0f})")
+    axes[1, 1].set_ylim(0, 5)
+    axes[1, 1].legend()
+    axes[1, 1].grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def _render(func, path, result):
+    # Written aside and moved into place, so an interrupted run never leaves a truncated figure in the cache
+    partial = path[:-len('.png')] + '.partial.png'
+    func(partial, result)
+    os.replace(partial, path)
+
+
+# (name, title, function, prepared columns it reads); a section is recomputed only when those columns change
+SECTIONS = [
+    ('overview', "Dataset Overview", overview, ['brand', 'rating', 'reviews', 'price', 'soft_toy']),
+    ('brands', "Brand Performance", brand_performance, ['title', 'brand', 'rating', 'reviews', 'price']),
+    ('summary', "Executive Summary", executive_summary, ['title', 'brand', 'rating', 'reviews', 'price']),
+    ('prices', "Price vs Rating", price_rating,
+     ['title', 'brand', 'rating', 'reviews', 'price', 'value_score', 'high_value', 'overpriced', 'unrated_expensive']),
+    ('reviews', "Reviews & Ratings", reviews_ratings,
+     ['title', 'brand', 'rating', 'reviews', 'price', 'quality_score', 'success_score', 'best_seller', 'hidden_gem']),
+    ('images', "Shared Product Images", shared_images, ['title', 'brand', 'image_group']),
+]
+
+# (file name, function, section it draws); a figure is redrawn only when that section's result changes
+FIGURES = [
+    ('brand_dashboard.png', brand_dashboard, 'brands'),
+    ('price_dashboard.png', price_dashboard, 'prices'),
+    ('review_dashboard.png', review_dashboard, 'reviews'),
+]
+
+
+class StepCache:
+    """Pickled step results and rendered files on disk, addressed by step name and input key"""
+
+    def __init__(self, directory='report_cache'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name, key, suffix='.pkl'):
+        stem, extension = os.path.splitext(name)
+        return os.path.join(self.directory, f"{stem}-{key}{extension or suffix}")
+
+    def load(self, name, key):
+        try:
+            with open(self.path(name, key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def store(self, name, key, value):
+        path = self.path(name, key)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    def prune(self, name, key, suffix='.pkl'):
+        """Remove the entries of a step other than the current one"""
+        stem, extension = os.path.splitext(name)
+        current = self.path(name, key, suffix)
+        for path in glob.glob(os.path.join(self.directory, f"{stem}-*{extension or suffix}")):
+            if path != current:
+                os.remove(path)
+
+
+def build_report(input_path, output_dir='report', cache_dir='report_cache', workers=None, force=False):
+    """Compute every section and figure whose inputs changed since the last run, then assemble the report"""
+    cache = StepCache(cache_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    timings = {}
+    recomputed = []
+
+    start = time.perf_counter()
+    prepared_key = _digest(input_digest(input_path), _source(prepare, title_analytics, data_cleaning, brand_engine))
+    cached = None if force else cache.load('prepared', prepared_key)
+    if cached is None:
+        df = prepare(load_products(input_path), workers)
+        cache.store('prepared', prepared_key, df)
+        cache.prune('prepared', prepared_key)
+        recomputed.append('prepared')
+    else:
+        df = cached
+    timings['prepared'] = time.perf_counter() - start
+
+    results = {}
+    for name, _, func, columns in SECTIONS:
+        start = time.perf_counter()
+        key = _digest(_source(func), frame_digest(df, columns))
+        entry = None if force else cache.load(name, key)
+        if entry is None:
+            result = func(df)
+            entry = (result, _digest(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
+            cache.store(name, key, entry)
+            cache.prune(name, key)
+            recomputed.append(name)
+        results[name] = entry
+        timings[name] = time.perf_counter() - start
+
+    # Figures are drawn from section results, on worker processes, and only if their section's result changed
+    start = time.perf_counter()
+    figure_paths, jobs = {}, []
+    for filename, func, section in FIGURES:
+        key = _digest(_source(func), results[section][1])
+        path = figure_paths[filename] = cache.path(filename, key)
+        if force or not os.path.exists(path):
+            jobs.append((func, path, results[section][0]))
+            recomputed.append(filename)
+        cache.prune(filename, key)
+    if jobs:
+        with ProcessPoolExecutor(min(len(jobs), workers or os.cpu_count() or 1)) as executor:
+            for future in [executor.submit(_render, func, path, result) for func, path, result in jobs]:
+                future.result()
+    for filename, path in figure_paths.items():
+        shutil.copyfile(path, os.path.join(output_dir, filename))
+    timings['figures'] = time.perf_counter() - start
+
+    lines = ["# Amazon Sponsored Soft Toys Report", "",
+             f"Input: `{input_path}` ({len(df)} products)", ""]
+    figure_of = {section: filename for filename, _, section in FIGURES}
+    for name, title, _, _ in SECTIONS:
+        result = results[name][0]
+        lines += [f"## {title}", "", result['text'], ""]
+        for table_name, table in result.get('tables', {}).items():
+            table.to_csv(os.path.join(output_dir, table_name))
+        if name in figure_of:
+            lines += [f"![{title}]({figure_of[name]})", ""]
+    with open(os.path.join(output_dir, 'report.md'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+    return recomputed, timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the soft toy market report; only sections whose inputs changed are recomputed")
+    parser.add_argument('input', help="scraped products CSV, or the root of the Parquet store")
+    parser.add_argument('--output-dir', default="report", help="where report.md, its figures and tables are written")
+    parser.add_argument('--cache-dir', default="report_cache", help="cached section results and figures")
+    parser.add_argument('--workers', type=int, help="processes for preparing the data and drawing figures (default: one per core)")
+    parser.add_argument('--force', action='store_true', help="recompute every section and figure")
+    args = parser.parse_args()
+
+    recomputed, timings = build_report(args.input, args.output_dir, args.cache_dir, args.workers, args.force)
+    for step, seconds in timings.items():
+        print(f"   {step:<10} {seconds * 1000:8.1f} ms")
+    print(f"♻️  Recomputed: {', '.join(recomputed) if recomputed else 'nothing (all cached)'}")
+    print(f"✅ Report written to '{os.path.join(args.output_dir, 'report.md')}'")
@@ -1,17 +1,126 @@
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 import pandas as pd
-import time
-import random
+import argparse
 import re
 import json
+from collections import Counter
+from itertools import chain
+
+from asin_index import AsinIndex, asin_from_url
+from brand_engine import BrandMatcher, is_valid_brand_name
+from brand_stats import BrandStatsStore
+from crawl_plan import CrawlOrchestrator, load_crawl_plan, product_identity, unique_products
+from crawl_scheduler import AdaptiveRateLimiter, CrawlScheduler
+from data_cleaning import MAX_PRICE, MIN_PRICE, is_soft_toy_title
+from fetchers import DEFAULT_CATEGORY, PageJob, SeleniumFetcher, HttpFetcher
+from html_extraction import SnapshotExtractor
+from image_dedup import ImageCache, add_image_groups
+from instrumentation import Instrumentation
+from selector_stats import SelectorStats
+from page_cache import PageCache, CachedPageFetcher
+from page_journal import PageJournal
+from parquet_store import write_products
+from product_stream import BrandCounter, BrandStatsSink, CsvSink, ParquetSink, stream_to
+from product_selectors import (
+    PRODUCT_CONTAINER_SELECTOR, SPONSORED_XPATHS, SPONSORED_CSS_SELECTORS,
+    TITLE_SELECTORS, PRODUCT_LINK_SELECTOR, RATING_SELECTORS, REVIEW_SELECTORS,
+    PRICE_SELECTORS, IMAGE_SELECTOR, BRAND_SELECTORS
+)
+
+EXTRACTION_MODES = ("snapshot", "webdriver")
+FETCH_PROFILES = ("lean", "full")
+
+# Never downloaded by the "lean" Chrome profile: images, media and fonts (only text and attributes are read),
+# plus ad and tracking endpoints. Chrome matches these with * wildcards against the full URL.
+LEAN_BLOCKED_URLS = [
+    '*.jpg*', '*.jpeg*', '*.png*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*',
+    '*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*',
+    '*.woff*', '*.ttf*', '*.otf*', '*.eot*',
+    '*doubleclick.net*', '*googlesyndication.com*', '*google-analytics.com*', '*googletagmanager.com*',
+    '*amazon-adsystem.com*', '*fls-eu.amazon.*', '*fls-na.amazon.*', '*unagi.amazon.*',
+]
+
+# is_sponsored_product for all containers of a page in one round trip; Methods 1 and 2 are covered by
+# Method 4, since everything they match shows up in the container's innerHTML
+SPONSORED_FLAGS_SCRIPT = """
+return arguments[0].map(function (container) {
+    return Boolean(container.getAttribute('data-sponsored'))
+        || container.innerHTML.toLowerCase().indexOf('sponsored') !== -1;
+});
+"""
+BACKENDS = ("selenium", "http")
 
 class AdvancedAmazonScraper:
-    def __init__(self):
+    def __init__(self, extraction_mode="snapshot", workers=1, base_url="https://www.amazon.in",
+                 backend="selenium", fetcher=None, rate_limiter=None, max_retries=3, page_cache=None,
+                 asin_index=None, metrics=None, selector_stats=None, fetch_profile="lean"):
+        if extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"extraction_mode must be one of {EXTRACTION_MODES}, got {extraction_mode!r}")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if fetcher is None and backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {BACKENDS}, got {backend!r}")
+        if fetch_profile not in FETCH_PROFILES:
+            raise ValueError(f"fetch_profile must be one of {FETCH_PROFILES}, got {fetch_profile!r}")
+        if extraction_mode == "webdriver" and (fetcher is not None or backend != "selenium"):
+            raise ValueError("extraction_mode='webdriver' needs live elements and only works with the selenium backend")
+
+        self.base_url = base_url
+        
+        # Shared by every worker and kept across crawls, so the learned request rate carries over
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        self.scheduler = None
+        
+        # Raw markup of every good page is kept so extraction can be re-run offline (CachedPageFetcher)
+        self.page_cache = page_cache
+        self.workers = workers
+        
+        # Optional AsinIndex: every extracted page is upserted as it arrives, so repeats across runs are known
+        self.asin_index = asin_index
+        
+        # "snapshot" reads page_source once per page and extracts in-process;
+        # "webdriver" queries every field through live elements (one RPC per lookup)
+        self.extraction_mode = extraction_mode
+        
+        # "lean" Chrome sessions return at DOMContentLoaded and skip images, media, fonts and ad scripts;
+        # "full" loads pages like a normal browser (for comparison, or if a layout ever needs it)
+        self.fetch_profile = fetch_profile
+        
+        # Stage timers, counters and the (silenceable) per-product progress output
+        self.metrics = metrics or Instrumentation()
+        self.metrics.declare(
+            [f"selector.{field}:{selector}" for field, selectors in (
+                ('title', TITLE_SELECTORS), ('rating', RATING_SELECTORS), ('reviews', REVIEW_SELECTORS),
+                ('price', PRICE_SELECTORS), ('brand', BRAND_SELECTORS),
+            ) for selector in selectors]
+            + [f"brand:{method}" for method in ('element', 'title NLP', 'predefined list', 'Generic')]
+        )
+        
+        # Optional SelectorStats: fallback selector chains are tried in learned hit-rate order
+        self.selector_stats = selector_stats
+        self.brand_matcher = BrandMatcher()
+        self.snapshot_extractor = SnapshotExtractor(self, self.base_url)
+        
+        # Every backend hands back raw page markup; "selenium" drives a pool of Chrome sessions,
+        # "http" uses pooled keep-alive connections with `workers` requests in flight
+        self.fetcher = fetcher or self.create_fetcher(backend)
+    
+    def create_fetcher(self, backend):
+        """Build the fetch backend for this scraper"""
+        if backend == "http":
+            return HttpFetcher(concurrency=self.workers)
+        
+        page_handler = None
+        if self.extraction_mode == "webdriver":
+            page_handler = self.extract_live_page
+        return SeleniumFetcher(self.create_driver, workers=self.workers, page_handler=page_handler)
+    
+    def create_driver(self):
+        """Start one stealth-configured Chrome session"""
         options = webdriver.ChromeOptions()
         # Enhanced stealth options
         options.add_argument('--disable-blink-features=AutomationControlled')
@@ -24,129 +133,355 @@ class AdvancedAmazonScraper:
         options.add_argument('--window-size=1920,1080')
         options.add_argument('--disable-web-security')
         options.add_argument('--disable-features=VizDisplayCompositor')
+        if self.fetch_profile == "lean":
+            # Hand the page back at DOMContentLoaded; the results grid is server-rendered and waited for explicitly
+            options.page_load_strategy = 'eager'
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
         
         service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        driver = webdriver.Chrome(service=service, options=options)
         
         # Execute script to hide automation
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        self.wait = WebDriverWait(self.driver, 20)
-        self.base_url = "https://www.amazon.in"
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        
+        # Keep every resource timing entry (the default buffer stops at 250) so per-page byte counts are complete
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                               {'source': 'performance.setResourceTimingBufferSize(100000);'})
+        if self.fetch_profile == "lean":
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+        return driver
+    
+    def selector_chain(self, field, selectors, by_hit_rate=False):
+        """Selectors to try for a field, learned from selector stats when kept (see SelectorStats.order)"""
+        if self.selector_stats is None:
+            return selectors
+        return self.selector_stats.order(field, selectors, by_hit_rate)
+    
+    def selector_result(self, field, chain, hit):
+        """Record which position of the chain matched (None = no selector did)"""
+        if hit is not None:
+            self.metrics.count(f"selector.{field}:{chain[hit]}")
+        if self.selector_stats is not None:
+            self.selector_stats.record(field, chain, hit)
+    
+    def build_search_url(self, keyword, page, category=DEFAULT_CATEGORY):
+        """Construct proper search URL with category filter"""
+        return f"{self.base_url}/s?k={keyword.replace(' ', '+')}&rh=n%3A{category}&ref=sr_pg_{page}&page={page}"
+    
+    def build_page_jobs(self, keyword, pages, category=DEFAULT_CATEGORY):
+        """One PageJob per results page of a keyword/category search"""
+        return [PageJob(keyword, page, self.build_search_url(keyword, page, category), category) for page in pages]
     
-    def scrape_amazon_products(self, keyword="soft toys", max_pages=200):
-        """Enhanced scraping with better data extraction - SPONSORED PRODUCTS ONLY"""
-        products = []
+    def scrape_amazon_products(self, keyword="soft toys", max_pages=200, journal=None):
+        """Enhanced scraping with better data extraction - SPONSORED PRODUCTS ONLY
+        
+        With a PageJournal, each finished page is committed to disk instead of kept in memory,
+        pages completed by an earlier run are skipped, and the journal's products are returned lazily.
+        """
+        jobs = self.build_page_jobs(keyword, range(1, max_pages + 1))
+        if not jobs:
+            print(f"\n⚠️  No pages to scrape for '{keyword}' (max_pages={max_pages})")
+            return []
+        page_results = {}
+
+        for job, page_products in self.crawl_pages(jobs, journal):
+            if journal is None:
+                page_results[job.page] = page_products
         
-        for page in range(1, max_pages + 1):
-            print(f"\n🔍 Scraping page {page} for '{keyword}'...")
-            
-            # Construct proper search URL with category filter
-            search_url = f"{self.base_url}/s?k={keyword.replace(' ', '+')}&rh=n%3A1350380031&ref=sr_pg_{page}&page={page}"
-            
-            try:
-                self.driver.get(search_url)
-                
-                # Wait for page to load completely
-                time.sleep(random.uniform(4, 7))
-                
-                # Verify we're on the right page
-                page_title = self.driver.title
-                print(f"📄 Page title: {page_title}")
-                
-                # Find product containers
-                product_containers = self.wait.until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, '[data-component-type="s-search-result"]'))
-                )
+        # Sponsored listings recur on several result pages; keep each ASIN once
+        if journal is not None:
+            return unique_products(journal.iter_products(jobs[0].key))
+        
+        products = list(unique_products(product for page in sorted(page_results) for product in page_results[page]))
+        print(f"\n🎉 Total scraped: {len(products)} SPONSORED products!")
+        return products
+    
+    def iter_product_pages(self, jobs, journal=None, tag_search=False):
+        """Stream a crawl: (job, products not seen earlier in this crawl) as soon as each page is extracted
+        
+        Only the identities of products already yielded are kept, so memory does not grow with the page
+        count. Pages are yielded in the order they finish. With a journal, pages completed by an earlier run
+        are not fetched again; their journaled products are replayed first, so the stream holds the whole
+        crawl, as scrape_amazon_products' result does. tag_search adds each product's keyword and category,
+        as plan crawls do.
+        """
+        pages = self.crawl_pages(jobs, journal)
+        if journal is not None:
+            pages = chain(self.journaled_pages(jobs, journal), pages)
+        
+        seen = set()
+        for job, page_products in pages:
+            new_products = []
+            for product in page_products:
+                identity = product_identity(product)
+                if identity not in seen:
+                    seen.add(identity)
+                    if tag_search:
+                        product['keyword'] = job.keyword
+                        product['category'] = job.category
+                    new_products.append(product)
+            yield job, new_products
+    
+    def journaled_pages(self, jobs, journal):
+        """(job, products) for each of these jobs whose page an earlier run journaled, in page order per search"""
+        searches = {}
+        for job in jobs:
+            searches.setdefault(job.key, {})[job.page] = job
+        replayed = 0
+        for key, requested in searches.items():
+            last_page = journal.last_page(key)
+            if last_page is not None:
+                requested = {page: job for page, job in requested.items() if page <= last_page}
+            for page, page_products in journal.iter_pages(key, requested):
+                replayed += 1
+                yield requested[page], page_products
+        if replayed:
+            print(f"⏮️  Replayed {replayed} pages from {journal.path}")
+    
+    def iter_products(self, keyword="soft toys", max_pages=200, journal=None):
+        """scrape_amazon_products as a generator of products, each yielded once as soon as its page is extracted"""
+        for job, page_products in self.iter_product_pages(self.build_page_jobs(keyword, range(1, max_pages + 1)), journal):
+            yield from page_products
+    
+    def crawl_pages(self, jobs, journal=None):
+        """Fetch and extract any mix of page jobs on the shared fetcher, yielding (job, products) as pages finish"""
+        if journal is not None:
+            completed = {}
+            last_pages = {}
+            remaining = []
+            beyond_end = 0
+            for job in jobs:
+                if job.key not in completed:
+                    completed[job.key] = journal.completed_pages(job.key)
+                    last_pages[job.key] = journal.last_page(job.key)
+                if last_pages[job.key] is not None and job.page > last_pages[job.key]:
+                    # An earlier run found the search ends before this page
+                    beyond_end += 1
+                elif job.page not in completed[job.key]:
+                    remaining.append(job)
+            if len(remaining) + beyond_end < len(jobs):
+                print(f"⏭️  Skipping {len(jobs) - len(remaining) - beyond_end} pages already completed in {journal.path}")
+            if beyond_end:
+                print(f"🛑 Skipping {beyond_end} pages past the search ends journaled in {journal.path}")
+            jobs = remaining
+        
+        # The scheduler paces requests and retries blocked pages; pages stream back as they finish, in any order
+        self.scheduler = CrawlScheduler(jobs, self.rate_limiter, max_retries=self.max_retries)
+        seen_pages = {}  # key -> {page signature: page number}
+        journaled = 0
+        index_counts = Counter()
+        transfer = Counter()
+        pages = self.fetcher.fetch_pages(self.scheduler)
+        try:
+            for fetched in pages:
+                job = fetched.job
+                for stage, seconds in fetched.timings.items():
+                    self.metrics.record(f"fetch.{stage}", seconds)
+                for name, amount in fetched.transfer.items():
+                    if amount:
+                        self.metrics.count(name, amount)
+                transfer.update(fetched.transfer)
+                transfer['pages'] += 1
+                self.metrics.count(f"pages:{fetched.outcome or 'ok'}")
+                if self.scheduler.is_beyond_end(job):
+                    # Was already in flight when the end of its search was found
+                    continue
+                if fetched.outcome == 'empty':
+                    # A results page without results: the search ran out before this page
+                    self.stop_search(job, job.page - 1, "no results", journal)
+                    continue
+                if fetched.error:
+                    print(f"❌ Error scraping page {job.page} for '{job.keyword}': {fetched.error}")
+                    continue
+                if self.page_cache is not None:
+                    self.page_cache.put(fetched)
+                try:
+                    page_products = self.process_page(fetched)
+                except Exception as e:
+                    print(f"❌ Error scraping page {job.page} for '{job.keyword}': {e}")
+                    continue
                 
-                print(f"📦 Found {len(product_containers)} product containers")
+                if fetched.last_page is not None:
+                    self.stop_search(job, fetched.last_page, f"pagination ends at page {fetched.last_page}", journal)
                 
-                # Extract products
-                page_products = []
-                sponsored_count = 0
+                # Past the end Amazon tends to serve the last page again, so identical result sets mean we are done
+                signatures = seen_pages.setdefault(job.key, {})
+                repeated = signatures.get(fetched.signature) if fetched.signature else None
+                duplicate = repeated is not None and job.page > repeated
+                if repeated is not None:
+                    first, last = sorted((job.page, repeated))
+                    self.stop_search(job, first, f"page {last} repeats page {first}", journal)
+                    if duplicate:
+                        page_products = []
+                elif fetched.signature:
+                    signatures[fetched.signature] = job.page
                 
-                for i, container in enumerate(product_containers[:25]):
-                    try:
-                        # **CRITICAL CHANGE**: Check if sponsored FIRST before extracting data
-                        if not self.is_sponsored_product(container):
-                            print(f"❌ Skipped non-sponsored product {i+1}")
-                            continue
-                        
-                        sponsored_count += 1
-                        print(f"✅ Found sponsored product {sponsored_count}")
-                        
-                        product_data = self.extract_comprehensive_product_data(container)
-                        
-                        # Double-check that it's a valid soft toy product
-                        if self.is_valid_soft_toy_product(product_data, keyword):
-                            # Ensure sponsored flag is set to True
-                            product_data['sponsored'] = True
-                            page_products.append(product_data)
-                            print(f"✅ Added sponsored product {len(page_products)}: {product_data['title'][:60]}...")
-                            print(f"🏷️  Brand: {product_data['brand']} | Price: ₹{product_data['price']} | Rating: {product_data['rating']}⭐")
-                        else:
-                            print(f"❌ Sponsored product {sponsored_count} failed soft toy validation")
-                            
-                    except Exception as e:
-                        print(f"❌ Error extracting product {i+1}: {str(e)[:100]}...")
-                        continue
+                if journal is not None:
+                    journal.record_page(job.key, job.page, page_products)
+                    journaled += 1
+                if self.asin_index is not None:
+                    index_counts.update(self.asin_index.upsert(page_products))
+                if self.selector_stats is not None:
+                    self.selector_stats.flush()
+                self.metrics.event('page', keyword=job.keyword, category=job.category, page=job.page,
+                                   products=len(page_products), fetch=fetched.timings, transfer=fetched.transfer,
+                                   duplicate=duplicate)
+                if not duplicate:
+                    yield job, page_products
+        finally:
+            # Also reached when the caller stops reading early: no further pages are requested
+            self.scheduler.cancel()
+            pages.close()
+        
+        stats = self.scheduler.stats()
+        print(f"\n⏱️  Request rate: {stats['rate_per_min']}/min | Retries: {stats['retries']} | Outcomes: {stats['outcomes']}")
+        if transfer['transfer_bytes']:
+            print(f"📦 Transferred {transfer['transfer_bytes'] / 1024 / 1024:.2f} MB over {transfer['pages']} pages "
+                  f"({transfer['transfer_bytes'] / transfer['pages'] / 1024:.0f} KB/page, "
+                  f"{transfer['resources'] / transfer['pages']:.0f} subresources/page)")
+        if stats['skipped_pages']:
+            print(f"🛑 Early stop saved {stats['skipped_pages']} page requests")
+        if stats['failed_pages']:
+            print(f"❌ Gave up on pages: {stats['failed_pages']}")
+        if self.asin_index is not None:
+            print(f"🆔 ASIN index: {index_counts['new']} new, {index_counts['changed']} changed, "
+                  f"{index_counts['unchanged']} unchanged ({len(self.asin_index)} products known)")
+        if journal is not None:
+            print(f"\n🎉 Journaled {journaled} new pages to {journal.path}")
+    
+    def stop_search(self, job, last_page, reason, journal=None):
+        """Cancel the queued pages of job's search past last_page (and journal the end, so a resume skips them too)"""
+        if journal is not None:
+            journal.record_end(job.key, last_page, reason)
+        saved = self.scheduler.stop_after(job.key, last_page)
+        if saved:
+            print(f"🛑 '{job.keyword}' ends at page {last_page} ({reason}); skipping {saved} queued pages")
+    
+    def process_page(self, fetched):
+        """Extract the sponsored products from one fetched search results page"""
+        self.metrics.say(f"\n🔍 Scraped page {fetched.job.page} for '{fetched.job.keyword}'...")
+        
+        # Verify we're on the right page
+        self.metrics.say(f"📄 Page title: {fetched.title}")
+        
+        # One parse serves the pagination/duplicate checks and, in snapshot mode, extraction
+        with self.metrics.timer('page.parse'):
+            document = self.snapshot_extractor.parse(fetched.html)
+        with self.metrics.timer('page.containers'):
+            product_containers = self.snapshot_extractor.containers(document)
+        with self.metrics.timer('page.pagination'):
+            fetched.last_page = self.snapshot_extractor.last_page(document)
+            fetched.signature = self.snapshot_extractor.page_signature(product_containers)
+        
+        if fetched.records is not None:
+            # Already extracted from live elements while the page was loaded
+            return fetched.records
+        
+        return self.extract_page_products(self.snapshot_extractor, product_containers, fetched.job.keyword, fetched.job.page)
+    
+    def extract_live_page(self, driver, fetched):
+        """Extract products through live WebDriver elements (extraction_mode="webdriver")"""
+        with self.metrics.timer('page.containers'):
+            product_containers = driver.find_elements(By.CSS_SELECTOR, PRODUCT_CONTAINER_SELECTOR)
+        return self.extract_page_products(self, product_containers, fetched.job.keyword, fetched.job.page)
+    
+    def extract_page_products(self, extractor, product_containers, keyword, page):
+        """Run sponsored detection, field extraction and validation over a page's containers"""
+        self.metrics.say(f"📦 Found {len(product_containers)} product containers")
+        self.metrics.count('containers', len(product_containers))
+        
+        # Extract products
+        page_products = []
+        sponsored_count = 0
+        product_containers = product_containers[:25]
+        
+        # **CRITICAL CHANGE**: Check if sponsored FIRST before extracting data - the whole page at once
+        with self.metrics.timer('page.sponsored_check'):
+            try:
+                sponsored_flags = extractor.sponsored_flags(product_containers)
+            except Exception as e:
+                print(f"❌ Batched sponsored check failed, checking containers one by one: {e}")
+                sponsored_flags = [extractor.is_sponsored_product(container) for container in product_containers]
+        # Verdicts are tallied here for either path; is_sponsored_product only counts the method that matched
+        self.metrics.count('sponsored:sponsored', sum(sponsored_flags))
+        self.metrics.count('sponsored:not sponsored', len(sponsored_flags) - sum(sponsored_flags))
+        
+        for i, (container, sponsored) in enumerate(zip(product_containers, sponsored_flags)):
+            try:
+                if not sponsored:
+                    self.metrics.say(f"❌ Skipped non-sponsored product {i+1}")
+                    continue
                 
-                products.extend(page_products)
-                print(f"📊 Page {page} summary: {len(page_products)} sponsored products extracted out of {sponsored_count} sponsored products found")
+                sponsored_count += 1
+                self.metrics.say(f"✅ Found sponsored product {sponsored_count}")
                 
-                # Random delay between pages
-                time.sleep(random.uniform(4, 7))
+                with self.metrics.timer('product.extract'):
+                    product_data = extractor.extract_comprehensive_product_data(container)
                 
+                # Double-check that it's a valid soft toy product
+                if self.is_valid_soft_toy_product(product_data, keyword):
+                    # Ensure sponsored flag is set to True
+                    product_data['sponsored'] = True
+                    page_products.append(product_data)
+                    self.metrics.count('products:valid')
+                    self.metrics.say(f"✅ Added sponsored product {len(page_products)}: {product_data['title'][:60]}...")
+                    self.metrics.say(f"🏷️  Brand: {product_data['brand']} | Price: ₹{product_data['price']} | Rating: {product_data['rating']}⭐")
+                else:
+                    self.metrics.count('products:failed validation')
+                    self.metrics.say(f"❌ Sponsored product {sponsored_count} failed soft toy validation")
+                    
             except Exception as e:
-                print(f"❌ Error scraping page {page}: {e}")
+                self.metrics.count('products:error')
+                print(f"❌ Error extracting product {i+1}: {str(e)[:100]}...")
                 continue
         
-        print(f"\n🎉 Total scraped: {len(products)} SPONSORED products!")
-        return products
+        self.metrics.say(f"📊 Page {page} summary: {len(page_products)} sponsored products extracted out of {sponsored_count} sponsored products found")
+        return page_products
+    
+    def sponsored_flags(self, containers):
+        """is_sponsored_product's verdict for every live container of a page in a single script call"""
+        if not containers:
+            return []
+        return [bool(flag) for flag in containers[0].parent.execute_script(SPONSORED_FLAGS_SCRIPT, containers)]
     
     def is_sponsored_product(self, container):
         """Check if a product is sponsored using multiple detection methods"""
         try:
             # Method 1: Look for "Sponsored" text in various locations
-            sponsored_selectors = [
-                './/span[contains(text(), "Sponsored")]',
-                './/span[contains(text(), "sponsored")]',
-                './/div[contains(text(), "Sponsored")]',
-                './/div[contains(text(), "sponsored")]',
-                './/span[@class="a-color-secondary" and contains(text(), "Sponsored")]',
-                './/span[contains(@class, "puis-sponsored-label")]'
-            ]
-            
-            for selector in sponsored_selectors:
+            chain = self.selector_chain('sponsored_xpath', SPONSORED_XPATHS, by_hit_rate=True)
+            for position, selector in enumerate(chain):
                 try:
                     sponsored_elem = container.find_element(By.XPATH, selector)
                     if sponsored_elem:
-                        print(f"🏷️  Sponsored product detected via selector: {selector}")
+                        self.selector_result('sponsored_xpath', chain, position)
+                        self.metrics.count(f"sponsored:xpath {selector}")
+                        self.metrics.say(f"🏷️  Sponsored product detected via selector: {selector}")
                         return True
                 except:
                     continue
+            self.selector_result('sponsored_xpath', chain, None)
             
             # Method 2: Check for sponsored-specific CSS classes
-            sponsored_classes = [
-                '.puis-sponsored-label',
-                '.s-sponsored-label',
-                '.a-sponsored-label',
-                '[data-sponsored="true"]'
-            ]
-            
-            for css_class in sponsored_classes:
+            chain = self.selector_chain('sponsored_css', SPONSORED_CSS_SELECTORS, by_hit_rate=True)
+            for position, css_class in enumerate(chain):
                 try:
                     sponsored_elem = container.find_element(By.CSS_SELECTOR, css_class)
                     if sponsored_elem:
-                        print(f"🏷️  Sponsored product detected via CSS class: {css_class}")
+                        self.selector_result('sponsored_css', chain, position)
+                        self.metrics.count(f"sponsored:css {css_class}")
+                        self.metrics.say(f"🏷️  Sponsored product detected via CSS class: {css_class}")
                         return True
                 except:
                     continue
+            self.selector_result('sponsored_css', chain, None)
             
             # Method 3: Check for sponsored-related attributes
             try:
                 if container.get_attribute('data-sponsored'):
-                    print(f"🏷️  Sponsored product detected via data-sponsored attribute")
+                    self.metrics.count('sponsored:data-sponsored attribute')
+                    self.metrics.say(f"🏷️  Sponsored product detected via data-sponsored attribute")
                     return True
             except:
                 pass
@@ -155,7 +490,8 @@ class AdvancedAmazonScraper:
             try:
                 container_html = container.get_attribute('innerHTML')
                 if 'sponsored' in container_html.lower():
-                    print(f"🏷️  Sponsored product detected via innerHTML search")
+                    self.metrics.count('sponsored:innerHTML search')
+                    self.metrics.say(f"🏷️  Sponsored product detected via innerHTML search")
                     return True
             except:
                 pass
@@ -177,49 +513,54 @@ class AdvancedAmazonScraper:
             'price': 0,
             'image_url': 'N/A',
             'product_url': 'N/A',
+            'asin': 'N/A',
             'sponsored': True  # Always True since we only extract sponsored products
         }
         
+        lap = self.metrics.laps('field')
         try:
             # 1. Extract Title
-            title_selectors = [
-                'h2.a-size-mini a span',
-                'h2 a span',
-                '.a-size-base-plus',
-                '.a-size-medium.a-color-base',
-                'h2.s-size-14 span'
-            ]
-            
-            for selector in title_selectors:
+            chain, hit = self.selector_chain('title', TITLE_SELECTORS), None
+            for position, selector in enumerate(chain):
                 try:
                     title_elem = container.find_element(By.CSS_SELECTOR, selector)
                     title_text = title_elem.text.strip()
                     if title_text and len(title_text) > 10:
                         product_data['title'] = title_text
+                        hit = position
                         break
                 except:
                     continue
+            self.selector_result('title', chain, hit)
+            lap('title')
             
             # 2. Extract Product URL
             try:
-                link_elem = container.find_element(By.CSS_SELECTOR, 'h2 a')
+                link_elem = container.find_element(By.CSS_SELECTOR, PRODUCT_LINK_SELECTOR)
                 href = link_elem.get_attribute('href')
                 if href:
                     product_data['product_url'] = href
             except:
                 pass
             
+            # 2b. ASIN - every result container carries data-asin; it also gives a canonical URL when the link is missing
+            try:
+                asin = container.get_attribute('data-asin') or asin_from_url(product_data['product_url'])
+                if asin:
+                    product_data['asin'] = asin
+                    if product_data['product_url'] == 'N/A':
+                        product_data['product_url'] = f"{self.base_url}/dp/{asin}"
+            except:
+                pass
+            lap('url')
+            
             # 3. Extract Brand (ENHANCED METHOD)
             product_data['brand'] = self.extract_brand_advanced(product_data['title'], container)
+            lap('brand')
             
             # 4. Extract Rating
-            rating_selectors = [
-                '.a-icon-alt',
-                '[aria-label*="out of 5 stars"]',
-                '.a-star-mini .a-icon-alt'
-            ]
-            
-            for selector in rating_selectors:
+            chain, hit = self.selector_chain('rating', RATING_SELECTORS), None
+            for position, selector in enumerate(chain):
                 try:
                     rating_elem = container.find_element(By.CSS_SELECTOR, selector)
                     rating_text = rating_elem.get_attribute('textContent') or rating_elem.get_attribute('aria-label')
@@ -229,18 +570,16 @@ class AdvancedAmazonScraper:
                             rating_value = float(rating_match.group(1))
                             if 0 <= rating_value <= 5:
                                 product_data['rating'] = rating_value
+                                hit = position
                                 break
                 except:
                     continue
+            self.selector_result('rating', chain, hit)
+            lap('rating')
             
             # 5. Extract Reviews Count
-            review_selectors = [
-                '.a-size-base.s-underline-text',
-                'a.a-link-normal span.a-size-base',
-                '.a-size-base'
-            ]
-            
-            for selector in review_selectors:
+            chain, hit = self.selector_chain('reviews', REVIEW_SELECTORS), None
+            for position, selector in enumerate(chain):
                 try:
                     review_elems = container.find_elements(By.CSS_SELECTOR, selector)
                     for elem in review_elems:
@@ -253,18 +592,16 @@ class AdvancedAmazonScraper:
                                     product_data['reviews'] = reviews_count
                                     break
                     if product_data['reviews'] > 0:
+                        hit = position
                         break
                 except:
                     continue
+            self.selector_result('reviews', chain, hit)
+            lap('reviews')
             
             # 6. Extract Price
-            price_selectors = [
-                '.a-price-whole',
-                '.a-price .a-offscreen',
-                '.a-price-symbol'
-            ]
-            
-            for selector in price_selectors:
+            chain, hit = self.selector_chain('price', PRICE_SELECTORS), None
+            for position, selector in enumerate(chain):
                 try:
                     price_elem = container.find_element(By.CSS_SELECTOR, selector)
                     price_text = price_elem.text.strip() or price_elem.get_attribute('textContent')
@@ -274,290 +611,278 @@ class AdvancedAmazonScraper:
                             price_value = int(price_match.group(1))
                             if price_value > 0:
                                 product_data['price'] = price_value
+                                hit = position
                                 break
                 except:
                     continue
+            self.selector_result('price', chain, hit)
+            lap('price')
             
             # 7. Extract Image URL
             try:
-                img_elem = container.find_element(By.CSS_SELECTOR, 'img.s-image')
+                img_elem = container.find_element(By.CSS_SELECTOR, IMAGE_SELECTOR)
                 src = img_elem.get_attribute('src')
                 if src and src.startswith('http'):
                     product_data['image_url'] = src
             except:
                 pass
+            lap('image')
             
         except Exception as e:
             print(f"Error in extract_comprehensive_product_data: {e}")
         
         return product_data
     
-    def extract_brand_advanced(self, title, container):
+    def extract_brand_advanced(self, title, container, extractor=None):
         """Enhanced brand extraction using multiple dynamic methods"""
         
-        # Method 1: Look for actual brand element on page
-        brand_from_element = self.extract_brand_from_element(container)
+        # Method 1: Look for actual brand element on page (live or parsed, depending on the extractor)
+        brand_from_element = (extractor or self).extract_brand_from_element(container)
         if brand_from_element:
-            print(f"🏷️  Brand extracted from element: {brand_from_element}")
+            self.metrics.count('brand:element')
+            self.metrics.say(f"🏷️  Brand extracted from element: {brand_from_element}")
             return brand_from_element
         
-        # Method 2: Extract from title using NLP patterns
-        brand_from_title = self.extract_brand_from_title_nlp(title)
-        if brand_from_title:
-            print(f"🏷️  Brand extracted from title NLP: {brand_from_title}")
-            return brand_from_title
+        # Method 2: title NLP patterns, then Method 3: the predefined brand list (one cached pass)
+        brand, method = self.brand_matcher.brand_from_title(title)
+        if method:
+            self.metrics.count(f"brand:{method}")
+            self.metrics.say(f"🏷️  Brand extracted from {method}: {brand}")
+            return brand
         
-        # Method 3: Fallback to predefined list
-        brand_from_predefined = self.extract_brand_from_predefined_list(title)
-        if brand_from_predefined != "Generic":
-            print(f"🏷️  Brand extracted from predefined list: {brand_from_predefined}")
-            return brand_from_predefined
-        
-        print(f"🏷️  Brand defaulted to: Generic")
+        self.metrics.count('brand:Generic')
+        self.metrics.say(f"🏷️  Brand defaulted to: Generic")
         return "Generic"
     
     def extract_brand_from_element(self, container):
         """Extract brand from actual Amazon page elements"""
-        brand_selectors = [
-            '.a-size-base-plus',
-            '.a-link-normal .a-size-base',
-            '[data-cy="brand-name"]',
-            '.s-size-base-plus',
-            '.a-color-secondary',
-            '.a-size-base.a-color-secondary',
-            'span.a-size-base-plus',
-            'span.a-size-base.a-color-secondary'
-        ]
-        
-        for selector in brand_selectors:
+        chain = self.selector_chain('brand', BRAND_SELECTORS)
+        for position, selector in enumerate(chain):
             try:
                 brand_elements = container.find_elements(By.CSS_SELECTOR, selector)
                 for elem in brand_elements:
                     brand_text = elem.text.strip()
                     if brand_text and self.is_valid_brand_name(brand_text):
+                        self.selector_result('brand', chain, position)
                         return brand_text
             except:
                 continue
         
+        self.selector_result('brand', chain, None)
         return None
     
     def extract_brand_from_title_nlp(self, title):
         """Extract brand from title using NLP patterns"""
-        if not title or title == 'N/A':
-            return None
-        
-        # Clean the title
-        title_clean = re.sub(r'[^\w\s&\-\.]', ' ', title)
-        words = title_clean.split()
-        
-        # Pattern 1: Brand name usually comes first (check first 1-3 words)
-        for i in range(min(3, len(words))):
-            potential_brand = ' '.join(words[:i+1])
-            if self.is_valid_brand_name(potential_brand):
-                return potential_brand
-        
-        # Pattern 2: Brand name patterns in title
-        brand_patterns = [
-            r'by\s+([A-Za-z\s&\-\.]+?)(?:\s|$)',
-            r'"([A-Za-z\s&\-\.]+?)"',
-            r'Brand:\s*([A-Za-z\s&\-\.]+?)(?:\s|$)',
-            r'from\s+([A-Za-z\s&\-\.]+?)(?:\s|$)'
-        ]
-        
-        for pattern in brand_patterns:
-            match = re.search(pattern, title, re.IGNORECASE)
-            if match:
-                potential_brand = match.group(1).strip()
-                if self.is_valid_brand_name(potential_brand):
-                    return potential_brand
-        
-        # Pattern 3: Check if any word looks like a brand (capitalized, reasonable length)
-        for word in words[:5]:  # Check first 5 words
-            if self.is_valid_brand_name(word) and word[0].isupper():
-                return word
-        
-        return None
+        return self.brand_matcher.brand_from_title_nlp(title)
     
     def is_valid_brand_name(self, text):
         """Validate if text looks like a brand name"""
-        if not text:
-            return False
-        
-        text = text.strip()
-        
-        # Exclude common non-brand words
-        exclude_words = {
-            'soft', 'toy', 'toys', 'plush', 'stuffed', 'teddy', 'bear', 'doll',
-            'cm', 'inch', 'inches', 'size', 'color', 'colour', 'piece', 'pieces',
-            'pack', 'set', 'amazon', 'delivery', 'prime', 'deal', 'offer', 'sale',
-            'new', 'old', 'big', 'small', 'large', 'medium', 'mini', 'giant',
-            'cute', 'adorable', 'beautiful', 'lovely', 'sweet', 'nice', 'good',
-            'best', 'top', 'premium', 'quality', 'super', 'ultra', 'max',
-            'baby', 'kids', 'children', 'child', 'adult', 'boy', 'girl',
-            'red', 'blue', 'green', 'yellow', 'pink', 'white', 'black', 'brown',
-            'with', 'and', 'for', 'the', 'a', 'an', 'is', 'in', 'on', 'at',
-            'gift', 'birthday', 'christmas', 'valentine', 'festival'
-        }
-        
-        text_lower = text.lower()
-        
-        # Check if it's an excluded word
-        if text_lower in exclude_words:
-            return False
-        
-        # Check reasonable length
-        if len(text) < 2 or len(text) > 30:
-            return False
-        
-        # Check if it contains mostly valid characters
-        if not re.match(r'^[a-zA-Z\s&\-\.0-9]+$', text):
-            return False
-        
-        # Check if it's not all numbers
-        if text.isdigit():
-            return False
-        
-        # Check if it's not all special characters
-        if re.match(r'^[^a-zA-Z0-9]+$', text):
-            return False
-        
-        return True
+        return is_valid_brand_name(text)
     
     def extract_brand_from_predefined_list(self, title):
         """Extract brand from predefined list (fallback method)"""
-        if not title or title == 'N/A':
-            return "Generic"
-        
-        # Enhanced soft toy brands list
-        soft_toy_brands = [
-            'Babique', 'CozyHug', 'VIH-AAN', 'Storio', 'Niku', 'Webby',
-            'Dimpy', 'Tickles', 'Frantic', 'Ultra', 'Cuddles', 'Mebby',
-            'Archies', 'Toyshine', 'Babyhug', 'Deals India', 'FunBlast',
-            'GUND', 'Ty', 'Melissa & Doug', 'LOVEY DOVEY', 'Aldea',
-            'odinbirds', 'SCOOBA', 'MGP Creation', 'Richy Toys', 'One94Store',
-            'WILD REPUBLIC', 'Storescent', 'YBN', 'Mirada', 'Amazon Brand',
-            'Jam & Honey', 'Hamleys', 'Fisher-Price', 'Mattel', 'Steiff',
-            'Build-A-Bear', 'Aurora', 'Jellycat', 'IKEA', 'Disney',
-            'Funskool', 'Kiddieland', 'Chicco', 'Vtech', 'LeapFrog',
-            'Tomy', 'Playgro', 'Manhattan Toy', 'Lamaze', 'Bright Starts'
-        ]
-        
-        title_lower = title.lower()
-        
-        # Check for exact brand matches
-        for brand in soft_toy_brands:
-            if brand.lower() in title_lower:
-                return brand
-        
-        # Check for partial matches (for compound brands)
-        for brand in soft_toy_brands:
-            brand_parts = brand.lower().split()
-            if len(brand_parts) > 1:
-                for part in brand_parts:
-                    if len(part) > 3 and part in title_lower:
-                        return brand
-        
-        # Last resort: extract first word if it looks like a brand
-        words = title.split()
-        if words:
-            first_word = words[0]
-            if self.is_valid_brand_name(first_word) and first_word[0].isupper():
-                return first_word
-        
-        return "Generic"
+        return self.brand_matcher.brand_from_predefined_list(title)
     
     def is_valid_soft_toy_product(self, product_data, keyword):
         """Validate if the product is actually a soft toy"""
-        title = product_data['title'].lower()
-        
-        # Soft toy related keywords
-        soft_toy_keywords = [
-            'soft toy', 'plush', 'stuffed', 'teddy', 'bear', 'doll',
-            'unicorn', 'elephant', 'dog', 'cat', 'panda', 'rabbit',
-            'penguin', 'octopus', 'dinosaur', 'animal', 'toy', 'cushion',
-            'pillow', 'huggable', 'cuddly', 'fluffy', 'furry', 'plushie',
-            'stuffie', 'cuddle', 'squeeze', 'snuggle', 'comfort'
-        ]
-        
-        # Exclude non-toy items
-        exclude_keywords = [
-            'shoe', 'sandal', 'footwear', 'slipper', 'boot', 'sneaker',
-            'clothing', 'dress', 'shirt', 'pant', 'electronics', 'mobile',
-            'phone', 'charger', 'cable', 'book', 'pen', 'pencil', 'bag',
-            'backpack', 'bottle', 'cup', 'plate', 'bowl', 'spoon', 'fork'
-        ]
-        
-        # Check for exclusions first
-        for exclude in exclude_keywords:
-            if exclude in title:
-                return False
-        
-        # Check for soft toy keywords
-        keyword_found = False
-        for keyword in soft_toy_keywords:
-            if keyword in title:
-                keyword_found = True
-                break
-        
-        # Additional validation: check if it has reasonable toy price
-        reasonable_price = 50 <= product_data['price'] <= 10000
-        
-        return keyword_found and reasonable_price
+        # Same keyword filter and price band as data_cleaning.soft_toy_mask, one product at a time
+        reasonable_price = MIN_PRICE <= product_data['price'] <= MAX_PRICE
+        return reasonable_price and is_soft_toy_title(product_data['title'])
+    
+    def cancel(self):
+        """Stop the running crawl from any thread: pages in flight finish, nothing further is requested"""
+        if self.scheduler is not None:
+            self.scheduler.cancel()
     
     def close(self):
-        self.driver.quit()
+        """Shut down the fetch backend (every pooled browser session for selenium)"""
+        self.fetcher.close()
 
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape sponsored soft toy listings from Amazon search results")
+    parser.add_argument('--keyword', default="soft toys")
+    parser.add_argument('--plan', help="JSON crawl plan of keyword x category x page-range jobs (overrides --keyword/--pages)")
+    parser.add_argument('--output', default="amazon_soft_toys_sponsored_enhanced.csv", help="CSV file to write")
+    parser.add_argument('--pages', type=int, default=100, help="number of search result pages to scrape")
+    parser.add_argument('--backend', choices=BACKENDS, default="selenium", help="how search pages are fetched")
+    parser.add_argument('--workers', type=int, default=1, help="parallel browser sessions (selenium) or requests in flight (http)")
+    parser.add_argument('--fetch-profile', choices=FETCH_PROFILES, default="lean",
+                        help="lean: eager load, no images/media/fonts/ad scripts; full: load pages like a normal browser")
+    parser.add_argument('--max-retries', type=int, default=3, help="retries per page after a block, timeout or error")
+    parser.add_argument('--journal', help="SQLite page journal; completed pages are skipped when a crawl is restarted")
+    parser.add_argument('--cache-dir', default="page_cache", help="where fetched pages are cached (compressed)")
+    parser.add_argument('--cache-max-mb', type=int, default=500, help="size cap of the page cache")
+    parser.add_argument('--cache-max-age-days', type=int, help="drop cached pages fetched more than this many days ago")
+    parser.add_argument('--no-cache', action='store_true', help="do not cache fetched pages")
+    parser.add_argument('--from-cache', action='store_true', help="re-run extraction over cached pages; no browser or network")
+    parser.add_argument('--cache-date', help="with --from-cache, replay pages fetched on this date (YYYY-MM-DD) instead of the cache's latest fetch date")
+    parser.add_argument('--parquet-dir', default="scrape_output", help="partitioned Parquet store (keyword / scrape date)")
+    parser.add_argument('--no-parquet', action='store_true', help="only write the CSV")
+    parser.add_argument('--asin-index', help="SQLite ASIN index to upsert products into (latest record + change history)")
+    parser.add_argument('--image-cache', help="hash product thumbnails (cached in this directory) and add image_hash/image_group columns")
+    parser.add_argument('--brand-stats', help="SQLite brand statistics store to fold this run into (per keyword and day)")
+    parser.add_argument('--base-url', default="https://www.amazon.in", help="site to scrape (e.g. a local fixture server)")
+    parser.add_argument('--selector-stats', help="SQLite selector hit statistics; selector chains are tried in learned order")
+    parser.add_argument('--selector-window', type=int, default=200, help="tries in a row without a hit before a selector is pruned")
+    parser.add_argument('--quiet', action='store_true', help="no per-page / per-product progress output")
+    parser.add_argument('--metrics-log', help="append structured JSON-lines page events and the run profile to this file")
+    parser.add_argument('--stream', action='store_true',
+                        help="write each page's products to the outputs as it is extracted instead of all at the end")
+    args = parser.parse_args()
+    if args.stream and args.image_cache:
+        parser.error("--image-cache groups the whole result set and cannot be combined with --stream")
+    
     print("🚀 Starting Amazon Soft Toys Scraper (SPONSORED PRODUCTS ONLY)...")
     print("🔧 Enhanced with Dynamic Brand Extraction")
     
-    scraper = AdvancedAmazonScraper()
+    page_cache = None
+    if args.from_cache or not args.no_cache:
+        page_cache = PageCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024,
+                               max_age_days=args.cache_max_age_days)
+    # Replayed pages belong to the day they were fetched, not to today: a replay reads one fetch date only,
+    # so its products never land in (and overwrite) another day's partition and brand statistics
+    scrape_date = None
+    if args.from_cache:
+        scrape_date = args.cache_date or page_cache.latest_fetch_date()
+        if scrape_date is None:
+            parser.error(f"--from-cache: no cached pages in {args.cache_dir}")
+        print(f"⏮️ Replaying pages fetched on {scrape_date}")
+    
+    asin_index = AsinIndex(args.asin_index) if args.asin_index else None
+    metrics = Instrumentation(quiet=args.quiet, log_path=args.metrics_log)
+    selector_stats = SelectorStats(args.selector_stats, window=args.selector_window) if args.selector_stats else None
+    
+    if args.from_cache:
+        scraper = AdvancedAmazonScraper(base_url=args.base_url, fetcher=CachedPageFetcher(page_cache, scrape_date),
+                                        asin_index=asin_index, metrics=metrics, selector_stats=selector_stats)
+    else:
+        scraper = AdvancedAmazonScraper(workers=args.workers, base_url=args.base_url, backend=args.backend,
+                                        max_retries=args.max_retries, page_cache=page_cache, asin_index=asin_index,
+                                        fetch_profile=args.fetch_profile,
+                                        metrics=metrics, selector_stats=selector_stats)
+    journal = PageJournal(args.journal) if args.journal else None
+    output_csv = args.output
     
     try:
-        # Scrape products
-        products = scraper.scrape_amazon_products("soft toys", max_pages=100)
-        
-        if products:
-            # Create DataFrame
-            df = pd.DataFrame(products)
-            
-            # Verify all products are sponsored
-            print(f"\n🔍 Verification: All {len(df)} products are sponsored: {df['sponsored'].all()}")
-            
-            # Brand analysis
-            unique_brands = df['brand'].nunique()
-            brand_counts = df['brand'].value_counts()
+        if args.stream:
+            # Pages reach the CSV, the Parquet store and the brand statistics as they are extracted;
+            # only the identities of products already written are kept in memory
+            if args.plan:
+                jobs = [job for crawl_job in load_crawl_plan(args.plan)
+                        for job in scraper.build_page_jobs(crawl_job.keyword, crawl_job.pages, crawl_job.category)]
+            else:
+                jobs = scraper.build_page_jobs(args.keyword, range(1, args.pages + 1))
+            brand_counter = BrandCounter()
+            sinks = [CsvSink(output_csv), brand_counter]
+            if not args.no_parquet:
+                sinks.append(ParquetSink(args.parquet_dir, scrape_date=scrape_date))
+            brand_stats = BrandStatsStore(args.brand_stats) if args.brand_stats else None
+            if brand_stats is not None:
+                sinks.append(BrandStatsSink(brand_stats, scrape_date))
+            try:
+                total = stream_to(scraper.iter_product_pages(jobs, journal, tag_search=bool(args.plan)), sinks)
+            finally:
+                if brand_stats is not None:
+                    brand_stats.close()
             
+            print(f"\n✅ Streamed {total} SPONSORED products to '{output_csv}'"
+                  + ("" if args.no_parquet else f" and Parquet store '{args.parquet_dir}'"))
             print(f"\n🏷️  Brand Analysis:")
-            print(f"   • Total Unique Brands Found: {unique_brands}")
+            print(f"   • Total Unique Brands Found: {len(brand_counter.brands)}")
             print(f"   • Top 10 Brands:")
-            for i, (brand, count) in enumerate(brand_counts.head(10).items(), 1):
+            for i, (brand, count) in enumerate(brand_counter.most_common(10), 1):
                 print(f"     {i:2d}. {brand:<20} : {count:3d} products")
+        else:
+            # Scrape products
+            if args.plan:
+                # One scheduled crawl over every job of the plan, de-duplicated across keywords
+                products = CrawlOrchestrator(scraper, journal).run(load_crawl_plan(args.plan))
+            else:
+                products = scraper.scrape_amazon_products(args.keyword, max_pages=args.pages, journal=journal)
+        
+            df = None
+            exported = False
+            if journal is not None and not args.plan:
+                # Write the CSV straight from the journal (this run's pages plus any resumed ones), a row at a time
+                exported = journal.export_csv(output_csv, args.keyword) > 0
+                if exported:
+                    df = pd.read_csv(output_csv, keep_default_na=False)
+            elif products:
+                # Create DataFrame
+                df = pd.DataFrame(products)
             
-            # Save to CSV
-            df.to_csv('amazon_soft_toys_sponsored_enhanced.csv', index=False)
-            print(f"\n✅ Saved {len(products)} SPONSORED products to 'amazon_soft_toys_sponsored_enhanced.csv'")
+            if df is not None:
+                # Verify all products are sponsored
+                print(f"\n🔍 Verification: All {len(df)} products are sponsored: {df['sponsored'].all()}")
             
-            # Display summary
-            print("\n📊 Enhanced Scraping Summary (SPONSORED PRODUCTS ONLY):")
-            print(f"Total sponsored products: {len(products)}")
-            print(f"Products with ratings: {len(df[df['rating'] > 0])}")
-            print(f"Products with reviews: {len(df[df['reviews'] > 0])}")
-            print(f"Products with prices: {len(df[df['price'] > 0])}")
-            print(f"Products with valid brands: {len(df[df['brand'] != 'Generic'])}")
-            print(f"Brand extraction success rate: {len(df[df['brand'] != 'Generic'])/len(df)*100:.1f}%")
+                # Brand analysis
+                unique_brands = df['brand'].nunique()
+                brand_counts = df['brand'].value_counts()
             
-            # Show sample data
-            print("\n📋 Sample Enhanced Sponsored Products Data:")
-            print(df[['title', 'brand', 'rating', 'reviews', 'price', 'sponsored']].head(10))
+                print(f"\n🏷️  Brand Analysis:")
+                print(f"   • Total Unique Brands Found: {unique_brands}")
+                print(f"   • Top 10 Brands:")
+                for i, (brand, count) in enumerate(brand_counts.head(10).items(), 1):
+                    print(f"     {i:2d}. {brand:<20} : {count:3d} products")
             
-        else:
-            print("❌ No sponsored products were found and scraped.")
+                if args.image_cache:
+                    # Same picture under several brands usually means one generic product from several sellers
+                    image_cache = ImageCache(args.image_cache)
+                    try:
+                        df = add_image_groups(df, image_cache)
+                    finally:
+                        image_cache.close()
+                    print(f"🖼️  {df['image_group'].nunique()} distinct pictures among {df['image_hash'].notna().sum()} hashed images")
+            
+                # Save to CSV (again, when image columns were added to the journal's export)
+                if not exported or args.image_cache:
+                    df.to_csv(output_csv, index=False)
+                print(f"\n✅ Saved {len(df)} SPONSORED products to '{output_csv}'")
+                if not args.no_parquet:
+                    rows = write_products(df, args.parquet_dir, keyword=args.keyword, category=DEFAULT_CATEGORY,
+                                          scrape_date=scrape_date)
+                    print(f"✅ Wrote {rows} products to Parquet store '{args.parquet_dir}'")
+                if args.brand_stats:
+                    brand_stats = BrandStatsStore(args.brand_stats)
+                    try:
+                        # Each run is the day's batch for its keyword(s); re-running a day replaces it
+                        batches = df.groupby('keyword') if 'keyword' in df else [(args.keyword, df)]
+                        for keyword, batch in batches:
+                            brand_stats.fold(batch, scrape_date, keyword=keyword, replace=True)
+                    finally:
+                        brand_stats.close()
+                    print(f"✅ Folded brand statistics into '{args.brand_stats}'")
+            
+                # Display summary
+                print("\n📊 Enhanced Scraping Summary (SPONSORED PRODUCTS ONLY):")
+                print(f"Total sponsored products: {len(df)}")
+                print(f"Products with ratings: {len(df[df['rating'] > 0])}")
+                print(f"Products with reviews: {len(df[df['reviews'] > 0])}")
+                print(f"Products with prices: {len(df[df['price'] > 0])}")
+                print(f"Products with valid brands: {len(df[df['brand'] != 'Generic'])}")
+                print(f"Brand extraction success rate: {len(df[df['brand'] != 'Generic'])/len(df)*100:.1f}%")
+            
+                # Show sample data
+                print("\n📋 Sample Enhanced Sponsored Products Data:")
+                print(df[['title', 'brand', 'rating', 'reviews', 'price', 'sponsored']].head(10))
+            
+            else:
+                print("❌ No sponsored products were found and scraped.")
             
     except Exception as e:
         print(f"❌ Error during scraping: {e}")
         
     finally:
         scraper.close()
+        if journal is not None:
+            journal.close()
+        if asin_index is not None:
+            asin_index.close()
+        if page_cache is not None:
+            page_cache.close()
+        if selector_stats is not None:
+            selector_stats.close()
+        metrics.print_profile()
+        metrics.close()
         print("\n🔚 Enhanced scraping completed!")
@@ -0,0 +1,143 @@
+import argparse
+import sqlite3
+import threading
+from collections import defaultdict
+
+
+class SelectorStats:
+    """Persistent per-field selector hit counts that reorder and prune fallback selector chains
+
+    A selector whose last `window` tries all missed is moved behind the rest of its chain, as long as another
+    selector of that chain still hits (a field that is simply absent prunes nothing). Pruned selectors are
+    then only tried when every other selector misses, so a layout change that leaves one of them as the only
+    match is noticed on the next lookup: its hit ends the miss streak and restores it. Chains whose outcome
+    does not depend on which selector matches (any match means yes) are also tried best hit rate first.
+    Chains that read a value keep their declared precedence: a fallback's hit rate is only measured where
+    the selectors before it missed, and promoting it would read a different element on every other product.
+    """
+
+    def __init__(self, path='selector_stats.sqlite3', window=200, refresh=25):
+        self.path = path
+        self.window = window
+        self.refresh = refresh
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS selector_hits (
+                field TEXT NOT NULL,
+                selector TEXT NOT NULL,
+                tried INTEGER NOT NULL,
+                hits INTEGER NOT NULL,
+                miss_streak INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (field, selector)
+            );
+        ''')
+        columns = {name for _, name, *_ in self.conn.execute('PRAGMA table_info(selector_hits)')}
+        if 'miss_streak' not in columns:
+            # Stores from before miss streaks: a selector that never hit has missed every try so far
+            self.conn.execute('ALTER TABLE selector_hits ADD COLUMN miss_streak INTEGER NOT NULL DEFAULT 0')
+            self.conn.execute('UPDATE selector_hits SET miss_streak = tried WHERE hits = 0')
+        self.conn.commit()
+
+        # (field, selector) -> [tried, hits, tries since the last hit]; `pending` holds the tried/hits this run
+        # added since the last flush (streaks are written as they stand)
+        self.counts = defaultdict(lambda: [0, 0, 0])
+        for field, selector, tried, hits, miss_streak in self.conn.execute(
+                'SELECT field, selector, tried, hits, miss_streak FROM selector_hits'):
+            self.counts[field, selector] = [tried, hits, miss_streak]
+        self.pending = defaultdict(lambda: [0, 0])
+        self._orders = {}  # field -> (selectors, ordered chain, observations left before re-ranking)
+        self._lock = threading.Lock()
+
+    def hit_rate(self, field, selector):
+        """Smoothed hits / tries, so one lucky hit does not outrank a long record (untried selectors rate 0.5)"""
+        tried, hits, _ = self.counts.get((field, selector), (0, 0, 0))
+        return (hits + 1) / (tried + 2)
+
+    def _missing(self, field, selector):
+        """True when the selector's last `window` tries all missed"""
+        return self.counts.get((field, selector), (0, 0, 0))[2] >= self.window
+
+    def is_pruned(self, field, selector, selectors):
+        if not self._missing(field, selector):
+            return False
+        # Only while another selector of the chain is still hitting
+        return any(self.counts.get((field, other), (0, 0, 0))[1] and not self._missing(field, other)
+                   for other in selectors)
+
+    def order(self, field, selectors, by_hit_rate=False):
+        """The chain to try for a field: pruned selectors last, and with by_hit_rate best observed rate first (ties as declared)"""
+        with self._lock:
+            cached = self._orders.get(field)
+            if cached is not None and cached[0] is selectors and cached[2] > 0:
+                return cached[1]
+            ranked = sorted(selectors, key=lambda selector: -self.hit_rate(field, selector)) if by_hit_rate else selectors
+            pruned = [selector for selector in ranked if self.is_pruned(field, selector, selectors)]
+            chain = [selector for selector in ranked if selector not in pruned] + pruned
+            self._orders[field] = (selectors, chain, self.refresh)
+            return chain
+
+    def record(self, field, chain, hit):
+        """One lookup of a field: every selector of the chain up to position `hit` (or all of it, if None) was tried"""
+        tried = chain if hit is None else chain[:hit + 1]
+        with self._lock:
+            for selector in tried:
+                self.counts[field, selector][0] += 1
+                self.counts[field, selector][2] += 1
+                self.pending[field, selector][0] += 1
+            restored = False
+            if hit is not None:
+                counts = self.counts[field, chain[hit]]
+                restored = counts[2] > self.window  # a pruned selector matched again
+                counts[1] += 1
+                counts[2] = 0
+                self.pending[field, chain[hit]][1] += 1
+            cached = self._orders.get(field)
+            if cached is not None:
+                self._orders[field] = (cached[0], cached[1], 0 if restored else cached[2] - 1)
+
+    def flush(self):
+        """Add this run's new observations to the store (safe with several scrapers sharing the file)"""
+        with self._lock:
+            rows = [(field, selector, tried, hits, self.counts[field, selector][2])
+                    for (field, selector), (tried, hits) in self.pending.items()]
+            self.pending.clear()
+        with self.conn:
+            self.conn.executemany('''
+                INSERT INTO selector_hits (field, selector, tried, hits, miss_streak) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (field, selector) DO UPDATE SET
+                    tried = tried + excluded.tried,
+                    hits = hits + excluded.hits,
+                    miss_streak = excluded.miss_streak
+            ''', rows)
+
+    def summary(self):
+        """[(field, selector, tried, hits, pruned)] per field, best hit rate first"""
+        fields = defaultdict(list)
+        for field, selector in sorted(self.counts):
+            fields[field].append(selector)
+        rows = []
+        for field, selectors in fields.items():
+            for selector in sorted(selectors, key=lambda selector: -self.hit_rate(field, selector)):
+                tried, hits, _ = self.counts[field, selector]
+                rows.append((field, selector, tried, hits, self.is_pruned(field, selector, selectors)))
+        return rows
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the learned selector order per field")
+    parser.add_argument('store', nargs='?', default="selector_stats.sqlite3")
+    parser.add_argument('--window', type=int, default=200, help="tries in a row without a hit before a selector is pruned")
+    args = parser.parse_args()
+
+    stats = SelectorStats(args.store, window=args.window)
+    try:
+        for field, selector, tried, hits, pruned in stats.summary():
+            rate = f"{hits / tried * 100:5.1f}%" if tried else "    -"
+            print(f"{field:<16} {selector[:50]:<50} {tried:>8} {hits:>8} {rate}{'  (pruned)' if pruned else ''}")
+    finally:
+        stats.close()
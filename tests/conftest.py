@@ -0,0 +1,11 @@
+import pytest
+
+from fetchers import PageFetcher
+from instrumentation import Instrumentation
+from scrape_data import AdvancedAmazonScraper
+
+
+@pytest.fixture
+def scraper():
+    """An offline scraper: it fetches nothing, but extracts and counts like a real crawl"""
+    return AdvancedAmazonScraper(fetcher=PageFetcher(), metrics=Instrumentation(quiet=True))
@@ -0,0 +1,41 @@
+import os
+
+import pandas as pd
+import pytest
+
+from brand_stats import BrandStatsStore
+from data_cleaning import drop_duplicate_products
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BrandStatsStore(str(tmp_path / 'brand_stats.sqlite3'))
+    try:
+        yield store
+    finally:
+        store.close()
+
+
+@pytest.fixture
+def products():
+    # The notebook's input once its duplicate removal has run
+    return drop_duplicate_products(pd.read_csv(os.path.join(REPO_DIR, 'amazon_soft_toys_brands_fixed.csv')))
+
+
+def _assert_notebook_summary(summary):
+    expected = pd.read_csv(os.path.join(REPO_DIR, 'brand_performance_summary.csv'), index_col='brand')
+    # Brands with the same market share may come in any order
+    pd.testing.assert_frame_equal(summary.sort_index(), expected.sort_index(), check_dtype=False, check_names=False)
+
+
+def test_summary_matches_the_notebook(store, products):
+    store.fold(products, '2024-05-01', 'soft toys')
+    _assert_notebook_summary(store.summary())
+
+
+def test_folding_page_by_page_gives_the_same_summary(store, products):
+    for start in range(0, len(products), 16):
+        store.fold(products.iloc[start:start + 16], '2024-05-01', 'soft toys', replace=start == 0)
+    _assert_notebook_summary(store.summary())
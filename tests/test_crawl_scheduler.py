@@ -0,0 +1,164 @@
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from crawl_scheduler import AdaptiveRateLimiter, CrawlScheduler, classify_page
+from fetchers import FetchedPage, PageJob
+from fixture_server import FixtureRequestHandler, start_fixture_server
+from instrumentation import Instrumentation
+from page_journal import PageJournal
+from scrape_data import AdvancedAmazonScraper
+
+NO_RESULTS_PAGE = b'<html><head><title>Amazon.in : soft toys</title></head><body>No results for soft toys.</body></html>'
+
+
+class EndsAfterPageTwo(FixtureRequestHandler):
+    """The saved pages, except that the results run out after page 2"""
+
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query).get('page', ['1'])[0])
+        if page > 2:
+            self.server.hits[('soft toys', page)] += 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(NO_RESULTS_PAGE)))
+            self.end_headers()
+            self.wfile.write(NO_RESULTS_PAGE)
+            return
+        super().do_GET()
+
+
+def _page(html, title='Amazon.in : soft toys', status=200):
+    return FetchedPage(PageJob('soft toys', 3, 'https://www.amazon.in/s?k=soft+toys&page=3'), html=html, title=title,
+                       status=status)
+
+
+@pytest.mark.parametrize('html, outcome', [
+    (NO_RESULTS_PAGE.decode(), 'empty'),
+    ('', 'blocked'),
+    ('<html><body>To discuss automated access to Amazon data please contact '
+     'api-services-support@amazon.com.</body></html>', 'blocked'),
+])
+def test_pages_without_results(html, outcome):
+    assert classify_page(_page(html)) == outcome
+
+
+@pytest.fixture
+def short_site():
+    server, base_url = start_fixture_server(handler=EndsAfterPageTwo)
+    try:
+        yield server, base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _fast_scraper(base_url, limiter=None):
+    limiter = limiter or AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=10, base_backoff=0.01)
+    return AdvancedAmazonScraper(base_url=base_url, backend='http', rate_limiter=limiter,
+                                 metrics=Instrumentation(quiet=True))
+
+
+def test_end_of_results_stops_the_search_without_slowing_down(short_site):
+    server, base_url = short_site
+    limiter = AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=10, base_backoff=0.01)
+    scraper = _fast_scraper(base_url, limiter)
+    try:
+        pages = list(scraper.iter_product_pages(scraper.build_page_jobs('soft toys', range(1, 6))))
+        assert sorted(job.page for job, _ in pages) == [1, 2]
+        assert scraper.scheduler.last_pages == {'soft toys': 2}
+        # No retries and no backoff: an empty results page is the end of the search, not a block
+        assert limiter.blocks == 0 and scraper.scheduler.stats()['retries'] == 0
+        assert all(server.hits[('soft toys', page)] <= 1 for page in (3, 4, 5))
+        assert scraper.scheduler.failed == []
+    finally:
+        scraper.close()
+
+
+def test_resume_skips_pages_past_the_journaled_end(short_site, tmp_path):
+    server, base_url = short_site
+    journal = PageJournal(str(tmp_path / 'journal.sqlite3'))
+    try:
+        for _ in range(2):
+            scraper = _fast_scraper(base_url)
+            try:
+                pages = scraper.iter_product_pages(scraper.build_page_jobs('soft toys', range(1, 6)), journal)
+                assert sorted(job.page for job, _ in pages) == [1, 2]
+            finally:
+                scraper.close()
+        assert journal.last_page('soft toys') == 2
+    finally:
+        journal.close()
+    # The first run found the end at page 3; the resumed run requested nothing at all
+    assert server.hits[('soft toys', 3)] == 1
+    assert sum(server.hits.values()) <= 5
+
+
+def test_limiter_halves_on_blocks_and_recovers_additively():
+    limiter = AdaptiveRateLimiter(initial_rate=1.0, min_rate=0.2, max_rate=1.0, increase=0.25, base_backoff=0.05)
+    limiter.record_block()
+    assert limiter.rate == 0.5
+    first_pause = limiter.blocked_until - time.monotonic()
+    limiter.record_block()
+    limiter.record_block()
+    # Halving stops at min_rate; each consecutive block doubles the shared pause
+    assert limiter.rate == 0.2
+    assert 0.15 < limiter.blocked_until - time.monotonic() <= 0.2 and first_pause <= 0.05
+
+    for expected in (0.45, 0.7, 0.95, 1.0, 1.0):
+        limiter.record_success()
+        assert limiter.rate == pytest.approx(expected)
+    assert limiter.consecutive_blocks == 0
+
+
+def test_limiter_pause_holds_back_requests():
+    limiter = AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=10, base_backoff=0.2)
+    limiter.record_block()
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def _scheduler_jobs(pages):
+    return [PageJob('soft toys', page, f"https://www.amazon.in/s?k=soft+toys&page={page}") for page in pages]
+
+
+def test_scheduler_requeues_until_max_retries():
+    job, = _scheduler_jobs([1])
+    scheduler = CrawlScheduler([job], AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, base_backoff=0.001),
+                               max_retries=2)
+    for _ in range(2):
+        assert scheduler.get() is job
+        assert scheduler.report(job, 'throttled') is False
+    assert scheduler.get() is job
+    assert scheduler.report(job, 'throttled') is True
+    assert scheduler.failed == [job] and scheduler.retry_counts[job] == 2
+    assert scheduler.get() is None
+
+
+def test_scheduler_does_not_retry_final_failures():
+    job, = _scheduler_jobs([1])
+    scheduler = CrawlScheduler([job], AdaptiveRateLimiter(initial_rate=1000, max_rate=1000))
+    assert scheduler.get() is job
+    assert scheduler.report(job, 'missing') is True
+    assert scheduler.failed == [job] and scheduler.limiter.blocks == 0
+    assert scheduler.get() is None
+
+
+def test_scheduler_handles_pages_finishing_out_of_order():
+    jobs = _scheduler_jobs(range(1, 7))
+    scheduler = CrawlScheduler(jobs, AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=10))
+    in_flight = [scheduler.get() for _ in range(4)]
+    assert [job.page for job in in_flight] == [1, 2, 3, 4]
+
+    # Page 4 answers first and is blocked, then page 2 reveals that the search ends at page 2
+    assert scheduler.report(jobs[3], 'captcha') is False
+    assert scheduler.report(jobs[1], None) is True
+    assert scheduler.stop_after('soft toys', 2) == 3  # pages 5 and 6, and the retry of page 4
+    # Page 3 was already in flight: it fails past the end, so it is neither retried nor reported missing
+    assert scheduler.is_beyond_end(jobs[2])
+    assert scheduler.report(jobs[2], 'timeout') is True
+    assert scheduler.report(jobs[0], None) is True
+    assert scheduler.get() is None
+    assert scheduler.failed == [] and scheduler.skipped['soft toys'] == 3
@@ -0,0 +1,113 @@
+import os
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from crawl_scheduler import AdaptiveRateLimiter, CrawlScheduler
+from fetchers import HttpFetcher, PageJob
+from fixture_server import FIXTURE_DIR, FixtureRequestHandler, fixture_filename, start_fixture_server
+from instrumentation import Instrumentation
+from scrape_data import AdvancedAmazonScraper
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server, url = start_fixture_server()
+    try:
+        yield url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _limiter():
+    # No pacing against a local server, and blocks back off for milliseconds instead of seconds
+    return AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=10, base_backoff=0.01)
+
+
+def _jobs(base_url, pages):
+    return [PageJob('soft toys', page, f"{base_url}/s?k=soft+toys&page={page}") for page in pages]
+
+
+def _page_size(page):
+    return os.path.getsize(os.path.join(FIXTURE_DIR, fixture_filename('soft toys', page)))
+
+
+def test_transfer_counts_match_the_served_pages(base_url):
+    fetched = list(HttpFetcher().fetch_pages(CrawlScheduler(_jobs(base_url, range(1, 6)), _limiter())))
+    assert sorted(page.job.page for page in fetched) == [1, 2, 3, 4, 5]
+    for page in fetched:
+        # The fixture server sends the saved file as is, so wire and document sizes are both the file size
+        assert page.transfer == {'transfer_bytes': _page_size(page.job.page),
+                                 'document_bytes': _page_size(page.job.page), 'resources': 0}
+
+
+def test_crawl_totals_the_transfer_counts(base_url):
+    metrics = Instrumentation(quiet=True)
+    scraper = AdvancedAmazonScraper(base_url=base_url, backend='http', rate_limiter=_limiter(), metrics=metrics)
+    try:
+        list(scraper.iter_product_pages(scraper.build_page_jobs('soft toys', range(1, 6))))
+    finally:
+        scraper.close()
+    total = sum(_page_size(page) for page in range(1, 6))
+    assert metrics.counters['transfer_bytes'] == metrics.counters['document_bytes'] == total
+
+
+CAPTCHA_PAGE = b'<html><head><title>Robot Check</title></head><body>Type the characters you see.</body></html>'
+
+
+class FlakyHandler(FixtureRequestHandler):
+    """The saved pages, but page 2 is a CAPTCHA for its first two requests, page 3 always is, page 1 is slow"""
+
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query).get('page', ['1'])[0])
+        if page == 1:
+            time.sleep(0.3)
+        requests = self.server.hits[('soft toys', page)] + 1
+        if page == 3 or (page == 2 and requests <= 2):
+            self.server.hits[('soft toys', page)] += 1
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(CAPTCHA_PAGE)))
+            self.end_headers()
+            self.wfile.write(CAPTCHA_PAGE)
+            return
+        super().do_GET()
+
+
+@pytest.fixture
+def flaky_site():
+    server, url = start_fixture_server(handler=FlakyHandler)
+    try:
+        yield server, url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_blocked_pages_are_retried_until_they_succeed_or_run_out(flaky_site):
+    server, base_url = flaky_site
+    limiter = _limiter()
+    scheduler = CrawlScheduler(_jobs(base_url, range(1, 5)), limiter, max_retries=2)
+    fetched = {page.job.page: page for page in HttpFetcher().fetch_pages(scheduler)}
+
+    # Each page is yielded once, when it is final
+    assert sorted(fetched) == [1, 2, 3, 4]
+    # Two CAPTCHAs, then the real page
+    assert fetched[2].outcome is None and fetched[2].html.count('data-component-type="s-search-result"') > 0
+    assert server.hits[('soft toys', 2)] == 3
+    # A page that stays blocked is given up after the first attempt and max_retries more
+    assert fetched[3].outcome == 'captcha' and "gave up after 3 attempts" in fetched[3].error
+    assert server.hits[('soft toys', 3)] == 3
+    assert [job.page for job in scheduler.failed] == [3]
+    # Every CAPTCHA slowed the crawl down, the last one of page 3 included
+    assert limiter.blocks == 5 and scheduler.stats()['retries'] == 4
+
+
+def test_pages_are_yielded_as_they_arrive(flaky_site):
+    server, base_url = flaky_site
+    scheduler = CrawlScheduler(_jobs(base_url, [1, 4, 5]), _limiter())
+    order = [page.job.page for page in HttpFetcher(concurrency=3).fetch_pages(scheduler)]
+    # The slow first page does not hold back the pages requested after it
+    assert sorted(order) == [1, 4, 5] and order[-1] == 1
@@ -0,0 +1,146 @@
+import io
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image, ImageEnhance, ImageFilter
+
+from image_dedup import ImageCache, _popcount, add_image_groups, brand_image_summary, near_duplicate_pairs
+from parquet_store import read_products, write_products
+
+
+def _picture(seed):
+    """A smooth random picture, like a product photo as far as a 9x8 difference hash is concerned"""
+    cells = np.random.default_rng(seed).integers(0, 256, (8, 9, 3), dtype=np.uint8)
+    return Image.fromarray(cells).resize((360, 320), Image.BICUBIC).filter(ImageFilter.GaussianBlur(4))
+
+
+def _jpeg(image, quality=90):
+    body = io.BytesIO()
+    image.save(body, 'JPEG', quality=quality)
+    return body.getvalue()
+
+
+@pytest.fixture
+def image_server():
+    """Serve {path: body} locally, 404 for anything else; yields (images, base_url, request counts per path)"""
+    images = {}
+    requests = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests[self.path] += 1
+            body = images.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield images, f"http://127.0.0.1:{server.server_address[1]}", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_variants_of_one_picture_share_a_group(image_server, tmp_path):
+    images, base_url, requests = image_server
+    photo = _picture(1)
+    images.update({
+        '/original.jpg': _jpeg(photo),
+        '/resized.jpg': _jpeg(photo.resize((180, 160))),
+        '/recompressed.jpg': _jpeg(photo, quality=25),
+        '/brightened.jpg': _jpeg(ImageEnhance.Brightness(photo).enhance(1.3)),
+        '/other.jpg': _jpeg(_picture(2)),
+    })
+    paths = list(images) + ['/missing.jpg']
+    df = pd.DataFrame({
+        'title': [path.strip('/') for path in paths],
+        'brand': ['ADORA', 'Babique', 'AVSHUB', 'Madhubala', 'ADORA', 'ADORA'],
+        'image_url': [base_url + path for path in paths],
+    })
+
+    cache = ImageCache(str(tmp_path / 'images'))
+    try:
+        grouped = add_image_groups(df, cache).set_index('title')
+        assert grouped.loc[['original.jpg', 'resized.jpg', 'recompressed.jpg', 'brightened.jpg'], 'image_group'].nunique() == 1
+        assert grouped.loc['other.jpg', 'image_group'] != grouped.loc['original.jpg', 'image_group']
+        assert pd.isna(grouped.loc['missing.jpg', 'image_group'])
+        assert pd.isna(grouped.loc['missing.jpg', 'image_hash'])
+        status, = cache.conn.execute('SELECT status FROM images WHERE url = ?', (base_url + '/missing.jpg',)).fetchone()
+        assert status == 'HTTP 404'
+        assert set(requests.values()) == {1}
+    finally:
+        cache.close()
+
+    # A rerun downloads nothing again, and the 404 is not retried unless asked to
+    cache = ImageCache(str(tmp_path / 'images'))
+    try:
+        assert add_image_groups(df, cache)['image_group'].equals(grouped.reset_index()['image_group'])
+        assert set(requests.values()) == {1}
+        add_image_groups(df, cache, retry_failed=True)
+        assert requests['/missing.jpg'] == 2 and requests['/original.jpg'] == 1
+    finally:
+        cache.close()
+
+
+def _brute_force_pairs(hashes, max_distance):
+    distances = _popcount(hashes[:, None] ^ hashes[None, :])
+    i, j = np.nonzero(np.triu(distances <= max_distance, k=1))
+    return np.stack([i, j], axis=1)
+
+
+@pytest.mark.parametrize('max_distance', [0, 1, 6, 10])
+def test_near_duplicate_pairs_match_brute_force(max_distance):
+    rng = np.random.default_rng(max_distance)
+    hashes = rng.integers(0, 2 ** 63, 600, dtype=np.uint64) << np.uint64(1) | rng.integers(0, 2, 600, dtype=np.uint64)
+    # Plant near-duplicates (and exact repeats) at every distance up to just past the cut-off
+    planted = []
+    for source in rng.choice(len(hashes), 200):
+        flips = rng.choice(64, rng.integers(0, max_distance + 3), replace=False)
+        mask = np.bitwise_or.reduce(np.uint64(1) << flips.astype(np.uint64), initial=np.uint64(0))
+        planted.append(hashes[source] ^ mask)
+    hashes = np.concatenate([hashes, np.array(planted, dtype=np.uint64)])
+
+    expected = _brute_force_pairs(hashes, max_distance)
+    assert len(expected) > 0
+    np.testing.assert_array_equal(near_duplicate_pairs(hashes, max_distance), expected)
+
+
+def _grouped_products():
+    return pd.DataFrame({
+        'title': ['Teddy', 'Teddy XL', 'Plush teddy', 'Unicorn', 'Bunny'],
+        'brand': ['ADORA', 'ADORA', 'Babique', 'ADORA', 'Babique'],
+        'rating': [4.1, 4.3, 3.9, 4.6, 0.0],
+        'reviews': [120, 35, 8, 410, 0],
+        'price': [299, 399, 279, 499, 199],
+        'image_url': [f"https://m.media-amazon.com/images/I/{i}.jpg" for i in range(5)],
+        'image_hash': ['00ff00ff00ff00ff', '00ff00ff00ff00fe', '00ff00ff00ff00ff', 'ffff0000ffff0000', None],
+        'image_group': pd.array([0, 0, 0, 1, None], dtype='Int64'),
+    })
+
+
+def test_brand_image_summary_counts_distinct_and_shared_pictures():
+    summary = brand_image_summary(_grouped_products())
+    assert summary.loc['ADORA'].tolist() == [3, 2, 1]
+    assert summary.loc['Babique'].tolist() == [1, 1, 1]
+
+
+def test_image_groups_survive_the_parquet_store(tmp_path):
+    write_products(_grouped_products(), str(tmp_path), keyword='soft toys', scrape_date='2024-05-01')
+    stored = read_products(str(tmp_path), columns=['title', 'image_hash', 'image_group']).set_index('title')
+    assert stored.loc['Teddy XL', 'image_hash'] == '00ff00ff00ff00fe'
+    assert stored['image_group'].tolist()[:4] == [0, 0, 0, 1]
+    assert pd.isna(stored.loc['Bunny', 'image_group'])
@@ -0,0 +1,24 @@
+from fetchers import FetchedPage, PageJob
+from page_cache import PageCache
+
+
+def _page(page, html):
+    job = PageJob('soft toys', page, f"https://www.amazon.in/s?k=soft+toys&page={page}")
+    return FetchedPage(job, html=html, title='soft toys', status=200)
+
+
+def test_replay_date_is_the_latest_fetch_date(tmp_path):
+    cache = PageCache(str(tmp_path / 'cache'))
+    try:
+        assert cache.latest_fetch_date() is None
+        cache.put(_page(1, '<html>day one, page 1</html>'), '2024-05-01')
+        cache.put(_page(2, '<html>day one, page 2</html>'), '2024-05-01')
+        cache.put(_page(1, '<html>day two, page 1</html>'), '2024-05-02')
+
+        replay_date = cache.latest_fetch_date()
+        assert replay_date == '2024-05-02'
+        # A replay of that date does not mix in page 2 from the day before
+        assert cache.get(_page(1, '').job.url, replay_date)[0] == '<html>day two, page 1</html>'
+        assert cache.get(_page(2, '').job.url, replay_date) is None
+    finally:
+        cache.close()
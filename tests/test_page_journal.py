@@ -0,0 +1,37 @@
+import csv
+
+from page_journal import PageJournal
+
+
+def _product(asin, title):
+    return {'title': title, 'brand': 'ADORA', 'price': 499, 'asin': asin, 'sponsored': True}
+
+
+def test_export_csv_writes_each_listing_once_across_resumed_pages(tmp_path):
+    journal = PageJournal(str(tmp_path / 'journal.sqlite3'))
+    try:
+        journal.record_page('soft toys', 1, [_product('B0A', 'Teddy bear'), _product('B0B', 'Plush unicorn')])
+        journal.record_page('soft toys', 2, [_product('B0B', 'Plush unicorn'), _product('B0C', 'Bunny')])
+        journal.record_page('teddy bear', 1, [_product('B0A', 'Teddy bear')])
+
+        path = tmp_path / 'products.csv'
+        assert journal.export_csv(str(path), 'soft toys') == 3
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert [row['asin'] for row in rows] == ['B0A', 'B0B', 'B0C']
+        assert journal.completed_pages('soft toys') == {1, 2}
+    finally:
+        journal.close()
+
+
+def test_earliest_search_end_is_kept(tmp_path):
+    journal = PageJournal(str(tmp_path / 'journal.sqlite3'))
+    try:
+        assert journal.last_page('soft toys') is None
+        journal.record_end('soft toys', 7, "pagination ends at page 7")
+        journal.record_end('soft toys', 4, "no results")
+        journal.record_end('soft toys', 6, "page 7 repeats page 6")
+        assert journal.last_page('soft toys') == 4
+        assert journal.last_page('teddy bear') is None
+    finally:
+        journal.close()
@@ -0,0 +1,24 @@
+import os
+
+import pandas as pd
+
+from parquet_store import read_products, write_products
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXED_CSV = os.path.join(REPO_DIR, 'amazon_soft_toys_brands_fixed.csv')
+
+
+def test_ratings_round_trip_exactly(tmp_path):
+    df = pd.DataFrame({
+        'title': ['Teddy', 'Unicorn', 'Bunny'], 'brand': ['ADORA', 'Babique', 'QTM'],
+        'rating': [4.6, 3.9, 0.0], 'reviews': [120, 8, 0], 'price': [299, 499, 199],
+    })
+    write_products(df, str(tmp_path), keyword='soft toys', scrape_date='2024-05-01')
+    assert read_products(str(tmp_path), columns=['rating'])['rating'].tolist() == [4.6, 3.9, 0.0]
+
+
+def test_read_products_loads_only_the_requested_columns(tmp_path):
+    write_products(pd.read_csv(FIXED_CSV), str(tmp_path), keyword='soft toys', scrape_date='2024-05-01')
+    df = read_products(str(tmp_path), columns=['title', 'rating', 'price'])
+    assert list(df.columns) == ['title', 'rating', 'price']
+    assert set(df['rating'].round(1)) == set(df['rating'])
@@ -0,0 +1,124 @@
+import asyncio
+import csv
+import time
+
+import pyarrow.dataset as ds
+import pytest
+
+from crawl_scheduler import AdaptiveRateLimiter
+from fixture_server import start_fixture_server
+from instrumentation import Instrumentation
+from page_journal import PageJournal
+from product_stream import CsvSink, ParquetSink, aiter_products, stream_to
+from scrape_data import AdvancedAmazonScraper
+
+
+@pytest.fixture(scope='module')
+def site():
+    server, url = start_fixture_server()
+    try:
+        yield server, url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def base_url(site):
+    return site[1]
+
+
+def _paced_scraper(base_url):
+    # Five requests a second, one at a time: a crawl that is stopped after its first page cannot have
+    # requested more than the next one
+    rate_limiter = AdaptiveRateLimiter(initial_rate=5, max_rate=5, burst=1)
+    return AdvancedAmazonScraper(base_url=base_url, backend='http', rate_limiter=rate_limiter,
+                                 metrics=Instrumentation(quiet=True))
+
+
+def _stream(base_url, out_dir, pages, journal=None):
+    """Stream a crawl of the saved pages into a CSV and a Parquet store under out_dir"""
+    # No pacing against a local server
+    rate_limiter = AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, burst=10)
+    scraper = AdvancedAmazonScraper(base_url=base_url, backend='http', rate_limiter=rate_limiter,
+                                    metrics=Instrumentation(quiet=True))
+    try:
+        jobs = scraper.build_page_jobs('soft toys', range(1, pages + 1))
+        sinks = [CsvSink(str(out_dir / 'products.csv')), ParquetSink(str(out_dir / 'parquet'))]
+        return stream_to(scraper.iter_product_pages(jobs, journal), sinks)
+    finally:
+        scraper.close()
+
+
+def _csv_asins(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return sorted(row['asin'] for row in csv.DictReader(f))
+
+
+def test_resumed_stream_writes_the_whole_crawl(base_url, tmp_path):
+    fresh, resumed = tmp_path / 'fresh', tmp_path / 'resumed'
+    fresh.mkdir()
+    resumed.mkdir()
+    total = _stream(base_url, fresh, 5)
+
+    journal = PageJournal(str(tmp_path / 'journal.sqlite3'))
+    try:
+        assert _stream(base_url, resumed, 3, journal) < total
+        # The restart fetches only pages 4 and 5; pages 1-3 reach the sinks from the journal
+        assert _stream(base_url, resumed, 5, journal) == total
+        assert journal.completed_pages('soft toys') == {1, 2, 3, 4, 5}
+    finally:
+        journal.close()
+
+    assert _csv_asins(resumed / 'products.csv') == _csv_asins(fresh / 'products.csv')
+    assert ds.dataset(str(resumed / 'parquet'), partitioning='hive').count_rows() == total
+
+
+def test_resumed_stream_replays_only_the_requested_pages(base_url, tmp_path):
+    fresh, resumed = tmp_path / 'fresh', tmp_path / 'resumed'
+    fresh.mkdir()
+    resumed.mkdir()
+    total = _stream(base_url, fresh, 3)
+
+    journal = PageJournal(str(tmp_path / 'journal.sqlite3'))
+    try:
+        _stream(base_url, resumed, 5, journal)
+        # Every page is journaled already; a shorter run must not pick up pages 4 and 5 from the journal
+        assert _stream(base_url, resumed, 3, journal) == total
+    finally:
+        journal.close()
+
+    assert _csv_asins(resumed / 'products.csv') == _csv_asins(fresh / 'products.csv')
+
+
+def test_closing_the_page_stream_stops_the_crawl(site):
+    server, base_url = site
+    server.hits.clear()
+    scraper = _paced_scraper(base_url)
+    try:
+        pages = scraper.iter_product_pages(scraper.build_page_jobs('soft toys', range(1, 6)))
+        next(pages)
+        pages.close()
+        time.sleep(1)
+    finally:
+        scraper.close()
+    assert 1 <= sum(server.hits.values()) <= 2
+
+
+def test_leaving_the_async_stream_stops_the_crawl(site):
+    server, base_url = site
+    server.hits.clear()
+    scraper = _paced_scraper(base_url)
+
+    async def first_product():
+        products = aiter_products(scraper, 'soft toys', max_pages=5, buffer=1)
+        async for product in products:
+            await products.aclose()
+            return product
+
+    try:
+        assert asyncio.run(first_product())
+        time.sleep(1)
+    finally:
+        scraper.close()
+    assert 1 <= sum(server.hits.values()) <= 2
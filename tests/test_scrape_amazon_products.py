@@ -0,0 +1,10 @@
+from page_journal import PageJournal
+
+
+def test_no_pages_gives_no_products(scraper, tmp_path):
+    journal = PageJournal(str(tmp_path / 'journal.sqlite3'))
+    try:
+        assert list(scraper.scrape_amazon_products('soft toys', max_pages=0, journal=journal)) == []
+        assert scraper.scrape_amazon_products('soft toys', max_pages=0) == []
+    finally:
+        journal.close()
@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from selector_stats import SelectorStats
+
+SELECTORS = ['.a-price-old', '.a-price .a-offscreen', '.a-color-price']
+
+
+@pytest.fixture
+def stats(tmp_path):
+    stats = SelectorStats(str(tmp_path / 'selectors.sqlite3'), window=5, refresh=1)
+    try:
+        yield stats
+    finally:
+        stats.close()
+
+
+def _lookup(stats, matching):
+    """One lookup against a page where only the `matching` selectors find the field; returns the chain tried"""
+    chain = stats.order('price', SELECTORS)
+    hit = next((position for position, selector in enumerate(chain) if selector in matching), None)
+    stats.record('price', chain, hit)
+    return chain if hit is None else chain[:hit + 1]
+
+
+def test_missing_selector_is_tried_last(stats):
+    for _ in range(5):
+        _lookup(stats, {'.a-price .a-offscreen'})
+    assert stats.order('price', SELECTORS) == ['.a-price .a-offscreen', '.a-color-price', '.a-price-old']
+    # While the second selector hits, the pruned one is not tried at all
+    assert _lookup(stats, {'.a-price .a-offscreen'}) == ['.a-price .a-offscreen']
+
+
+def test_pruned_selector_is_restored_after_a_layout_change(stats):
+    for _ in range(5):
+        _lookup(stats, {'.a-price .a-offscreen'})
+    assert stats.is_pruned('price', '.a-price-old', SELECTORS)
+
+    # The layout changes and only the pruned selector still matches: it is probed once the rest miss
+    assert _lookup(stats, {'.a-price-old'})[-1] == '.a-price-old'
+    assert not stats.is_pruned('price', '.a-price-old', SELECTORS)
+    assert stats.order('price', SELECTORS)[0] == '.a-price-old'
+
+
+def test_absent_field_prunes_nothing(stats):
+    for _ in range(20):
+        assert _lookup(stats, set()) == SELECTORS
+    assert not any(stats.is_pruned('price', selector, SELECTORS) for selector in SELECTORS)
+
+
+def test_miss_streaks_persist(tmp_path):
+    path = str(tmp_path / 'selectors.sqlite3')
+    stats = SelectorStats(path, window=5, refresh=1)
+    for _ in range(5):
+        _lookup(stats, {'.a-price .a-offscreen'})
+    stats.close()
+
+    stats = SelectorStats(path, window=5, refresh=1)
+    try:
+        assert stats.is_pruned('price', '.a-price-old', SELECTORS)
+    finally:
+        stats.close()
+
+
+def test_store_without_miss_streaks_is_migrated(tmp_path):
+    path = str(tmp_path / 'selectors.sqlite3')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE selector_hits (field TEXT NOT NULL, selector TEXT NOT NULL, tried INTEGER NOT NULL, '
+                 'hits INTEGER NOT NULL, PRIMARY KEY (field, selector))')
+    conn.executemany('INSERT INTO selector_hits VALUES (?, ?, ?, ?)',
+                     [('price', '.a-price-old', 9, 0), ('price', '.a-price .a-offscreen', 9, 9)])
+    conn.commit()
+    conn.close()
+
+    stats = SelectorStats(path, window=5)
+    try:
+        assert stats.is_pruned('price', '.a-price-old', SELECTORS)
+        assert not stats.is_pruned('price', '.a-price .a-offscreen', SELECTORS)
+    finally:
+        stats.close()
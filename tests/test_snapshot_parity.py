@@ -0,0 +1,49 @@
+import json
+import os
+
+import pytest
+
+from benchmark import load_pages
+from fetchers import FetchedPage
+from fixture_server import FIXTURE_DIR
+from html_extraction import SnapshotExtractor
+
+# Regression snapshot: what the snapshot (lxml) path extracted from the saved search pages when this file was
+# recorded, keyed by fixture file name. It pins the extraction output; it was not produced by the WebDriver path.
+# After an intended extraction change, re-record it with scraper.process_page over load_pages(FIXTURE_DIR).
+EXPECTED_PATH = os.path.join(os.path.dirname(__file__), 'expected', 'snapshot_path_products.json')
+
+with open(EXPECTED_PATH, encoding='utf-8') as f:
+    EXPECTED = json.load(f)
+
+PAGES = load_pages(FIXTURE_DIR)
+
+
+def _page_name(job):
+    return f"{job.keyword.replace(' ', '_')}_page_{job.page}.html"
+
+
+def test_every_fixture_has_expected_products():
+    assert sorted(_page_name(job) for job, _ in PAGES) == sorted(EXPECTED)
+
+
+@pytest.mark.parametrize('job, html', PAGES, ids=[_page_name(job) for job, _ in PAGES])
+def test_snapshot_extraction_matches_recorded_snapshot(scraper, job, html):
+    fetched = FetchedPage(job, html=html, title=job.keyword, status=200)
+    assert scraper.process_page(fetched) == EXPECTED[_page_name(job)]
+
+
+@pytest.mark.parametrize('job, html', PAGES, ids=[_page_name(job) for job, _ in PAGES])
+def test_sponsored_products_carry_every_field(scraper, job, html):
+    extractor = SnapshotExtractor(scraper, scraper.base_url)
+    containers = extractor.parse_containers(html)
+    flags = extractor.sponsored_flags(containers)
+    products = [extractor.extract_comprehensive_product_data(container)
+                for container, sponsored in zip(containers, flags) if sponsored]
+
+    expected = EXPECTED[_page_name(job)]
+    assert products, "a saved search page without sponsored results"
+    # Every recorded product comes from a sponsored container; validation only drops some of them
+    by_asin = {product['asin']: product for product in products}
+    for product in expected:
+        assert by_asin[product['asin']] == product
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from fetchers import PageFetcher
+from html_extraction import SnapshotExtractor
+from instrumentation import Instrumentation
+from scrape_data import AdvancedAmazonScraper
+
+# Real containers from the saved search pages plus hand-written edge cases, each with its data-expected verdict
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'sponsored_containers.html')
+
+
+@pytest.fixture
+def extractor(scraper):
+    return SnapshotExtractor(scraper, scraper.base_url)
+
+
+@pytest.fixture
+def containers(extractor):
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        return extractor.parse_containers(f.read())
+
+
+def test_corpus_covers_both_verdicts(containers):
+    expected = [container.get('data-expected') for container in containers]
+    assert set(expected) == {'sponsored', 'organic'}
+    assert len(containers) > 25  # more than one page's worth, so extract_page_products' cut-off is exercised
+
+
+def test_batched_flags_match_per_container_check(extractor, containers):
+    assert extractor.sponsored_flags(containers) == [extractor.is_sponsored_product(c) for c in containers]
+
+
+def test_flags_match_recorded_verdicts(extractor, containers):
+    flags = extractor.sponsored_flags(containers)
+    for container, sponsored in zip(containers, flags):
+        assert sponsored == (container.get('data-expected') == 'sponsored'), container.get('data-asin')
+
+
+def _page_counts(scraper, extractor, containers):
+    scraper.extract_page_products(extractor, containers, 'soft toys', 1)
+    counters = scraper.metrics.counters
+    return counters['sponsored:sponsored'], counters['sponsored:not sponsored']
+
+
+def test_fallback_counts_each_verdict_once(scraper, extractor, containers, monkeypatch):
+    checked = containers[:25]
+    sponsored = sum(container.get('data-expected') == 'sponsored' for container in checked)
+
+    def broken_flags(page_containers):
+        raise RuntimeError("batched check unavailable")
+
+    monkeypatch.setattr(extractor, 'sponsored_flags', broken_flags)
+    assert _page_counts(scraper, extractor, containers) == (sponsored, len(checked) - sponsored)
+
+
+def test_batched_and_fallback_counts_agree(containers, monkeypatch):
+    batched = AdvancedAmazonScraper(fetcher=PageFetcher(), metrics=Instrumentation(quiet=True))
+    fallback = AdvancedAmazonScraper(fetcher=PageFetcher(), metrics=Instrumentation(quiet=True))
+    fallback_extractor = SnapshotExtractor(fallback, fallback.base_url)
+    monkeypatch.setattr(fallback_extractor, 'sponsored_flags', lambda page_containers: 1 / 0)
+
+    assert (_page_counts(batched, SnapshotExtractor(batched, batched.base_url), containers)
+            == _page_counts(fallback, fallback_extractor, containers))
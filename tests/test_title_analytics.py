@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+import pytest
+
+from parquet_store import write_products
+from title_analytics import analyze_frame, analyze_store, latest_products
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXED_CSV = os.path.join(REPO_DIR, 'amazon_soft_toys_brands_fixed.csv')
+
+# What data_analysis.ipynb prints for amazon_soft_toys_brands_fixed.csv once duplicates are removed
+NOTEBOOK_PRODUCTS = 240
+NOTEBOOK_LIMITS = {'low_price': 399, 'high_price': 799, 'high_reviews': 1740, 'low_reviews': 32}
+NOTEBOOK_COUNTS = {'high_value': 29, 'overpriced': 2, 'unrated_expensive': 36, 'best_seller': 25, 'hidden_gem': 19}
+
+
+def _assert_notebook_numbers(products, limits):
+    assert len(products) == NOTEBOOK_PRODUCTS
+    # The notebook prints its cut-offs rounded to whole rupees / reviews
+    assert {name: round(limits[name]) for name in NOTEBOOK_LIMITS} == NOTEBOOK_LIMITS
+    assert {column: int(products[column].sum()) for column in NOTEBOOK_COUNTS} == NOTEBOOK_COUNTS
+
+
+@pytest.mark.parametrize('workers, chunk_size', [(1, 50000), (2, 100)])
+def test_csv_matches_the_notebook(workers, chunk_size):
+    _assert_notebook_numbers(*analyze_frame(pd.read_csv(FIXED_CSV), chunk_size, workers))
+
+
+def test_daily_history_matches_the_notebook(tmp_path):
+    df = pd.read_csv(FIXED_CSV)
+    for scrape_date in ('2024-05-01', '2024-05-02', '2024-05-03'):
+        write_products(df, str(tmp_path), keyword='soft toys', scrape_date=scrape_date)
+
+    products, limits = analyze_store(str(tmp_path), chunk_size=100, workers=1)
+    _assert_notebook_numbers(products, limits)
+    assert (products['scrape_date'].astype(str) == '2024-05-03').all()
+
+
+def test_keep_duplicates_scores_every_row():
+    df = pd.read_csv(FIXED_CSV)
+    products, limits = analyze_frame(df, workers=1, keep_duplicates=True)
+    assert len(products) == len(df)
+    assert limits['high_reviews'] < NOTEBOOK_LIMITS['high_reviews']
+
+
+def test_latest_products_keeps_each_asins_latest_scrape():
+    df = pd.DataFrame({
+        'asin': ['B01', 'B02', 'B01', 'N/A'],
+        'title': ['Teddy', 'Bunny', 'Teddy', 'Panda'],
+        'brand': ['ADORA', 'ADORA', 'ADORA', 'QTM'],
+        'price': [299, 349, 249, 199],
+        'reviews': [10, 3, 12, 1],
+        'scrape_date': pd.to_datetime(['2024-05-01', '2024-05-01', '2024-05-02', '2024-05-01']),
+    })
+    assert latest_products(df)['price'].tolist() == [349, 249, 199]
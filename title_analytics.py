@@ -0,0 +1,228 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from brand_engine import BrandMatcher
+from data_cleaning import (
+    LEGACY_DUPLICATE_KEY, assign_brands, clean_price, clean_products, clean_rating, clean_reviews,
+    drop_duplicate_products, soft_toy_mask, zero_unrated_reviews
+)
+from parquet_store import iter_product_frames, read_products
+
+# The notebook's product criteria; quantiles are taken over the whole dataset, not per shard
+HIGH_VALUE_RATING = 4.0
+LOW_PRICE_QUANTILE = 0.25
+OVERPRICED_PRICE_QUANTILE = 0.75
+OVERPRICED_MAX_RATING = 2.5
+HIDDEN_GEM_RATING = 4.5
+HIDDEN_GEM_REVIEWS_QUANTILE = 0.5
+BEST_SELLER_REVIEWS_QUANTILE = 0.90
+BEST_SELLER_RATING = 4.0
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Built once per worker process by _init_worker
+_brand_of = None
+
+
+def thresholds(prices, ratings, reviews):
+    """Cut-offs for the notebook's high-value, overpriced, hidden gem and best seller lists from raw columns"""
+    prices, ratings = clean_price(prices), clean_rating(ratings)
+    reviews = zero_unrated_reviews(ratings, clean_reviews(reviews))
+    reviewed = reviews[reviews > 0]
+    return {
+        'low_price': float(prices.quantile(LOW_PRICE_QUANTILE)),
+        'high_price': float(prices.quantile(OVERPRICED_PRICE_QUANTILE)),
+        'median_price': float(prices.median()),
+        'low_reviews': float(reviewed.quantile(HIDDEN_GEM_REVIEWS_QUANTILE)) if len(reviewed) else 0.0,
+        'high_reviews': float(reviews.quantile(BEST_SELLER_REVIEWS_QUANTILE)),
+    }
+
+
+def latest_products(df):
+    """The notebook's drop_duplicate_products, keeping each product's most recent scrape when rows carry a scrape_date"""
+    if 'scrape_date' not in df:
+        return drop_duplicate_products(df)
+    latest_first = df.sort_values('scrape_date', ascending=False, kind='stable')
+    return drop_duplicate_products(latest_first).sort_index()
+
+
+def product_keys(df):
+    """drop_duplicate_products' identity per row: the ASIN, or the legacy (title, brand, price, reviews) key"""
+    legacy = df[LEGACY_DUPLICATE_KEY].astype(str).agg('\x1f'.join, axis=1)
+    if 'asin' not in df:
+        return legacy
+    asin = df['asin'].replace(['', 'N/A'], np.nan)
+    return asin.where(asin.notna(), legacy)
+
+
+def _latest_shards(shards, kept):
+    """Rows of each shard that latest_products kept: (key, scrape_date) in `kept`, each key once across shards"""
+    seen = set()
+    for shard in shards:
+        keys = product_keys(shard)
+        keep = np.zeros(len(shard), dtype=bool)
+        for position, (key, scrape_date) in enumerate(zip(keys, shard['scrape_date'])):
+            if key not in seen and (key, scrape_date) in kept:
+                seen.add(key)
+                keep[position] = True
+        yield shard[keep].reset_index(drop=True)
+
+
+def title_brand_rule():
+    """The notebook's brand rule, cached across shards: a daily history repeats the same titles in every shard"""
+    return lru_cache(maxsize=65536)(BrandMatcher().extract_brand_from_title)
+
+
+def analyze_titles(df, limits, brand_of):
+    """Notebook per-product analysis of one shard: cleaning, keyword validation, brand from title and scores"""
+    df = clean_products(df)
+    df['reviews'] = zero_unrated_reviews(df['rating'], df['reviews'])
+    df['soft_toy'] = soft_toy_mask(df).to_numpy()
+    df['brand'] = assign_brands(df['title'], brand_of)
+
+    rating, price, reviews = df['rating'], df['price'], df['reviews']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df['value_score'] = rating / (price / 100)  # rating per ₹100
+        df['quality_score'] = rating * (1 + np.log(reviews.where(reviews > 0)))
+    df['success_score'] = reviews * rating
+
+    df['high_value'] = (rating >= HIGH_VALUE_RATING) & (price <= limits['low_price'])
+    df['overpriced'] = (price >= limits['high_price']) & (rating > 0) & (rating <= OVERPRICED_MAX_RATING)
+    df['unrated_expensive'] = (rating == 0) & (price > limits['median_price'])
+    df['hidden_gem'] = (rating >= HIDDEN_GEM_RATING) & (reviews > 0) & (reviews <= limits['low_reviews'])
+    df['best_seller'] = (reviews >= limits['high_reviews']) & (rating >= BEST_SELLER_RATING)
+    return df
+
+
+def _init_worker():
+    global _brand_of
+    _brand_of = title_brand_rule()
+
+
+def _analyze_shard(df, limits):
+    return analyze_titles(df, limits, _brand_of)
+
+
+def _shards(df, chunk_size):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def run_sharded(shards, limits, workers=None, on_shard=None):
+    """Analyze shards on a process pool and concatenate the results in shard order
+
+    At most two shards per worker are in flight, so a generator of shards (a Parquet history read
+    piece by piece) is never loaded whole. workers=1 runs in this process, without pickling.
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers == 1:
+        brand_of = title_brand_rule()
+        for shard in shards:
+            results.append(analyze_titles(shard, limits, brand_of))
+            if on_shard:
+                on_shard(len(results[-1]))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as executor:
+            in_flight = deque()
+            for shard in shards:
+                in_flight.append(executor.submit(_analyze_shard, shard, limits))
+                if len(in_flight) >= 2 * workers:
+                    results.append(in_flight.popleft().result())
+                    if on_shard:
+                        on_shard(len(results[-1]))
+            while in_flight:
+                results.append(in_flight.popleft().result())
+                if on_shard:
+                    on_shard(len(results[-1]))
+    if not results:
+        return pd.DataFrame()
+    return pd.concat(results, ignore_index=True)
+
+
+def analyze_frame(df, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, on_shard=None, keep_duplicates=False):
+    """analyze_titles over an in-memory DataFrame, split into shards of chunk_size rows
+
+    Like the notebook, duplicates are dropped first (see latest_products), so each product counts once
+    towards the quantile cut-offs; keep_duplicates=True scores every row as it is.
+    """
+    if not keep_duplicates:
+        df = latest_products(df).reset_index(drop=True)
+    limits = thresholds(df['price'], df['rating'], df['reviews'])
+    return run_sharded(_shards(df, chunk_size), limits, workers, on_shard), limits
+
+
+def analyze_store(root='scrape_output', chunk_size=DEFAULT_CHUNK_SIZE, workers=None, keywords=None, since=None,
+                  until=None, on_shard=None, keep_duplicates=False):
+    """analyze_titles over the Parquet store: thresholds from a narrow first read, then rows shard by shard
+
+    A daily history holds each product once per day it was scraped; unless keep_duplicates is set, only its
+    latest scrape is analyzed (and counts towards the thresholds), as latest_products does for a DataFrame.
+    """
+    columns = ['price', 'rating', 'reviews']
+    if not keep_duplicates:
+        columns = list(dict.fromkeys(['asin', 'scrape_date', *LEGACY_DUPLICATE_KEY, *columns]))
+    numbers = read_products(root, columns=columns, keywords=keywords, since=since, until=until)
+    kept = None
+    if not keep_duplicates:
+        numbers = latest_products(numbers)
+        kept = set(zip(product_keys(numbers), numbers['scrape_date']))
+    limits = thresholds(numbers['price'], numbers['rating'], numbers['reviews'])
+    del numbers
+    shards = iter_product_frames(root, chunk_size, keywords=keywords, since=since, until=until)
+    if kept is not None:
+        shards = _latest_shards(shards, kept)
+    return run_sharded(shards, limits, workers, on_shard), limits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Brand, validate and score every scraped product on all cores")
+    parser.add_argument('input', help="scraped products CSV, or the root of the Parquet store")
+    parser.add_argument('--output', help="write the analyzed products here (.parquet or .csv)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows per shard")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--keyword', action='append', help="Parquet store only: keyword partition(s) to read")
+    parser.add_argument('--since', help="Parquet store only: first scrape date (YYYY-MM-DD)")
+    parser.add_argument('--until', help="Parquet store only: last scrape date (YYYY-MM-DD)")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="analyze every row instead of each product once (its latest scrape)")
+    args = parser.parse_args()
+
+    analyzed_rows = 0
+
+    def progress(rows):
+        global analyzed_rows
+        analyzed_rows += rows
+        print(f"   ... {analyzed_rows} products analyzed", end='\r', flush=True)
+
+    start = time.perf_counter()
+    if os.path.isdir(args.input):
+        products, limits = analyze_store(args.input, args.chunk_size, args.workers, args.keyword,
+                                         args.since, args.until, on_shard=progress,
+                                         keep_duplicates=args.keep_duplicates)
+    else:
+        products, limits = analyze_frame(pd.read_csv(args.input), args.chunk_size, args.workers, on_shard=progress,
+                                         keep_duplicates=args.keep_duplicates)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n📊 Analyzed {len(products)} products in {elapsed:.1f}s ({len(products) / elapsed if elapsed else 0:,.0f}/s)")
+    if len(products):
+        print(f"   Thresholds: low price ₹{limits['low_price']:.0f}, high price ₹{limits['high_price']:.0f}, "
+              f"hidden gem reviews ≤ {limits['low_reviews']:.0f}, best seller reviews ≥ {limits['high_reviews']:.0f}")
+        print(f"   🧸 Soft toys: {products['soft_toy'].sum()} | 🏷️  Brands: {products['brand'].nunique()}")
+        for column, label in (('high_value', "💎 High-value"), ('hidden_gem', "💎 Hidden gems"),
+                              ('overpriced', "⚠️  Overpriced"), ('best_seller', "🏆 Best sellers")):
+            print(f"   {label}: {products[column].sum()}")
+    if args.output:
+        if args.output.endswith('.parquet'):
+            products.to_parquet(args.output, index=False)
+        else:
+            products.to_csv(args.output, index=False)
+        print(f"✅ Saved analyzed products to '{args.output}'")